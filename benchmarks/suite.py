@@ -0,0 +1,332 @@
+"""
+Offline benchmark suite: time & memory-profile each pipeline stage against synthetic data (see
+`maven.synthetic`).
+
+Usage:
+    $ cd /path/to/repo
+    $ python -m benchmarks.suite --output benchmarks/results/baseline.json
+    $ # ...make changes...
+    $ python -m benchmarks.suite --compare benchmarks/results/baseline.json
+
+Each stage is timed `--repeat` times (the best time is kept) and then run once more under
+tracemalloc to record peak memory allocated. With `--compare`, stages more than `--threshold` times
+slower (or using more memory) than the baseline are reported as regressions and the suite exits with
+status 1.
+
+Synthetic data is the size of the real data by default; pass e.g. `--seats 6500 --locations 5000
+--dates 1000` to measure how stages scale (only compare results generated at the same sizes).
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from maven import synthetic
+from maven.datasets.coronavirus import CSSE
+from maven.datasets.general_election import UK2017Model, UKPolls
+from maven.datasets.general_election.base import UKModel, UKResults
+from maven.datasets.general_election.simulation import simulate_seats
+from maven.datasets.general_election.swing import NationalSwing
+
+
+def hoc_sheet(data_directory, sizes):
+    raw = data_directory / "general-election/UK/2017/results"
+
+    def run():
+        # Use a fresh cache each time so the workbook is parsed
+        with tempfile.TemporaryDirectory() as cache_dir:
+            UKResults.process_hoc_sheet(
+                synthetic.HOC_WORKBOOK, data_dir=raw, sheet_name="2017", cache_dir=cache_dir
+            )
+
+    return run
+
+
+def clean_hoc_sheet(data_directory, sizes):
+    sheet = synthetic.hoc_sheet("2017", n_seats=sizes["n_seats"])
+    return lambda: UKResults.clean_hoc_sheet(sheet.copy())
+
+
+def polls(data_directory, sizes):
+    pipeline = UKPolls(directory=data_directory / "general-election/UK/polls")
+    pipeline.rebuild = True
+    return pipeline.process
+
+
+def model(data_directory, sizes):
+    pipeline = UK2017Model(directory=data_directory / "general-election/UK/2017/model")
+    pipeline.cache = False
+    pipeline.results_seat_count = {
+        year: synthetic.seat_count(year, n_seats=sizes["n_seats"])
+        for year in [pipeline.last, pipeline.now]
+    }
+    return pipeline
+
+
+def model_load_results_data(data_directory, sizes):
+    return model(data_directory, sizes).load_results_data
+
+
+def model_fold_ukip(data_directory, sizes):
+    pipeline = model(data_directory, sizes)
+    results = pipeline.read_source(f"general_election-uk-{pipeline.last}-results.csv")
+    return lambda: UKModel.fold_ukip_into_other(results)
+
+
+def model_load_polling_data(data_directory, sizes):
+    return model(data_directory, sizes).load_polling_data
+
+
+def model_poll_of_polls(data_directory, sizes):
+    pipeline = model(data_directory, sizes)
+    polls_full = pipeline.load_polling_data()
+    return lambda: pipeline.get_regional_and_national_poll_of_polls(
+        {geo: df.copy() for geo, df in polls_full.items()}
+    )
+
+
+def model_daily_poll_of_polls(data_directory, sizes):
+    pipeline = model(data_directory, sizes)
+    polls_full = pipeline.load_polling_data()
+    return lambda: pipeline.get_daily_poll_of_polls(
+        polls_full, start_date=pipeline.now_date - pd.Timedelta(days=60)
+    )
+
+
+def model_stages(data_directory, sizes):
+    """The model pipeline and the inputs of each stage after loading data, from one run of them."""
+    pipeline = model(data_directory, sizes)
+    results = pipeline.load_results_data()
+    polls = pipeline.get_regional_and_national_poll_of_polls(pipeline.load_polling_data())
+    combined = pipeline.combine_results_and_polls(results=results[pipeline.last], polls=polls)
+    national = pipeline.calculate_national_swing(combined.copy())
+    results[pipeline.last] = pipeline.calculate_geo_swing(national.copy())
+    return pipeline, combined, national, results
+
+
+def model_national_swing(data_directory, sizes):
+    pipeline, combined, _, _ = model_stages(data_directory, sizes)
+    return lambda: pipeline.calculate_national_swing(combined.copy())
+
+
+def model_geo_swing(data_directory, sizes):
+    pipeline, _, national, _ = model_stages(data_directory, sizes)
+    return lambda: pipeline.calculate_geo_swing(national.copy())
+
+
+def model_export(data_directory, sizes):
+    pipeline, _, _, results = model_stages(data_directory, sizes)
+    return lambda: pipeline.export_model_ready_dataframe(
+        {year: df.copy() for year, df in results.items()}
+    )
+
+
+def model_process(data_directory, sizes):
+    return model(data_directory, sizes).process
+
+
+def model_simulate_seats(data_directory, sizes):
+    pipeline = model(data_directory, sizes)
+    pipeline.process()
+    df = pd.read_csv(pipeline.directory / "processed" / pipeline.target[0])
+    return lambda: simulate_seats(df, n_draws=10000)
+
+
+def national_swing_scenarios(data_directory, sizes):
+    pipeline = model(data_directory, sizes)
+    results = pipeline.load_results_data()[pipeline.last]
+    rng = np.random.RandomState(0)
+    polls = pd.DataFrame(
+        rng.dirichlet(np.ones(6), size=1000), columns=["con", "lab", "ld", "grn", "snp", "other"]
+    )
+    return lambda: NationalSwing(results).evaluate(polls)
+
+
+def import_maven(data_directory, sizes):
+    """`import maven` in a fresh interpreter, as paid by every CLI call & short-lived worker."""
+    return lambda: subprocess.run([sys.executable, "-c", "import maven"], check=True)
+
+
+def csse(data_directory, sizes):
+    pipeline = CSSE(directory=data_directory / "coronavirus/CSSE")
+    pipeline.rebuild = True
+    pipeline.incremental = False
+    return pipeline.process
+
+
+def csse_reshape(data_directory, sizes):
+    data = CSSE(directory=data_directory / "coronavirus/CSSE").read_raw_data()
+    return lambda: CSSE.reshape(data)
+
+
+# Stage name -> function taking the synthetic data directory & sizes and returning what to benchmark
+STAGES = {
+    "UKResults.process_hoc_sheet": hoc_sheet,
+    "UKResults.clean_hoc_sheet": clean_hoc_sheet,
+    "UKPolls.process": polls,
+    "UKModel.load_results_data": model_load_results_data,
+    "UKModel.fold_ukip_into_other": model_fold_ukip,
+    "UKModel.load_polling_data": model_load_polling_data,
+    "UKModel.get_regional_and_national_poll_of_polls": model_poll_of_polls,
+    "UKModel.get_daily_poll_of_polls": model_daily_poll_of_polls,
+    "UKModel.calculate_national_swing": model_national_swing,
+    "UKModel.calculate_geo_swing": model_geo_swing,
+    "UKModel.export_model_ready_dataframe": model_export,
+    "UKModel.process": model_process,
+    "simulation.simulate_seats": model_simulate_seats,
+    "swing.NationalSwing.evaluate": national_swing_scenarios,
+    "CSSE.process": csse,
+    "CSSE.reshape": csse_reshape,
+    "import maven": import_maven,
+}
+
+
+# Default sizes of synthetic data: the size of the real data (CSSE as of March 2020).
+SIZES = {"n_seats": 650, "n_polls": 600, "n_geo_polls": 200, "n_locations": 250, "n_dates": 60}
+
+
+def measure(fn, repeat=3):
+    """Best time (seconds) of repeat runs of fn, and peak memory (bytes) allocated by one more."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def run(stages=None, repeat=3, seed=0, **sizes):
+    """Benchmark stages (default: all) against synthetic data.
+
+    Args:
+        stages (list of str): Names of stages to run (keys of STAGES).
+        repeat (int): Number of timed runs per stage.
+        seed (int): Random seed for synthetic data.
+        **sizes: Sizes of synthetic data (see synthetic.write_raw_data), e.g. n_seats=6500.
+
+    Returns: dict of environment details & results ({stage: {"seconds": ..., "peak_memory": ...}}).
+    """
+    sizes = dict(SIZES, **sizes)
+    data_directory = Path(tempfile.mkdtemp())
+    try:
+        synthetic.write_raw_data(data_directory, seed=seed, **sizes)
+        results = {}
+        for name in stages or STAGES:
+            # Silence progress output & checksum warnings (synthetic data never matches checksums)
+            with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                seconds, peak = measure(STAGES[name](data_directory, sizes), repeat=repeat)
+            results[name] = {"seconds": seconds, "peak_memory": peak}
+            print(f"{name:<50} {seconds:9.4f}s {peak / 2 ** 20:9.1f} MB")
+    finally:
+        shutil.rmtree(data_directory)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "seed": seed,
+        "sizes": sizes,
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=1.25):
+    """Print each stage's time & memory relative to baseline.
+
+    Returns: list of stages more than threshold times slower, or using more than threshold times the
+             memory.
+    """
+    if current["sizes"] != baseline.get("sizes", SIZES):
+        raise ValueError(
+            f"Baseline was run on synthetic data of different sizes: {baseline.get('sizes', SIZES)}"
+        )
+    regressions = []
+    print(f"\n{'stage':<50} {'time':>9} {'memory':>9}")
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            print(f"{name:<50} {'new':>9} {'new':>9}")
+            continue
+        time_ratio = result["seconds"] / baseline["results"][name]["seconds"]
+        memory_ratio = result["peak_memory"] / max(baseline["results"][name]["peak_memory"], 1)
+        regressed = time_ratio > threshold or memory_ratio > threshold
+        if regressed:
+            regressions.append(name)
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<50} {time_ratio:8.2f}x {memory_ratio:8.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "stages", nargs="*", help=f"Stages to run (default: all). One of: {', '.join(STAGES)}"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Number of timed runs per stage (default: 3)."
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Random seed for synthetic data (default: 0)."
+    )
+    for size, default in SIZES.items():
+        parser.add_argument(
+            f"--{size[2:].replace('_', '-')}",
+            dest=size,
+            type=int,
+            default=default,
+            help=f"Synthetic data size {size} (default: {default}).",
+        )
+    parser.add_argument("--output", type=Path, help="Save results as JSON to this file.")
+    parser.add_argument(
+        "--compare", type=Path, help="Compare results against a previously saved JSON file."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Slowdown treated as a regression (default: 1.25).",
+    )
+    args = parser.parse_args(argv)
+
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    sizes = {size: getattr(args, size) for size in SIZES}
+    current = run(stages=args.stages, repeat=args.repeat, seed=args.seed, **sizes)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(current, baseline, threshold=args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,12 @@
-from . import utils
-from .get import get
+import importlib
+
+from .get import get, get_dependency_graph, get_many, prefetch
 
 __version__ = "0.1.0"
+
+
+def __getattr__(name):
+    """Import `maven.utils` (and so pandas, numpy & requests) on first use, not on import."""
+    if name == "utils":
+        return importlib.import_module(".utils", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
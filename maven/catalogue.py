@@ -0,0 +1,252 @@
+"""
+Declarative catalogue of datasets: what each dataset is built from and what it produces, without
+importing (or instantiating) its pipeline.
+
+Each `Dataset` records the dataset's identifier, the import path of its pipeline class, its sources
+(raw files' URLs, or identifiers of the datasets it's built from) & processed files with their MD5
+checksums, and the approximate size of its processed files. Pipelines take their sources & targets
+from here (see `Pipeline.dataset_name`), and `maven.get` plans builds from it, so tools that only
+need to reason about datasets never import pandas.
+
+Other packages can add datasets without editing maven by registering a Dataset (or a list of them)
+under the "maven.datasets" entry point group, e.g. in their setup.py:
+    entry_points={"maven.datasets": ["my-datasets = my_package.catalogue:DATASETS"]}
+
+Example usage:
+    > from maven import catalogue
+    > catalogue.get_dataset('general-election/UK/2017/model').upstream
+    > sorted(catalogue.load_catalogue())
+"""
+import warnings
+from collections import namedtuple
+from functools import lru_cache
+from urllib.parse import urlparse
+
+ENTRY_POINT_GROUP = "maven.datasets"
+
+
+def is_url(url):
+    """Source: https://stackoverflow.com/a/52455972"""
+    try:
+        result = urlparse(url)
+        return all([result.scheme, result.netloc])
+    except ValueError:
+        return False
+
+
+class Dataset(namedtuple("Dataset", ["name", "pipeline", "sources", "targets", "size"])):
+    """Metadata of a dataset.
+
+    Attributes:
+        name (str): Identifier, e.g. "general-election/UK/2017/model".
+        pipeline (str): Import path of the pipeline class building the dataset, e.g.
+                        "maven.datasets.general_election.uk_2017_model.UK2017Model".
+        sources (tuple): Tuples of (url, filename, checksum). The url is either where the raw file
+                         is downloaded from (url + filename, unless the pipeline renames sources) or
+                         the identifier of the dataset whose processed file it is.
+        targets (tuple): Tuples of (filename, checksum) of processed files (checksum None if not
+                         fixed).
+        size (int): Approximate total size of processed files in bytes (None if unknown).
+    """
+
+    __slots__ = ()
+
+    @property
+    def upstream(self):
+        """Identifiers of the datasets this dataset is built from."""
+        upstream = []
+        for url, _, _ in self.sources:
+            if not is_url(url) and url not in upstream:
+                upstream.append(url)
+        return upstream
+
+
+Dataset.__new__.__defaults__ = (None,)
+
+HOC_RESULTS_URL = "http://researchbriefings.files.parliament.uk/documents/CBP-8647/"
+HOC_RESULTS_SOURCE = (
+    HOC_RESULTS_URL,
+    "1918-2017election_results_by_pcon.xlsx",
+    "a1e4628945574639b541b21bada2531c",
+)
+SIXFIFTY_URL = "https://s3-eu-west-1.amazonaws.com/sixfifty/"
+CSSE_URL = (
+    "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/"
+    "csse_covid_19_data/csse_covid_19_time_series/"
+)
+# Processed files of general-election/UK/polls used by model-ready datasets
+POLLS_SOURCES = (
+    (
+        "general-election/UK/polls",
+        "general_election-uk-polls.csv",
+        "cbc3c19a376b4ab632f122008f593799",
+    ),
+    (
+        "general-election/UK/polls",
+        "general_election-london-polls.csv",
+        "cd28ebb7233b808796535fc0b572304e",
+    ),
+    (
+        "general-election/UK/polls",
+        "general_election-scotland-polls.csv",
+        "6c2ba92e2325de0e22a208fb0b3e95fc",
+    ),
+    (
+        "general-election/UK/polls",
+        "general_election-wales-polls.csv",
+        "6857df3c18df525d5e59a6bf1170b10c",
+    ),
+    (
+        "general-election/UK/polls",
+        "general_election-ni-polls.csv",
+        "46bbe5e9dc29d4b3042837fe4c16ca07",
+    ),
+)
+
+# Sizes are estimated from synthetic data shaped like the real data (see maven.synthetic).
+DATASETS = [
+    Dataset(
+        name="coronavirus/CSSE",
+        pipeline="maven.datasets.coronavirus.csse.CSSE",
+        sources=(
+            (CSSE_URL, "time_series_19-covid-Confirmed.csv", "09b6dfc1ee244ba652b8639f0aa2f093"),
+            (CSSE_URL, "time_series_19-covid-Deaths.csv", "69a9dfa8a901c8f0bbe0f6499db8641c"),
+            (CSSE_URL, "time_series_19-covid-Recovered.csv", "4d1c1d4f1c45514e3562cb42ef2729c7"),
+        ),
+        targets=(
+            ("CSSE_country_province.csv", "bfce6bf16571fbb3004f9e5eee7b9e30"),
+            ("CSSE_country.csv", "b5b3ed6fc75f323593fd7710a4262e1b"),
+        ),
+        size=1_100_000,
+    ),
+    Dataset(
+        name="general-election/UK/2010/results",
+        pipeline="maven.datasets.general_election.uk_2010_results.UK2010Results",
+        sources=(HOC_RESULTS_SOURCE,),
+        targets=(("general_election-uk-2010-results.csv", "954a0916f5ce791ca566484ce566088d"),),
+        size=750_000,
+    ),
+    Dataset(
+        name="general-election/UK/2015/model",
+        pipeline="maven.datasets.general_election.uk_2015_model.UK2015Model",
+        sources=(
+            (
+                "general-election/UK/2010/results",
+                "general_election-uk-2010-results.csv",
+                "954a0916f5ce791ca566484ce566088d",
+            ),
+            (
+                "general-election/UK/2015/results",
+                "general_election-uk-2015-results.csv",
+                "9a785cb19275e4dbc79da67eece6067f",
+            ),
+        )
+        + POLLS_SOURCES,
+        targets=(("general_election-uk-2015-model.csv", None),),
+        size=2_000_000,
+    ),
+    Dataset(
+        name="general-election/UK/2015/results",
+        pipeline="maven.datasets.general_election.uk_2015_results.UK2015Results",
+        sources=(HOC_RESULTS_SOURCE,),
+        targets=(("general_election-uk-2015-results.csv", "9a785cb19275e4dbc79da67eece6067f"),),
+        size=750_000,
+    ),
+    Dataset(
+        name="general-election/UK/2017/model",
+        pipeline="maven.datasets.general_election.uk_2017_model.UK2017Model",
+        sources=(
+            (
+                "general-election/UK/2015/results",
+                "general_election-uk-2015-results.csv",
+                "9a785cb19275e4dbc79da67eece6067f",
+            ),
+            (
+                "general-election/UK/2017/results",
+                "general_election-uk-2017-results.csv",
+                "c7e1fde647e55f9d4567cb81e62c782a",
+            ),
+        )
+        + POLLS_SOURCES,
+        targets=(("general_election-uk-2017-model.csv", None),),
+        size=2_000_000,
+    ),
+    Dataset(
+        name="general-election/UK/2017/results",
+        pipeline="maven.datasets.general_election.uk_2017_results.UK2017Results",
+        sources=(HOC_RESULTS_SOURCE,),
+        targets=(("general_election-uk-2017-results.csv", "c7e1fde647e55f9d4567cb81e62c782a"),),
+        size=750_000,
+    ),
+    Dataset(
+        name="general-election/UK/polls",
+        pipeline="maven.datasets.general_election.uk_polls.UKPolls",
+        sources=(
+            (
+                "https://3859gp38qzh51h504x6gvv0o-wpengine.netdna-ssl.com/files/2020/01/",
+                "PollBase-Q4-2019.xlsx",
+                "81e9dd972f17d0b4f572e7da6c4c497f",
+            ),
+            (SIXFIFTY_URL, "polls.csv", "8c32b623346c8c0faa603bc76c4d7fd1"),
+            (SIXFIFTY_URL, "polls_london.csv", "cd28ebb7233b808796535fc0b572304e"),
+            (SIXFIFTY_URL, "polls_scotland.csv", "6c2ba92e2325de0e22a208fb0b3e95fc"),
+            (SIXFIFTY_URL, "polls_wales.csv", "6857df3c18df525d5e59a6bf1170b10c"),
+            (SIXFIFTY_URL, "polls_ni.csv", "46bbe5e9dc29d4b3042837fe4c16ca07"),
+        ),
+        targets=(("general_election-uk-polls.csv", "cbc3c19a376b4ab632f122008f593799"),),
+        size=300_000,
+    ),
+]
+BUILTIN_DATASETS = {dataset.name: dataset for dataset in DATASETS}
+
+
+def entry_points(group):
+    """Installed entry points in group (importlib.metadata, or pkg_resources before Python 3.8)."""
+    try:
+        from importlib import metadata
+    except ImportError:
+        import pkg_resources
+
+        return list(pkg_resources.iter_entry_points(group))
+    installed = metadata.entry_points()
+    if hasattr(installed, "select"):
+        return list(installed.select(group=group))
+    return list(installed.get(group, []))
+
+
+@lru_cache(maxsize=None)
+def load_catalogue():
+    """Every dataset: maven's own plus those registered by other packages under the "maven.datasets"
+    entry point group.
+
+    Entry points can't replace maven's own datasets, and entry points that fail to load are skipped
+    with a warning.
+
+    Returns: dict of Dataset by name.
+    """
+    catalogue = dict(BUILTIN_DATASETS)
+    for entry_point in entry_points(ENTRY_POINT_GROUP):
+        try:
+            registered = entry_point.load()
+        except Exception as e:
+            warnings.warn(f"Couldn't load datasets from entry point {entry_point.name}: {e!r}")
+            continue
+        for dataset in [registered] if isinstance(registered, Dataset) else registered:
+            if dataset.name in catalogue:
+                warnings.warn(
+                    f"Dataset '{dataset.name}' from entry point {entry_point.name} "
+                    "is already registered"
+                )
+                continue
+            catalogue[dataset.name] = dataset
+    return catalogue
+
+
+def get_dataset(name):
+    """Metadata of dataset `name` (loading entry points only for datasets that aren't maven's)."""
+    if name in BUILTIN_DATASETS:
+        return BUILTIN_DATASETS[name]
+    catalogue = load_catalogue()
+    if name not in catalogue:
+        raise KeyError(f"'{name}' not found in datasets.")
+    return catalogue[name]
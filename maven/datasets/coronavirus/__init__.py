@@ -1,5 +1,18 @@
-from .csse import CSSE
+import importlib
 
-__all__ = [
-    "CSSE",
-]
+# Pipeline class -> module defining it, imported on first use (see maven.get.mapper).
+_modules = {
+    "CSSE": "csse",
+}
+
+__all__ = list(_modules)
+
+
+def __getattr__(name):
+    if name in _modules:
+        return getattr(importlib.import_module(f".{_modules[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -9,111 +9,271 @@ Usage:
 Sources:
     - https://github.com/CSSEGISandData/COVID-19/
 """
+import hashlib
+import json
 import os
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 from maven import utils
+from maven.store import temporary_path
 
 
 class CSSE(utils.Pipeline):
     """Handle CSSE data from https://github.com/CSSEGISandData/COVID-19/"""
 
+    dataset_name = "coronavirus/CSSE"
+
+    metrics = ["Confirmed", "Deaths", "Recovered"]
+    id_vars = ["Province/State", "Country/Region", "Lat", "Long"]
+
     def __init__(self, directory=Path("data/coronavirus/CSSE")):
         # inherit base __init__ but override default directory
         super(CSSE, self).__init__(directory=directory)
-        # Source & targets
-        base_url = (
-            "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/"
-            "csse_covid_19_data/csse_covid_19_time_series/"
-        )
-        self.sources = [
-            # url, filename, checksum
-            (base_url, "time_series_19-covid-Confirmed.csv", "09b6dfc1ee244ba652b8639f0aa2f093"),
-            (base_url, "time_series_19-covid-Deaths.csv", "69a9dfa8a901c8f0bbe0f6499db8641c"),
-            (base_url, "time_series_19-covid-Recovered.csv", "4d1c1d4f1c45514e3562cb42ef2729c7"),
-        ]
-        self.targets = [
-            # filename, checksum(
-            ("CSSE_country_province.csv", "bfce6bf16571fbb3004f9e5eee7b9e30"),
-            ("CSSE_country.csv", "b5b3ed6fc75f323593fd7710a4262e1b"),
-        ]
+        # Sources & targets are in maven.catalogue
         # Config
         self.rename_source = False
         self.retrieve_all = True
         self.cache = True
         self.verbose = False
         self.verbose_name = "CSSE"
+        self.incremental = True  # only process newly added dates when rebuilding processed files
+        self.state_filename = ".CSSE_state.json"  # dates processed so far, in processed/
+
+    @classmethod
+    def locations(cls, df):
+        """Index of locations in a raw dataframe: (province/state, country/region, occurrence).
+
+        Locations are keyed on their names rather than their (float) coordinates; occurrence numbers
+        any repeats of the same province/country so every row has a unique key.
+        """
+        keys = df[["Province/State", "Country/Region"]].fillna("")
+        occurrence = keys.groupby(["Province/State", "Country/Region"], sort=False).cumcount()
+        return pd.MultiIndex.from_arrays(
+            [keys["Province/State"], keys["Country/Region"], occurrence],
+            names=["province_state", "country_region", "occurrence"],
+        )
+
+    @classmethod
+    def reshape(cls, data, date_columns=None):
+        """Reshape wide time series (one column per date) for each metric into one long dataframe.
+
+        The metrics are aligned on a shared index of locations & dates in a single (metric,
+        location, date) array, which is then flattened date by date with locations pre-sorted by
+        country/province, so no merge or sort of the long table is needed.
+
+        Args:
+            data (dict): Raw dataframe for each of cls.metrics.
+            date_columns (dict): Date columns (e.g. "1/22/20") to reshape for each metric (default:
+                                 all of them).
+
+        Returns: pd.DataFrame with one row per date per country/province, sorted by date, country &
+                 province, with categorical country_region/province_state and integer counts
+                 (nullable where values are missing).
+        """
+        if date_columns is None:
+            date_columns = {
+                metric: [col for col in df.columns if col not in cls.id_vars]
+                for metric, df in data.items()
+            }
+
+        # Shared index of locations (sorted by country/province) & dates (sorted)
+        index = {metric: cls.locations(data[metric]) for metric in cls.metrics}
+        locations = pd.concat(
+            [data[metric][cls.id_vars].set_axis(index[metric], axis=0) for metric in cls.metrics],
+            axis=0,
+        )
+        locations = locations[~locations.index.duplicated()].sort_values(
+            ["Country/Region", "Province/State"], kind="mergesort", na_position="last"
+        )
+        dates = pd.Index(
+            list(dict.fromkeys(col for metric in cls.metrics for col in date_columns[metric]))
+        )
+        parsed_dates = pd.to_datetime(dates, format="%m/%d/%y")
+        order = parsed_dates.argsort(kind="mergesort")
+        dates, parsed_dates = dates[order], parsed_dates[order]
+
+        # (metric, location, date) array of counts
+        values = np.stack(
+            [
+                data[metric][date_columns[metric]]
+                .set_axis(index[metric], axis=0)
+                .reindex(index=locations.index, columns=dates)
+                .to_numpy(dtype=float)
+                for metric in cls.metrics
+            ]
+        )
+
+        # Flatten date by date
+        n_locations, n_dates = len(locations), len(dates)
+        location_codes = np.tile(np.arange(n_locations), n_dates)
+        df = pd.DataFrame(
+            {
+                "date": np.repeat(parsed_dates.values, n_locations),
+                "country_region": pd.Categorical(locations["Country/Region"]).take(location_codes),
+                "province_state": pd.Categorical(locations["Province/State"]).take(location_codes),
+                "lat": locations["Lat"].to_numpy()[location_codes],
+                "lon": locations["Long"].to_numpy()[location_codes],
+            }
+        )
+        for i, metric in enumerate(cls.metrics):
+            df[metric.lower()] = utils.compact_integers(values[i].T.ravel())
+        return df
+
+    @staticmethod
+    def country_rollup(df_country_province):
+        """Country-level data from country/province-level data."""
+        return (
+            df_country_province.groupby(["date", "country_region"], observed=True)[
+                ["confirmed", "deaths", "recovered"]
+            ]
+            .sum()
+            .reset_index()
+        )
+
+    @classmethod
+    def fingerprint(cls, df, date_columns):
+        """MD5 of the locations & values of date_columns in a raw dataframe (to spot revisions)."""
+        hash_md5 = hashlib.md5(json.dumps(list(date_columns)).encode())
+        hash_md5.update(
+            pd.util.hash_pandas_object(df[cls.id_vars + list(date_columns)], index=False).values
+        )
+        return hash_md5.hexdigest()
+
+    def read_raw_data(self):
+        """Raw wide dataframe for each metric."""
+        return {
+            metric: pd.read_csv(self.directory / "raw" / f"time_series_19-covid-{metric}.csv")
+            for metric in self.metrics
+        }
+
+    def save_state(self, data, date_columns, frames):
+        """Record the date columns processed (with fingerprints & output types) for later runs."""
+        state = {
+            "dates": date_columns,
+            "fingerprints": {
+                metric: self.fingerprint(data[metric], date_columns[metric])
+                for metric in self.metrics
+            },
+            "dtypes": {
+                filename: {col: str(dtype) for col, dtype in df.dtypes.items()}
+                for filename, df in frames.items()
+            },
+        }
+        tmp = temporary_path(self.directory / "processed" / self.state_filename)
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self.directory / "processed" / self.state_filename)
+
+    def process_incrementally(self, data, date_columns):
+        """Append only date columns that haven't been processed yet to the processed files.
+
+        Returns: True if the processed files are now up to date, False if a full rebuild is needed
+                 (no previous run to build on, or values for dates already processed have since been
+                 revised).
+        """
+        state_path = self.directory / "processed" / self.state_filename
+        targets = {
+            filename: self.directory
+            / "processed"
+            / utils.output_filename(filename, self.output_format)
+            for filename, _ in self.targets
+        }
+        if not (
+            self.write and state_path.exists() and all(path.exists() for path in targets.values())
+        ):
+            return False
+        with open(state_path) as f:
+            state = json.load(f)
+        if set(state["dtypes"]) != set(targets):
+            return False
+
+        # Check dates already processed haven't been revised (or removed) upstream
+        for metric in self.metrics:
+            processed = state["dates"][metric]
+            if not set(processed) <= set(date_columns[metric]):
+                return False
+            if self.fingerprint(data[metric], processed) != state["fingerprints"][metric]:
+                return False
+
+        # Only dates after those already processed can be appended
+        new_date_columns = {
+            metric: [col for col in date_columns[metric] if col not in state["dates"][metric]]
+            for metric in self.metrics
+        }
+        processed_dates = [col for metric in self.metrics for col in state["dates"][metric]]
+        new_dates = [col for metric in self.metrics for col in new_date_columns[metric]]
+        if not new_dates:
+            print("No new dates to process.")
+            return True
+        if processed_dates and min(pd.to_datetime(new_dates, format="%m/%d/%y")) <= max(
+            pd.to_datetime(processed_dates, format="%m/%d/%y")
+        ):
+            return False
+
+        print(f"Processing {len(set(new_dates))} new date(s).")
+        df_country_province = self.reshape(data, date_columns=new_date_columns)
+        new_frames = {
+            "CSSE_country_province.csv": df_country_province,
+            "CSSE_country.csv": self.country_rollup(df_country_province),
+        }
+        try:
+            new_frames = {
+                filename: df.astype(state["dtypes"][filename])
+                for filename, df in new_frames.items()
+            }
+        except (TypeError, ValueError):
+            # e.g. missing values in a column previously exported as integers
+            return False
+
+        for filename, df in new_frames.items():
+            if self.output_format == "csv" and not self.keep_frames:
+                utils.append_csv(df, targets[filename])
+            else:
+                self.export(pd.concat([utils.read_frame(targets[filename]), df], axis=0), filename)
+        self.save_state(data, date_columns, new_frames)
+        return True
 
     def process(self):
-        """Process CSSE data."""
-        target_dir = self.directory / "processed"
-        os.makedirs(target_dir, exist_ok=True)  # create directory if it doesn't exist
+        """Process CSSE data.
+
+        If self.incremental is set and the processed files are being rebuilt (e.g. caching is
+        disabled to refresh the data), only dates added since the last run are processed and
+        appended to them, unless earlier values have been revised upstream.
+        """
 
         def process_and_export():
             """Either caching disabled or file not yet processed; process regardless."""
-            data = {}
-            for metric in ["Confirmed", "Deaths", "Recovered"]:
-                df = pd.read_csv(self.directory / "raw" / f"time_series_19-covid-{metric}.csv")
-                # Pivot all to long
-                id_vars = ["Province/State", "Country/Region", "Lat", "Long"]
-                value_vars = list(set(df.columns) - set(id_vars))
-                df = df.melt(
-                    id_vars=id_vars, value_vars=value_vars, var_name="date", value_name=metric
-                )
-                df["date"] = pd.to_datetime(df.date, format="%m/%d/%y")
-                data[metric] = df.copy()
-
-            # Merge together
-            df_country_province = pd.merge(
-                data["Confirmed"],
-                data["Deaths"],
-                how="outer",
-                on=["Province/State", "Country/Region", "Lat", "Long", "date"],
-            ).merge(
-                data["Recovered"],
-                how="outer",
-                on=["Province/State", "Country/Region", "Lat", "Long", "date"],
-            )
-
-            # Clean
-            df_country_province.columns = utils.sanitise(
-                df_country_province.columns, replace={"long": "lon"}
-            )
-            df_country_province = df_country_province[
-                [
-                    "date",
-                    "country_region",
-                    "province_state",
-                    "lat",
-                    "lon",
-                    "confirmed",
-                    "deaths",
-                    "recovered",
-                ]
-            ].sort_values(["date", "country_region", "province_state"])
-
-            # Country-level data
-            df_country = (
-                df_country_province.groupby(["date", "country_region"])[
-                    ["confirmed", "deaths", "recovered"]
-                ]
-                .sum()
-                .reset_index()
-            )
+            with self.stage("read_raw_data"):
+                data = self.read_raw_data()
+            date_columns = {
+                metric: [col for col in df.columns if col not in self.id_vars]
+                for metric, df in data.items()
+            }
+            if self.incremental:
+                with self.stage("process_incrementally") as stage:
+                    stage["processed"] = self.process_incrementally(data, date_columns)
+                if stage["processed"]:
+                    return
+
+            with self.stage("reshape"):
+                df_country_province = self.reshape(data)
+            with self.stage("country_rollup"):
+                df_country = self.country_rollup(df_country_province)
 
             # Export
-            print(f"Exporting dataset to {target_dir.resolve()}")
-            df_country_province.to_csv(target_dir / "CSSE_country_province.csv", index=False)
-            df_country.to_csv(target_dir / "CSSE_country.csv", index=False)
-
-        for filename, checksum in self.targets:
-            utils.retrieve_from_cache_if_exists(
-                filename=filename,
-                target_dir=target_dir,
-                processing_fn=process_and_export,
-                md5_checksum=checksum,
-                caching_enabled=self.cache,
-                verbose=self.verbose,
-            )
+            self.export(df_country_province, "CSSE_country_province.csv")
+            self.export(df_country, "CSSE_country.csv")
+            if self.write:
+                self.save_state(
+                    data,
+                    date_columns,
+                    {
+                        "CSSE_country_province.csv": df_country_province,
+                        "CSSE_country.csv": df_country,
+                    },
+                )
+
+        self.process_targets(process_and_export)
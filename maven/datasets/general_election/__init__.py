@@ -1,17 +1,24 @@
-from .uk_2010_results import UK2010Results
-from .uk_2015_model import UK2015Model
-from .uk_2015_results import UK2015Results
-from .uk_2017_model import UK2017Model
-from .uk_2017_results import UK2017Results
-from .uk_2019_model import UK2019Model
-from .uk_polls import UKPolls
+import importlib
 
-__all__ = [
-    "UK2010Results",
-    "UK2015Model",
-    "UK2015Results",
-    "UK2017Model",
-    "UK2017Results",
-    "UK2019Model",
-    "UKPolls",
-]
+# Pipeline class -> module defining it, imported on first use (see maven.get.mapper).
+_modules = {
+    "UK2010Results": "uk_2010_results",
+    "UK2015Model": "uk_2015_model",
+    "UK2015Results": "uk_2015_results",
+    "UK2017Model": "uk_2017_model",
+    "UK2017Results": "uk_2017_results",
+    "UK2019Model": "uk_2019_model",
+    "UKPolls": "uk_polls",
+}
+
+__all__ = list(_modules)
+
+
+def __getattr__(name):
+    if name in _modules:
+        return getattr(importlib.import_module(f".{_modules[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,67 +1,97 @@
 """
 Base classes.
 """
+import hashlib
+import importlib.util
+import json
 import os
-from functools import partial
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 from maven import utils
+from maven.datasets.general_election.seat_matrix import SeatMatrix
+from maven.lock import FileLock
+from maven.manifest import Manifest
+from maven.store import temporary_path
+from maven.utils import Pipeline
 
 
-class Pipeline:
-    """Generic class for retrieving & processing datasets with built-in caching & MD5 checking."""
-
-    def __init__(self, directory):
-        self.directory = Path(directory)
-        self.sources = []  # tuples of (url, filename, checksum)
-        self.retrieve_all = False
-        self.target = (None, None)
-        self.verbose_name = ""
-        self.year = None
-        self.verbose = False
-        self.cache = True
-
-    def retrieve(self):
-        """Retrieve data from self.sources into self.directory / 'raw' and validate against checksum."""
-        target_dir = self.directory / "raw"
-        os.makedirs(target_dir, exist_ok=True)  # create directory if it doesn't exist
-        for url, filename, md5_checksum in self.sources:
-            if utils.is_url(url):
-                processing_fn = partial(
-                    utils.fetch_url, url=url, filename=filename, target_dir=target_dir
-                )
-            else:
-                processing_fn = partial(
-                    utils.get_and_copy, identifier=url, filename=filename, target_dir=target_dir
-                )
-            utils.retrieve_from_cache_if_exists(
-                filename=filename,
-                target_dir=target_dir,
-                processing_fn=processing_fn,
-                md5_checksum=md5_checksum,
-                caching_enabled=self.cache,
-                verbose=self.verbose,
-            )
-            if not self.retrieve_all:  # retrieve just the first dataset
-                return
-        if self.retrieve_all:  # all datasets retrieved
-            return
-        else:  # retrieving first dataset only but all fallbacks failed
-            raise RuntimeError(f"Unable to download {self.verbose_name} data.")
+class UKResults(Pipeline):
+    """Handles results data for UK General Elections."""
 
-    def process(self):
-        pass
+    # Sheets of the House of Commons Library workbook used by UK results pipelines, parsed together
+    # in one pass.
+    hoc_sheets = ["2010", "2015", "2017"]
+    # Options for reading each sheet's results (skipping the header & footer rows around them).
+    hoc_read_options = {"skiprows": 4, "header": None, "skipfooter": 19}
 
+    @classmethod
+    def read_hoc_workbook(cls, path, sheet_names, cache_dir=None):
+        """Read raw sheets from the House of Commons Library results workbook.
 
-class UKResults(Pipeline):
-    """Handles results data for UK General Elections."""
+        Parsing the workbook is slow, so all requested sheets that aren't cached yet are parsed in a
+        single pass and saved as parquet files in cache_dir (if pyarrow is installed), keyed by the
+        workbook's MD5 and cls.hoc_read_options. Pipelines for different years sharing a cache_dir
+        then only parse the workbook once between them, even when run concurrently (in other threads
+        or processes, which wait for the workbook to be parsed). Sheets cached for other versions of
+        the workbook or other read options are deleted.
 
-    @staticmethod
-    def process_hoc_sheet(input_file, data_dir, sheet_name):
+        Args:
+            path (pathlib.PosixPath): Location of the workbook.
+            sheet_names (list of str): Names of sheets to read.
+            cache_dir (pathlib.PosixPath): Directory for parsed sheets (defaults to .cache next to
+                                           the workbook).
+
+        Returns: dict of raw sheets (pd.DataFrame) by sheet name.
+        """
+        path = Path(path)
+        cache_dir = Path(cache_dir) if cache_dir is not None else path.parent / ".cache"
+        caching_enabled = importlib.util.find_spec("pyarrow") is not None
+        options_key = hashlib.md5(
+            json.dumps(cls.hoc_read_options, sort_keys=True).encode()
+        ).hexdigest()[:8]
+        with FileLock(cache_dir / path.name):
+            md5_checksum = Manifest(path.parent).checksum(path.name)
+            prefix = f"{path.stem}-{md5_checksum}-{options_key}-"
+            cached = {sheet: cache_dir / f"{prefix}{sheet}.parquet" for sheet in sheet_names}
+            sheets = {}
+            if caching_enabled:
+                for sheet in sheet_names:
+                    if cached[sheet].exists():
+                        df = pd.read_parquet(cached[sheet])
+                        df.columns = df.columns.astype(int)  # parquet column names are strings
+                        sheets[sheet] = df
+            missing = [sheet for sheet in sheet_names if sheet not in sheets]
+            if missing:
+                print(f"Parse sheets {', '.join(missing)} of {path.name}")
+                parsed = pd.read_excel(path, sheet_name=missing, **cls.hoc_read_options)
+                sheets.update(parsed)
+                if caching_enabled:
+                    os.makedirs(cache_dir, exist_ok=True)
+                    for stale in cache_dir.glob(f"{path.stem}-*.parquet"):
+                        if not stale.name.startswith(prefix):
+                            os.remove(stale)
+                    for sheet, df in parsed.items():
+                        tmp = temporary_path(cached[sheet])
+                        df.set_axis(df.columns.astype(str), axis=1).to_parquet(tmp)
+                        os.replace(tmp, cached[sheet])
+        return {sheet: sheets[sheet] for sheet in sheet_names}
+
+    @classmethod
+    def process_hoc_sheet(cls, input_file, data_dir, sheet_name, cache_dir=None):
         # Import general election results
         print(f"Read and clean {input_file}")
+        sheet_names = sorted(set(cls.hoc_sheets) | {sheet_name})
+        results = cls.read_hoc_workbook(
+            data_dir / "raw" / input_file, sheet_names=sheet_names, cache_dir=cache_dir
+        )[sheet_name]
+        return cls.clean_hoc_sheet(results)
+
+    @staticmethod
+    def clean_hoc_sheet(results):
+        """Clean a raw sheet of the House of Commons Library results workbook into long format."""
         parties = [
             "Con",
             "LD",
@@ -77,14 +107,8 @@ class UKResults(Pipeline):
             "APNI",
             "Other",
         ]
-        results = pd.read_excel(
-            data_dir / "raw" / input_file,
-            sheet_name=sheet_name,
-            skiprows=4,
-            header=None,
-            skipfooter=19,
-        )
-        assert results.shape == (650, 49)
+        n_seats = len(results)  # 650 in real results
+        assert results.shape == (n_seats, 49)
 
         # Specify columns (spread across multiple rows in Excel)
         cols = ["", "id", "Constituency", "County", "Country/Region", "Country", "Electorate", ""]
@@ -120,8 +144,8 @@ class UKResults(Pipeline):
             var_name="party",
             value_name="votes",
         )
-        assert results.shape == (650, 19)
-        assert results_long.shape == (650 * len(parties), 19 - len(parties) + 2)
+        assert results.shape == (n_seats, 19)
+        assert results_long.shape == (n_seats * len(parties), 19 - len(parties) + 2)
 
         # Sort by (ons_id, party)
         results_long["party"] = pd.Categorical(
@@ -158,33 +182,26 @@ class UKResults(Pipeline):
     def process(self):
         """Process results data for a UK General Election."""
         filename = self.sources[0][1]
-        processed_results_location = self.directory / "processed" / self.target[0]
-        os.makedirs(
-            self.directory / "processed", exist_ok=True
-        )  # create directory if it doesn't exist
 
         def process_and_export():
             # Either caching disabled or file not yet processed; process regardless.
-            results = self.process_hoc_sheet(
-                input_file=filename, data_dir=self.directory, sheet_name=str(self.year)
-            )
-            # Export
-            print(f"Exporting dataset to {processed_results_location.resolve()}")
-            results.to_csv(processed_results_location, index=False)
-
-        utils.retrieve_from_cache_if_exists(
-            filename=self.target[0],
-            target_dir=(self.directory / "processed"),
-            processing_fn=process_and_export,
-            md5_checksum=self.target[1],
-            caching_enabled=self.cache,
-            verbose=self.verbose,
-        )
+            with self.stage("process_hoc_sheet"):
+                results = self.process_hoc_sheet(
+                    input_file=filename,
+                    data_dir=self.directory,
+                    sheet_name=str(self.year),
+                    cache_dir=(self.data_directory / ".cache" if self.data_directory else None),
+                )
+            self.export(results, self.target[0])
+
+        self.process_targets(process_and_export)
 
 
 class UKModel(Pipeline):
     """Generates model-ready data for UK General Elections."""
 
+    cache_targets = False  # process() always rebuilds the model-ready dataset
+
     # geos sit between region and country (e.g. "england_not_london") and map to things we can extract from polls
     geos = ["uk", "scotland", "wales", "ni", "london"]
     geo_lookup = {
@@ -253,6 +270,21 @@ class UKModel(Pipeline):
         ]
     }
 
+    # Days of polling before a date that go into its poll of polls (regional polling is sparse, so
+    # look back further)
+    poll_of_polls_days = {"uk": 7, "scotland": 30, "wales": 30, "ni": 30, "london": 30}
+
+    # Parties in each geo's poll of polls when we have polling for all regions
+    poll_of_polls_parties = {
+        # TODO: Add ["chuk", "bxp", "ukip"] to uk, scotland, wales, london
+        "uk": ["con", "lab", "ld", "grn", "snp"],
+        "scotland": ["con", "lab", "ld", "snp", "grn"],
+        "wales": ["con", "lab", "ld", "pc", "grn"],
+        "ni": ["dup", "uup", "sf", "sdlp", "apni", "grn", "con"],
+        "london": ["con", "lab", "ld", "grn"],
+        "england_not_london": ["con", "lab", "ld", "grn"],
+    }
+
     # Define these to make them available as expected attributes.
     last_date = None
     now_date = None
@@ -278,13 +310,9 @@ class UKModel(Pipeline):
 
         # Import general election results
         results = {}
-        results[last] = pd.read_csv(
-            self.directory / "raw" / f"general_election-uk-{last}-results.csv"
-        )
+        results[last] = self.read_source(f"general_election-uk-{last}-results.csv")
         try:
-            results[now] = pd.read_csv(
-                self.directory / "raw" / f"general_election-uk-{now}-results.csv"
-            )
+            results[now] = self.read_source(f"general_election-uk-{now}-results.csv")
         except FileNotFoundError:
             self.prediction_only = True
 
@@ -306,8 +334,7 @@ class UKModel(Pipeline):
             years = [last, now]
         for year in years:
             res = results[year].copy()
-            winners = self.calculate_winners(res, "voteshare")
-            res["winner"] = res.ons_id.map(winners)
+            res["winner"] = SeatMatrix.from_long(res, "voteshare").row_winners()
 
             # Apply fixes
             if year in self.winner_fixes:
@@ -323,27 +350,37 @@ class UKModel(Pipeline):
 
             # Remove UKIP to deal with Brexit Party voteshare matching problems
             # TODO: This is not a great solution, need a better way to map in BXP for modelling 2019.
-            res_list = []
-            for constituency in res.ons_id.unique():
-                res_con = res[res.ons_id == constituency].copy()
-                for metric in ["votes", "voteshare"]:
-                    res_con.loc[res_con.party == "other", metric] = (
-                        res_con.loc[res_con.party == "other", metric].sum()
-                        + res_con.loc[res_con.party == "ukip", metric].sum()
-                    )
-                res_list.append(res_con.query('party != "ukip"').copy())
-            res = pd.concat(res_list, axis=0)
+            res = self.fold_ukip_into_other(res)
 
             results[year] = res.copy()
 
         return results
 
+    @staticmethod
+    def fold_ukip_into_other(res):
+        """Add UKIP's votes & voteshare onto "other" in each constituency and drop the UKIP rows.
+
+        Rows are returned grouped by constituency (in order of first appearance) with their original
+        index.
+        """
+        # Keep each constituency's rows together (a no-op for results sorted by ons_id)
+        res = res.iloc[np.argsort(pd.factorize(res.ons_id)[0], kind="stable")].copy()
+        is_other = res.party == "other"
+        is_ukip = res.party == "ukip"
+        for metric in ["votes", "voteshare"]:
+            other_total = res[metric].where(is_other).groupby(res.ons_id).transform("sum")
+            ukip_total = res[metric].where(is_ukip).groupby(res.ons_id).transform("sum")
+            res.loc[is_other, metric] = (other_total + ukip_total)[is_other].astype(
+                res[metric].dtype
+            )
+        return res[~is_ukip]
+
     def load_polling_data(self):
         """Load polling data for UK General Elections."""
         polls = {}
         for geo in self.geos:
-            poll_df = pd.read_csv(
-                self.directory / "raw" / f"general_election-{geo}-polls.csv", parse_dates=["to"]
+            poll_df = self.read_source(
+                f"general_election-{geo}-polls.csv", parse_dates=["to"]
             ).sort_values("to")
             poll_df.columns = utils.sanitise(
                 poll_df.columns,
@@ -357,30 +394,136 @@ class UKModel(Pipeline):
     def calculate_poll_of_polls(polls, from_date, to_date):
         return polls[(polls.to >= from_date) & (polls.to < to_date)].groupby("company").tail(1)
 
+    @staticmethod
+    def poll_sample_sizes(sample_size, is_mrp):
+        """Sample sizes to weight a poll of polls by: MRPs count as the largest other poll, and
+        missing sample sizes (such as for polls derived from PollBase) as the mean of the other
+        polls' (or 1 if none are known).
+
+        Args:
+            sample_size (np.ndarray): Sample size of each poll in the poll of polls (NaN where
+                                      missing).
+            is_mrp (np.ndarray): Whether each poll is an MRP.
+
+        Returns: np.ndarray of sample sizes.
+        """
+        sample_size = np.array(sample_size, dtype=float)
+        is_mrp = np.asarray(is_mrp, dtype=bool)
+        known = sample_size[~is_mrp]
+        known = known[~np.isnan(known)]
+        # Consider MRPs equivalent to a large poll
+        sample_size[is_mrp] = known.max() if len(known) else np.nan
+        # Handle missing sample sizes
+        sample_size[np.isnan(sample_size)] = known.mean() if len(known) else 1
+        return sample_size
+
+    @classmethod
+    def rolling_poll_of_polls(cls, polls, dates, days, parties):
+        """Sample size weighted poll of polls on each of dates, from each pollster's last poll in
+        the days before it.
+
+        Gives the same poll of polls as `calculate_poll_of_polls(polls, date - days, date)` weighted
+        by `poll_sample_sizes` (as `get_regional_and_national_poll_of_polls` does on election day)
+        for every date, but in one pass over polls: each date's window is found by binary search on
+        the (sorted) poll dates, and the latest poll from each pollster is tracked as the window
+        moves forward rather than re-selected from scratch.
+
+        Args:
+            polls (pd.DataFrame): Polls for one geo, sorted by `to` (as returned by
+                                  `load_polling_data`).
+            dates (list-like of datetimes): Dates to calculate the poll of polls on (polls ending
+                                            that day excluded).
+            days (int): Days of polling before each date to include.
+            parties (list of str): Parties (columns of polls) to calculate voteshares for.
+
+        Returns: pd.DataFrame of voteshares (one column per party) indexed by date, NaN on dates
+                 without any polls.
+        """
+        polls = polls.sort_values("to", kind="mergesort")
+        to = polls.to.to_numpy(dtype="datetime64[ns]")
+        dates = pd.DatetimeIndex(dates).sort_values()
+        starts = np.searchsorted(to, (dates - pd.Timedelta(days=days)).to_numpy(), side="left")
+        ends = np.searchsorted(to, dates.to_numpy(), side="left")
+        companies = polls.company.to_numpy()
+        has_company = polls.company.notnull().to_numpy()
+        sample_size = polls.sample_size.to_numpy(dtype=float)
+        is_mrp = (polls.method == "MRP").to_numpy()
+        voteshares = polls[parties].to_numpy(dtype=float)
+        # as DataFrame.sum() skips missing values
+        voteshares = np.where(np.isnan(voteshares), 0.0, voteshares)
+
+        latest = {}  # pollster -> position of their latest poll ending before the current date
+        seen = 0
+        poll_of_polls = np.full((len(dates), len(parties)), np.nan)
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            for position in range(seen, end):
+                if has_company[position]:  # as groupby("company") drops polls without one
+                    latest[companies[position]] = position
+            seen = end
+            in_window = np.array(
+                sorted(position for position in latest.values() if position >= start), dtype=int
+            )
+            if not len(in_window):
+                continue
+            weights = cls.poll_sample_sizes(sample_size[in_window], is_mrp[in_window])
+            poll_of_polls[i] = (weights / weights.sum()) @ voteshares[in_window]
+        return pd.DataFrame(
+            poll_of_polls, index=pd.DatetimeIndex(dates, name="date"), columns=parties
+        )
+
+    def get_daily_poll_of_polls(self, polls, start_date=None, end_date=None):
+        """Each geo's poll of polls on every day from start_date to end_date (a nowcast for each day
+        of a campaign).
+
+        Uses the same windows (`poll_of_polls_days`), parties (`poll_of_polls_parties`) and sample
+        size weighting as the election day poll of polls in
+        `get_regional_and_national_poll_of_polls`.
+
+        Args:
+            polls (dict): Polls by geo, as returned by `load_polling_data`.
+            start_date (datetime): First day (default: 30 days before self.now_date).
+            end_date (datetime): Last day (default: self.now_date).
+
+        Returns: pd.DataFrame with columns date, geo, party & voteshare.
+        """
+        end_date = pd.Timestamp(end_date if end_date is not None else self.now_date)
+        start_date = pd.Timestamp(
+            start_date if start_date is not None else end_date - pd.Timedelta(days=30)
+        )
+        dates = pd.date_range(start_date, end_date, freq="D")
+        daily = []
+        for geo in self.geos:
+            poll_of_polls = self.rolling_poll_of_polls(
+                polls[geo],
+                dates,
+                days=self.poll_of_polls_days[geo],
+                parties=self.poll_of_polls_parties[geo],
+            )
+            daily.append(
+                poll_of_polls.rename_axis(columns="party")
+                .stack(dropna=False)
+                .rename("voteshare")
+                .reset_index()
+                .assign(geo=geo)
+            )
+        return pd.concat(daily, ignore_index=True)[["date", "geo", "party", "voteshare"]]
+
     def get_regional_and_national_poll_of_polls(self, polls):
         """Takes straight average across each pollster's final poll in last week prior to election day.
             Repeat for regions, if regional polling is available.
         """
         election_day = self.now_date
-        one_week_before = election_day - pd.Timedelta(days=7)
-        one_month_before = election_day - pd.Timedelta(days=30)
 
         # Use single last poll from each pollster in final week of polling then average out
         final_polls = {}
         for geo in self.geos:
-            period_before = one_week_before if geo == "uk" else one_month_before
+            period_before = election_day - pd.Timedelta(days=self.poll_of_polls_days[geo])
             final_polls[geo] = self.calculate_poll_of_polls(
                 polls=polls[geo], from_date=period_before, to_date=election_day
             )
-            # Consider MRPs equivalent to a large poll
-            final_polls[geo].loc[final_polls[geo].method == "MRP", "sample_size"] = (
-                final_polls[geo].query('method != "MRP"').sample_size.max()
+            final_polls[geo]["sample_size"] = self.poll_sample_sizes(
+                final_polls[geo].sample_size, final_polls[geo].method == "MRP"
             )
-            # Handle missing sample sizes
-            mean_sample_size = final_polls[geo].query('method != "MRP"').sample_size.mean()
-            if pd.isnull(mean_sample_size):
-                mean_sample_size = 1
-            final_polls[geo]["sample_size"] = final_polls[geo].sample_size.fillna(mean_sample_size)
 
         # Calculate regional polling
         regional_polling_missing = any(final_polls[geo].empty for geo in self.geos)
@@ -410,15 +553,7 @@ class UKModel(Pipeline):
 
         # We have polling for all regions.
         else:
-            parties = {
-                # TODO: Add ["chuk", "bxp", "ukip"] to uk, scotland, wales, london
-                "uk": ["con", "lab", "ld", "grn", "snp"],
-                "scotland": ["con", "lab", "ld", "snp", "grn"],
-                "wales": ["con", "lab", "ld", "pc", "grn"],
-                "ni": ["dup", "uup", "sf", "sdlp", "apni", "grn", "con"],
-                "london": ["con", "lab", "ld", "grn"],
-                "england_not_london": ["con", "lab", "ld", "grn"],
-            }
+            parties = self.poll_of_polls_parties
             all_parties = set(x for y in parties.values() for x in y)
             poll_of_polls = {}
             for geo in self.geos:
@@ -510,14 +645,12 @@ class UKModel(Pipeline):
 
     @staticmethod
     def calculate_winners(df, voteshare_col):
-        """Assumes df has `ons_id` and `party` columns."""
-        return (
-            df.sort_values(voteshare_col, ascending=False)
-            .groupby("ons_id")
-            .head(1)[["ons_id", "party"]]
-            .set_index("ons_id")
-            .party
-        )
+        """Assumes df has `ons_id` and `party` columns.
+
+        Returns: pd.Series of the party with the largest voteshare_col in each seat, indexed by
+                 ons_id (NaN for seats without any voteshare_col).
+        """
+        return SeatMatrix.from_long(df, voteshare_col).winners()
 
     def calculate_national_swing(self, results):
         """Uses previous election results plus current polling to calculate:
@@ -528,21 +661,30 @@ class UKModel(Pipeline):
 
         Returns: updated results dataframe with new columns.
         """
-        # Calculate national voteshare
-        national_voteshare_by_party = results.groupby("party").votes.sum() / results.votes.sum()
-        results["national_voteshare"] = results.party.map(national_voteshare_by_party)
+        votes = SeatMatrix.from_long(results, "votes")
+        voteshare = votes.lay_out(results.voteshare)
+        national_polls = votes.lay_out(results.national_polls)
+
+        # Calculate national voteshare (per party, broadcast across seats)
+        votes_by_party = np.nansum(votes.values, axis=0)
+        national_voteshare = votes_by_party / votes_by_party.sum()
+        national_voteshare_by_seat = np.broadcast_to(national_voteshare, votes.values.shape)
+        results["national_voteshare"] = votes.with_values(national_voteshare_by_seat).rows()
 
         # Calculate swing between last election results and latest poll-of-polls
-        results["national_swing"] = (results.national_polls / results.national_voteshare) - 1
+        national_swing = national_polls.with_values(
+            (national_polls.values / national_voteshare) - 1
+        )
+        results["national_swing"] = national_swing.rows()
 
         # Forecast is previous result multiplied by swing uplift
-        results["national_swing_forecast"] = results.voteshare * (1 + results.national_swing)
+        forecast = voteshare.with_values(voteshare.values * (1 + national_swing.values))
+        results["national_swing_forecast"] = forecast.rows()
 
         # Predict the winner in each constituency using national_swing_forecast
         # Note: these are pointless for NI as polls/swings are all aggregated under "other" but results
         # are given per major party.
-        national_swing_winners = self.calculate_winners(results, "national_swing_forecast")
-        results["national_swing_winner"] = results.ons_id.map(national_swing_winners)
+        results["national_swing_winner"] = forecast.row_winners()
 
         return results
 
@@ -555,33 +697,32 @@ class UKModel(Pipeline):
 
         Returns: updated results dataframe with new columns.
         """
-
-        # Calculate geo-level voteshare
-        votes_by_geo = results.groupby("geo").votes.sum().reset_index()
-        votes_by_geo_by_party = (
-            results.groupby(["geo", "party"])
-            .votes.sum()
-            .reset_index()
-            .merge(votes_by_geo, on="geo", how="left", suffixes=("", "_geo"))
-        )
-        votes_by_geo_by_party["geo_voteshare"] = (
-            votes_by_geo_by_party.votes / votes_by_geo_by_party.votes_geo
-        )
-        results = results.merge(
-            votes_by_geo_by_party[["geo", "party", "geo_voteshare"]],
-            on=["geo", "party"],
-            how="left",
+        results = results.copy()
+        votes = SeatMatrix.from_long(results, "votes")
+        voteshare = votes.lay_out(results.voteshare)
+        geo_polls = votes.lay_out(results.geo_polls)
+        seat_geo, geos = votes.seat_groups(results.geo)
+
+        # Calculate geo-level voteshare (geos x parties), then look it up for each seat's geo
+        votes_by_geo_by_party = votes.group_sums(seat_geo, len(geos))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            geo_voteshare = votes_by_geo_by_party / votes_by_geo_by_party.sum(axis=1, keepdims=True)
+        # Seats without a known geo (-1) get no geo voteshare, so no geo forecast or winner
+        geo_voteshare = voteshare.with_values(
+            np.where((seat_geo >= 0)[:, None], geo_voteshare[seat_geo], np.nan)
         )
+        results["geo_voteshare"] = geo_voteshare.rows()
 
         # Calculate geo-swing between last election results and latest geo-polls
-        results["geo_swing"] = (results.geo_polls / results.geo_voteshare) - 1
+        geo_swing = geo_polls.with_values((geo_polls.values / geo_voteshare.values) - 1)
+        results["geo_swing"] = geo_swing.rows()
 
         # Forecast is previous result multiplied by swing uplift
-        results["geo_swing_forecast"] = results.voteshare * (1 + results.geo_swing)
+        forecast = voteshare.with_values(voteshare.values * (1 + geo_swing.values))
+        results["geo_swing_forecast"] = forecast.rows()
 
         # Predict the winner in each constituency using geo_swing_forecast
-        geo_swing_winners = self.calculate_winners(results, "geo_swing_forecast")
-        results["geo_swing_winner"] = results.ons_id.map(geo_swing_winners)
+        results["geo_swing_winner"] = forecast.row_winners()
 
         return results
 
@@ -791,33 +932,35 @@ class UKModel(Pipeline):
     def process(self):
         """Process results data from consecutive UK General Elections (e.g. 2010 and 2015) into a single model-ready
            dataset ready for predicting the later (e.g. 2015) election."""
-        processed_directory = self.directory / "processed"
-        os.makedirs(processed_directory, exist_ok=True)  # create directory if it doesn't exist
-
         # Import general election results & polling data
-        results_dict = self.load_results_data()
-        polls_full = self.load_polling_data()
+        with self.stage("load_results_data"):
+            results_dict = self.load_results_data()
+        with self.stage("load_polling_data"):
+            polls_full = self.load_polling_data()
 
         # Calculate poll of polls
-        polls = self.get_regional_and_national_poll_of_polls(polls=polls_full)
+        with self.stage("get_regional_and_national_poll_of_polls"):
+            polls = self.get_regional_and_national_poll_of_polls(polls=polls_full)
 
         # Merge polls into previous election results dataframe
-        results_dict[self.last] = self.combine_results_and_polls(
-            results=results_dict[self.last], polls=polls
-        )
+        with self.stage("combine_results_and_polls"):
+            results_dict[self.last] = self.combine_results_and_polls(
+                results=results_dict[self.last], polls=polls
+            )
 
         # Add into previous election results: national voteshare, national swing (vs current polling),
         # national swing forecast (per party per seat) and national swing forecast winner (per seat).
-        results_dict[self.last] = self.calculate_national_swing(results_dict[self.last])
+        with self.stage("calculate_national_swing"):
+            results_dict[self.last] = self.calculate_national_swing(results_dict[self.last])
 
         # If we have geo-polling for previous election, also calculate a geo-level swing forecast.
         if "geo_polls" in results_dict[self.last].columns:
-            results_dict[self.last] = self.calculate_geo_swing(results_dict[self.last])
+            with self.stage("calculate_geo_swing"):
+                results_dict[self.last] = self.calculate_geo_swing(results_dict[self.last])
 
         # Create ML-ready dataframe and export
-        model_df = self.export_model_ready_dataframe(results_dict=results_dict)
+        with self.stage("export_model_ready_dataframe"):
+            model_df = self.export_model_ready_dataframe(results_dict=results_dict)
 
-        print(f"Exporting {self.last}->{self.now} model dataset to {processed_directory.resolve()}")
-        model_df.to_csv(
-            processed_directory / f"general_election-uk-{self.now}-model.csv", index=False
-        )
+        print(f"Exporting {self.last}->{self.now} model dataset")
+        self.export(model_df, self.target[0])
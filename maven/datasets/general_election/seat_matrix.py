@@ -0,0 +1,120 @@
+"""
+Dense seat x party matrices.
+
+Results & forecasts are stored long (one row per seat & party), which is how they're exported, but
+finding winners or applying swings in long format means sorting/grouping/merging the whole frame.
+`SeatMatrix` holds one value per seat & party in a contiguous (seats x parties) float array instead,
+with seats (ons_id) and parties integer-coded in sorted order, so winners are a row-wise argmax and
+per-party swings broadcast across seats.
+
+The long frame is only factorized once, by `SeatMatrix.from_long`: the matrix remembers the seat &
+party of each of its rows, so further columns of the same frame are laid out with `lay_out` and
+results are put back onto its rows with `rows` & `row_winners` by integer indexing alone.
+
+Example usage:
+    > votes = SeatMatrix.from_long(results, "votes")
+    > voteshare = votes.lay_out(results.voteshare)
+    > results["winner"] = voteshare.row_winners()
+"""
+import numpy as np
+import pandas as pd
+
+
+class SeatMatrix:
+    """Values (e.g. voteshares) per seat & party, NaN where a party has no value in a seat (e.g.
+    didn't stand).
+
+    Args:
+        values (np.ndarray): (seats x parties) float array.
+        ons_ids (pd.Index): ons_id of each row.
+        parties (pd.Index): Party of each column.
+        row_codes (tuple): (seat positions, party positions) of each row of the long frame the
+                           matrix was laid out from, -1 for rows without an ons_id or party.
+    """
+
+    def __init__(self, values, ons_ids, parties, row_codes=None):
+        self.values = np.ascontiguousarray(values, dtype=float)
+        self.ons_ids = pd.Index(ons_ids, name="ons_id")
+        self.parties = pd.Index(parties, name="party")
+        self.row_codes = row_codes
+
+    def __repr__(self):
+        return f"SeatMatrix({len(self.ons_ids)} seats x {len(self.parties)} parties)"
+
+    @classmethod
+    def from_long(cls, df, column):
+        """Lay out column of a long frame (`ons_id` & `party` columns, one row per seat & party) as
+        a SeatMatrix.
+
+        Rows without an ons_id or party (e.g. parties only found in polling) are left out.
+
+        Returns: SeatMatrix
+        """
+        seat_codes, ons_ids = pd.factorize(df.ons_id, sort=True)
+        party_codes, parties = pd.factorize(df.party, sort=True)
+        empty = cls(
+            np.empty((len(ons_ids), len(parties))), ons_ids, parties, (seat_codes, party_codes)
+        )
+        return empty.lay_out(df[column])
+
+    def lay_out(self, values):
+        """Lay out another column of the long frame this matrix came from as a SeatMatrix."""
+        seat_codes, party_codes = self.row_codes
+        present = (seat_codes >= 0) & (party_codes >= 0)
+        matrix = np.full(self.values.shape, np.nan)
+        matrix[seat_codes[present], party_codes[present]] = np.asarray(values, dtype=float)[present]
+        return self.with_values(matrix)
+
+    def with_values(self, values):
+        """SeatMatrix of the same seats & parties (& long frame rows) holding values instead."""
+        return type(self)(values, self.ons_ids, self.parties, self.row_codes)
+
+    def rows(self):
+        """Values for each row of the long frame this matrix came from (NaN for rows left out)."""
+        seat_codes, party_codes = self.row_codes
+        present = (seat_codes >= 0) & (party_codes >= 0)
+        values = np.full(len(seat_codes), np.nan)
+        values[present] = self.values[seat_codes[present], party_codes[present]]
+        return values
+
+    def seat_groups(self, values):
+        """Group seats by a seat-level column (e.g. geo) of the long frame this matrix was laid out
+        from.
+
+        Returns: tuple of (position in groups of each seat's group (-1 if unknown), sorted groups).
+        """
+        row_groups, groups = pd.factorize(values, sort=True)
+        seat_codes, _ = self.row_codes
+        seat_groups = np.full(len(self.ons_ids), -1)
+        seat_groups[seat_codes[seat_codes >= 0]] = row_groups[seat_codes >= 0]
+        return seat_groups, groups
+
+    def group_sums(self, seat_groups, n_groups):
+        """(groups x parties) array of values summed over each group's seats, skipping NaN."""
+        sums = np.zeros((n_groups, len(self.parties)))
+        grouped = seat_groups >= 0
+        np.add.at(sums, seat_groups[grouped], np.nan_to_num(self.values[grouped]))
+        return sums
+
+    def winner_codes(self):
+        """Column position of the party with the largest value in each seat, -1 for seats without
+        any values.
+
+        Missing values never win.
+        """
+        codes = np.where(np.isnan(self.values), -np.inf, self.values).argmax(axis=1)
+        return np.where(np.isnan(self.values).all(axis=1), -1, codes)
+
+    def winner_parties(self):
+        """np.ndarray of the party with the largest value in each seat (NaN if no values)."""
+        codes = self.winner_codes()
+        return np.where(codes >= 0, self.parties.to_numpy(dtype=object)[codes], np.nan)
+
+    def winners(self):
+        """pd.Series of the party with the largest value in each seat by ons_id (NaN if none)."""
+        return pd.Series(self.winner_parties(), index=self.ons_ids, name="party")
+
+    def row_winners(self):
+        """Winner of each row's seat in the long frame this matrix came from (NaN if left out)."""
+        seat_codes, _ = self.row_codes
+        return np.where(seat_codes >= 0, self.winner_parties()[seat_codes], np.nan)
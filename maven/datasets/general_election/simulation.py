@@ -0,0 +1,220 @@
+"""
+Monte Carlo simulation of seat outcomes from model-ready datasets.
+
+The model-ready datasets give a point forecast of each party's voteshare in each seat (e.g.
+`geo_swing_forecast`). `simulate_seats` adds uncertainty by drawing correlated perturbations of
+every forecast and counting the seats each party wins in each draw:
+    - a national shock per party, shared by every seat;
+    - a geo shock per party (e.g. Scotland, London), shared by the seats in that geo;
+    - a local shock per party & seat.
+
+Shocks are normally distributed on the log scale (so a shock of 0.1 moves a party's voteshare by
+~10% of itself, in keeping with the swing models) and national & geo shocks can be correlated
+between parties.
+
+Example usage:
+    > import maven, pandas as pd
+    > from maven.datasets.general_election.simulation import simulate_seats
+    > maven.get('general-election/UK/2017/model', data_directory='./data/')
+    > df = pd.read_csv(
+    >     './data/general-election/UK/2017/model/processed/general_election-uk-2017-model.csv'
+    > )
+    > simulation = simulate_seats(df, n_draws=100000, processes=4)
+    > simulation.seat_counts.describe()
+"""
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from maven.datasets.general_election.seat_matrix import SeatMatrix
+
+# parties further than this many standard deviations behind a seat's leader are never simulated
+CONTENDER_SDS = 8
+
+Simulation = namedtuple("Simulation", ["seat_counts", "win_probability"])
+Simulation.__doc__ = """Results of simulate_seats.
+
+Attributes:
+    seat_counts (pd.DataFrame): Seats won by each party (columns) in each draw (rows).
+    win_probability (pd.DataFrame): Share of draws each party (columns) wins each seat (rows, by
+                                    ons_id).
+"""
+
+
+def seat_party_matrix(df, voteshare_col):
+    """Lay out the long model-ready dataframe as a seat x party matrix of voteshares.
+
+    Args:
+        df (pd.DataFrame): Model-ready data with one row per seat & party (`ons_id`, `geo`, `party`
+                           columns).
+        voteshare_col (str): Column of voteshares, e.g. "geo_swing_forecast".
+
+    Returns: tuple of (ons_ids, parties, geos, seat_geo, voteshares) where voteshares is a (seats x
+             parties) array (NaN for parties not standing in a seat) and seat_geo the position in
+             geos of each seat's geo.
+    """
+    voteshares = SeatMatrix.from_long(df, voteshare_col)
+    seat_geo, geos = voteshares.seat_groups(df.geo)
+    return voteshares.ons_ids, voteshares.parties, geos, seat_geo, voteshares.values
+
+
+def contenders(log_voteshares, max_shock_sd):
+    """Parties in each seat close enough to the leader to have any realistic chance of winning it.
+
+    A party more than CONTENDER_SDS standard deviations of the difference between two parties'
+    shocks behind the leader (on the log scale) wins with probability < 1e-15, so is left out of the
+    simulation.
+
+    Args:
+        log_voteshares (np.ndarray): (seats x parties) log forecast voteshares.
+        max_shock_sd (float): Standard deviation of a party's total shock in a seat.
+
+    Returns: tuple of (seats x contenders) arrays of party positions & log voteshares (padded with
+             -inf).
+    """
+    # sd of a difference of two shocks is at most twice the sd of each
+    gap = CONTENDER_SDS * 2 * max_shock_sd
+    in_contention = log_voteshares >= log_voteshares.max(axis=1, keepdims=True) - gap
+    n_contenders = max(in_contention.sum(axis=1).max(), 1)
+    # Contenders first (stable sort keeps them in party order), then pad
+    order = np.argsort(~in_contention, axis=1, kind="mergesort")[:, :n_contenders]
+    is_contender = np.take_along_axis(in_contention, order, axis=1)
+    contender_log_voteshares = np.where(
+        is_contender, np.take_along_axis(log_voteshares, order, axis=1), -np.inf
+    )
+    return order, contender_log_voteshares
+
+
+def simulate_batch(
+    contender_parties,
+    contender_log_voteshares,
+    seat_geo,
+    n_geos,
+    n_parties,
+    n_draws,
+    seed,
+    batch,
+    sds,
+    party_cholesky,
+):
+    """Winners of each seat in n_draws draws, using random state (seed, batch) so batches are
+    reproducible.
+
+    Returns: tuple of (seat counts per draw & party, wins per seat & party summed over draws)
+             arrays.
+    """
+    national_sd, geo_sd, local_sd = sds
+    n_seats = len(seat_geo)
+    rng = np.random.RandomState([seed, batch])
+    national = rng.standard_normal((n_draws, n_parties)).dot(party_cholesky.T) * national_sd
+    geo = rng.standard_normal((n_draws, n_geos, n_parties)).dot(party_cholesky.T) * geo_sd
+    geo += national[:, None, :]  # shock shared by every seat in each geo
+    # Seats without a known geo (-1) only get the national shock, from an extra geo with no shock of
+    # its own
+    geo = np.concatenate(
+        [geo, np.broadcast_to(national[:, None, :], (n_draws, 1, n_parties))], axis=1
+    )
+    simulated = rng.standard_normal((n_draws,) + contender_parties.shape)
+    simulated *= local_sd
+    simulated += geo[:, seat_geo[:, None], contender_parties]
+    # comparing log(voteshare) + shock is comparing voteshare * exp(shock)
+    simulated += contender_log_voteshares
+    winners = contender_parties[np.arange(n_seats), simulated.argmax(axis=2)]
+
+    # Seats without any party forecast votes aren't won by anyone
+    won = np.broadcast_to(np.isfinite(contender_log_voteshares).any(axis=1), winners.shape)
+    seat_counts = np.bincount(
+        (winners + n_parties * np.arange(n_draws)[:, None])[won], minlength=n_draws * n_parties
+    ).reshape(n_draws, n_parties)
+    wins = np.bincount(
+        (winners + n_parties * np.arange(n_seats))[won], minlength=n_seats * n_parties
+    ).reshape(n_seats, n_parties)
+    return seat_counts, wins
+
+
+def simulate_seats(
+    df,
+    n_draws=10000,
+    voteshare_col="geo_swing_forecast",
+    national_sd=0.1,
+    geo_sd=0.05,
+    local_sd=0.1,
+    party_correlation=None,
+    seed=0,
+    batch_size=1000,
+    processes=None,
+):
+    """Simulate the seats won by each party n_draws times by perturbing the forecast voteshares.
+
+    Draws are made in batches of batch_size seats x parties arrays. Each batch has its own random
+    state derived from (seed, batch number), so results are the same however many processes the
+    batches are spread across.
+
+    Args:
+        df (pd.DataFrame): Model-ready data (as exported by UKModel.process) with `ons_id`, `geo`,
+                           `party` columns.
+        n_draws (int): Number of simulations.
+        voteshare_col (str): Column of forecast voteshares to perturb, e.g.
+                             "national_swing_forecast".
+        national_sd (float): Standard deviation of national shocks (log scale).
+        geo_sd (float): Standard deviation of geo shocks (log scale).
+        local_sd (float): Standard deviation of seat-level shocks (log scale).
+        party_correlation (pd.DataFrame): Correlation between parties' national & geo shocks, with
+                                          parties as index & columns (parties missing from it are
+                                          uncorrelated). Defaults to none.
+        seed (int): Random seed.
+        batch_size (int): Number of draws per batch (memory use is ~batch_size x seats x parties x 8
+                          bytes).
+        processes (int): Spread batches across this many processes (default: run in this process).
+
+    Returns: Simulation of seat counts per draw and win probability per seat.
+    """
+    ons_ids, parties, geos, seat_geo, voteshares = seat_party_matrix(df, voteshare_col)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Parties not standing (or forecast no votes) can't win: log(0) = -inf
+        log_voteshares = np.where(voteshares > 0, np.log(voteshares), -np.inf)
+    correlation = pd.DataFrame(np.eye(len(parties)), index=parties, columns=parties)
+    if party_correlation is not None:
+        correlation.update(party_correlation)
+    party_cholesky = np.linalg.cholesky(correlation.to_numpy())
+    contender_parties, contender_log_voteshares = contenders(
+        log_voteshares, max_shock_sd=np.sqrt(national_sd ** 2 + geo_sd ** 2 + local_sd ** 2)
+    )
+
+    batches = [
+        (batch, min(batch_size, n_draws - start))
+        for batch, start in enumerate(range(0, n_draws, batch_size))
+    ]
+    args = [
+        (
+            contender_parties,
+            contender_log_voteshares,
+            seat_geo,
+            len(geos),
+            len(parties),
+            size,
+            seed,
+            batch,
+            (national_sd, geo_sd, local_sd),
+            party_cholesky,
+        )
+        for batch, size in batches
+    ]
+    if processes:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(simulate_batch, *zip(*args)))
+    else:
+        results = [simulate_batch(*batch_args) for batch_args in args]
+
+    seat_counts = pd.DataFrame(
+        np.concatenate([seat_counts for seat_counts, _ in results]),
+        columns=pd.Index(parties, name="party"),
+    ).rename_axis("draw")
+    win_probability = pd.DataFrame(
+        sum(wins for _, wins in results) / n_draws,
+        index=pd.Index(ons_ids, name="ons_id"),
+        columns=pd.Index(parties, name="party"),
+    )
+    return Simulation(seat_counts=seat_counts, win_probability=win_probability)
@@ -0,0 +1,104 @@
+"""
+Evaluate many polling scenarios against one set of previous election results.
+
+`UKModel.calculate_national_swing` forecasts every seat from a single national poll of polls,
+rebuilding columns of the results dataframe each time. `NationalSwing` lays the previous results out
+as a seats x parties matrix once, then evaluates a whole (scenarios x parties) matrix of
+hypothetical national polls with the same national swing model in one vectorised call, e.g. for
+"what if" dashboards.
+
+Example usage:
+    > from maven.datasets.general_election import UK2017Model
+    > from maven.datasets.general_election.swing import NationalSwing
+    > pipeline = UK2017Model(directory='./data/general-election/UK/2017/model')
+    > model = NationalSwing(pipeline.load_results_data()[pipeline.last])
+    > polls = pd.DataFrame({'con': [0.42, 0.40], 'lab': [0.40, 0.42]}, index=['con', 'lab'])
+    > model.evaluate(polls).seats
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from maven.datasets.general_election.seat_matrix import SeatMatrix
+
+Scenarios = namedtuple("Scenarios", ["seats", "winners"])
+Scenarios.__doc__ = """Results of NationalSwing.evaluate.
+
+Attributes:
+    seats (pd.DataFrame): Seats won by each party (columns) in each scenario (rows).
+    winners (pd.DataFrame): Winning party in each seat (columns, by ons_id) in each scenario (rows),
+                            if requested (NaN where no party standing in the seat has polling).
+"""
+
+
+class NationalSwing:
+    """National swing model (as in UKModel.calculate_national_swing) precomputed for previous
+    election results.
+
+    Args:
+        results (pd.DataFrame): Previous election results with one row per seat & party (`ons_id`,
+                                `party`, `votes` & `voteshare` columns), e.g. from
+                                UKModel.load_results_data.
+    """
+
+    def __init__(self, results):
+        votes = SeatMatrix.from_long(results, "votes")
+        self.ons_ids, self.parties = votes.ons_ids, votes.parties
+        self.voteshares = votes.lay_out(results.voteshare).values
+        votes_by_party = np.nansum(votes.values, axis=0)
+        self.national_voteshare = votes_by_party / votes_by_party.sum()
+
+    def forecast(self, polls):
+        """Forecast voteshare of each party in each seat under each scenario.
+
+        Args:
+            polls (np.ndarray): (scenarios x parties) national polls, with parties in the order of
+                                self.parties (NaN for parties without polling).
+
+        Returns: (scenarios x seats x parties) np.ndarray of forecast voteshares.
+        """
+        national_swing = (polls / self.national_voteshare) - 1
+        return self.voteshares[None, :, :] * (1 + national_swing[:, None, :])
+
+    def evaluate(self, polls, winners=False, batch_size=1000):
+        """Seats won by each party under each scenario of national polling.
+
+        Args:
+            polls (pd.DataFrame): National polling (voteshares 0-1) with one row per scenario and
+                                  one column per party. Parties without polling can't win any seats,
+                                  as in calculate_national_swing, and seats where no party standing
+                                  has polling aren't won by anyone.
+            winners (bool): Also return the winner of every seat in every scenario.
+            batch_size (int): Number of scenarios forecast at a time (memory use is ~batch_size x
+                              seats x parties x 8 bytes).
+
+        Returns: Scenarios of seats per party (and winners per seat if requested) per scenario.
+        """
+        poll_matrix = polls.reindex(columns=self.parties).to_numpy(dtype=float)
+        n_scenarios, n_parties = poll_matrix.shape
+        seat_winners = np.empty((n_scenarios, len(self.ons_ids)), dtype=int)
+        for start in range(0, n_scenarios, batch_size):
+            forecast = self.forecast(poll_matrix[start : start + batch_size])
+            forecast[np.isnan(forecast)] = -np.inf  # parties without a forecast can't win
+            # -1 where no party has a forecast
+            seat_winners[start : start + batch_size] = np.where(
+                np.isfinite(forecast).any(axis=2), forecast.argmax(axis=2), -1
+            )
+        won = seat_winners >= 0
+        seats = np.bincount(
+            (seat_winners + n_parties * np.arange(n_scenarios)[:, None])[won],
+            minlength=n_scenarios * n_parties,
+        ).reshape(n_scenarios, n_parties)
+        return Scenarios(
+            seats=pd.DataFrame(
+                seats, index=polls.index, columns=pd.Index(self.parties, name="party")
+            ),
+            winners=pd.DataFrame(
+                np.where(won, self.parties.to_numpy()[seat_winners], np.nan),
+                index=polls.index,
+                columns=pd.Index(self.ons_ids, name="ons_id"),
+            )
+            if winners
+            else None,
+        )
@@ -26,17 +26,10 @@ from maven.datasets.general_election.base import UKResults
 class UK2010Results(UKResults):
     """Handles results data for the United Kingdom's 2010 General Election."""
 
+    dataset_name = "general-election/UK/2010/results"
+
     def __init__(self, directory=Path("data/general-election/UK/2010/results")):
         super(UK2010Results, self).__init__(directory=directory)
         self.directory = Path(directory)
-        self.sources = [
-            # url, filename, checksum
-            (
-                "http://researchbriefings.files.parliament.uk/documents/CBP-8647/",
-                "1918-2017election_results_by_pcon.xlsx",
-                "a1e4628945574639b541b21bada2531c",
-            ),
-        ]
-        self.target = ("general_election-uk-2010-results.csv", "954a0916f5ce791ca566484ce566088d")  # filename, checksum
         self.verbose_name = "UK 2010 General Election results"
         self.year = "2010"
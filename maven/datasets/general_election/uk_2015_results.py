@@ -25,17 +25,10 @@ from maven.datasets.general_election.base import UKResults
 class UK2015Results(UKResults):
     """Handles results data for the United Kingdom's 2015 General Election."""
 
+    dataset_name = "general-election/UK/2015/results"
+
     def __init__(self, directory=Path("data/general-election/UK/2015/results")):
         super(UK2015Results, self).__init__(directory=directory)
         self.directory = Path(directory)
-        self.sources = [
-            # url, filename, checksum
-            (
-                "http://researchbriefings.files.parliament.uk/documents/CBP-8647/",
-                "1918-2017election_results_by_pcon.xlsx",
-                "a1e4628945574639b541b21bada2531c",
-            ),
-        ]
-        self.target = ("general_election-uk-2015-results.csv", "9a785cb19275e4dbc79da67eece6067f")  # filename, checksum
         self.verbose_name = "UK 2015 General Election results"
         self.year = "2015"
@@ -16,26 +16,10 @@ from maven.datasets.general_election.base import UKModel
 class UK2017Model(UKModel):
     """Generates model-ready data for the United Kingdom's 2017 General Election."""
 
+    dataset_name = "general-election/UK/2017/model"
+
     def __init__(self, directory=Path("data/general-election/UK/2017/model")):
         super(UK2017Model, self).__init__(directory=directory)  # inherit base __init__ but override default directory
-        self.sources = [
-            # tuples of (url, filename, checksum)
-            (
-                "general-election/UK/2015/results",
-                "general_election-uk-2015-results.csv",
-                "9a785cb19275e4dbc79da67eece6067f",
-            ),
-            (
-                "general-election/UK/2017/results",
-                "general_election-uk-2017-results.csv",
-                "c7e1fde647e55f9d4567cb81e62c782a",
-            ),
-            ("general-election/UK/polls", "general_election-uk-polls.csv", "cbc3c19a376b4ab632f122008f593799"),
-            ("general-election/UK/polls", "general_election-london-polls.csv", "cd28ebb7233b808796535fc0b572304e"),
-            ("general-election/UK/polls", "general_election-scotland-polls.csv", "6c2ba92e2325de0e22a208fb0b3e95fc"),
-            ("general-election/UK/polls", "general_election-wales-polls.csv", "6857df3c18df525d5e59a6bf1170b10c"),
-            ("general-election/UK/polls", "general_election-ni-polls.csv", "46bbe5e9dc29d4b3042837fe4c16ca07"),
-        ]
         self.retrieve_all = True
         self.verbose_name = "UK2017Model"
         self.year = 2017
@@ -23,17 +23,10 @@ from maven.datasets.general_election.base import UKResults
 class UK2017Results(UKResults):
     """Handles results data for the United Kingdom's 2017 General Election."""
 
+    dataset_name = "general-election/UK/2017/results"
+
     def __init__(self, directory=Path("data/general-election/UK/2017/results")):
         super(UK2017Results, self).__init__(directory=directory)
         self.directory = Path(directory)
-        self.sources = [
-            # url, filename, checksum
-            (
-                "http://researchbriefings.files.parliament.uk/documents/CBP-8647/",
-                "1918-2017election_results_by_pcon.xlsx",
-                "a1e4628945574639b541b21bada2531c",
-            ),
-        ]
-        self.target = ("general_election-uk-2017-results.csv", "c7e1fde647e55f9d4567cb81e62c782a")  # filename, checksum
         self.verbose_name = "UK 2017 General Election results"
         self.year = "2017"
@@ -32,6 +32,7 @@ class UK2019Model(UKModel):
             ("general-election/UK/polls", "general_election-ni-polls.csv", "46bbe5e9dc29d4b3042837fe4c16ca07"),
         ]
         self.retrieve_all = True
+        self.target = ("general_election-uk-2019-model.csv", None)  # filename, checksum
         self.verbose_name = "UK2019Model"
         self.year = 2019
         self.last_date = pd.to_datetime("2017-06-08")
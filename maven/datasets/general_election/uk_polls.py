@@ -14,7 +14,7 @@ Sources:
         - https://s3-eu-west-1.amazonaws.com/sixfifty/polls_ni.csv
     - PollBase: https://www.markpack.org.uk/opinion-polls/
 """
-import os
+import warnings
 from pathlib import Path
 
 import numpy as np
@@ -30,65 +30,102 @@ class UKPolls(Pipeline):
     Mark Pack's PollBase : https://www.markpack.org.uk/opinion-polls/
     """
 
+    dataset_name = "general-election/UK/polls"
+
     def __init__(self, directory=Path("data/general-election/UK/polls")):
         super(UKPolls, self).__init__(
             directory=directory
         )  # inherit base __init__ but override default directory
-        self.sources = [
-            # tuples of (url, filename, checksum)
-            (
-                "https://3859gp38qzh51h504x6gvv0o-wpengine.netdna-ssl.com/files/2020/01/",
-                "PollBase-Q4-2019.xlsx",
-                "81e9dd972f17d0b4f572e7da6c4c497f",
-            ),
-            (
-                "https://s3-eu-west-1.amazonaws.com/sixfifty/",
-                "polls.csv",
-                "8c32b623346c8c0faa603bc76c4d7fd1",
-            ),
-            (
-                "https://s3-eu-west-1.amazonaws.com/sixfifty/",
-                "polls_london.csv",
-                "cd28ebb7233b808796535fc0b572304e",
-            ),
-            (
-                "https://s3-eu-west-1.amazonaws.com/sixfifty/",
-                "polls_scotland.csv",
-                "6c2ba92e2325de0e22a208fb0b3e95fc",
-            ),
-            (
-                "https://s3-eu-west-1.amazonaws.com/sixfifty/",
-                "polls_wales.csv",
-                "6857df3c18df525d5e59a6bf1170b10c",
-            ),
-            (
-                "https://s3-eu-west-1.amazonaws.com/sixfifty/",
-                "polls_ni.csv",
-                "46bbe5e9dc29d4b3042837fe4c16ca07",
-            ),
-        ]
         self.retrieve_all = True
-        self.target = (
-            "general_election-uk-polls.csv",
-            "cbc3c19a376b4ab632f122008f593799",
-        )  # filename, checksum
         self.verbose_name = "UKPolls"
 
+    @staticmethod
+    def parse_fieldwork(fieldwork, year, month):
+        """Parse PollBase fieldwork days into the dates fieldwork started and ended.
+
+        Fieldwork is given as days within the month the poll is listed under, e.g. "12-14", a single
+        day "5", or "30-3" for fieldwork running into the next month; days may have a "?" appended
+        if uncertain. Fieldwork cells Excel has read as dates are taken as a single day of fieldwork
+        on that date.
+
+        Months may be names (e.g. "Jan", "January"), numbers, or dates (as Excel reads month cells
+        formatted as dates), either as a datetime column or datetimes mixed in with other values.
+
+        Args:
+            fieldwork (pd.Series): Fieldwork days.
+            year (pd.Series): Year of the month the poll is listed under.
+            month (pd.Series): Month the poll is listed under.
+
+        Returns: tuple of pd.Series (from, to) of datetimes, NaT where fieldwork can't be parsed
+                 (with a warning).
+        """
+        fieldwork_dates = UKPolls.dates_in(fieldwork)
+        days = (
+            fieldwork.where(fieldwork_dates.isnull())
+            .astype(str)
+            .str.replace("?", "", regex=False)
+            .str.extract(r"^\s*(\d+)\s*(?:-\s*(\d+))?", expand=True)
+            .astype(float)
+        )
+        day_from = days[0]
+        day_to = days[1].fillna(day_from)
+        year = pd.to_numeric(year, errors="coerce")
+        if pd.api.types.is_datetime64_any_dtype(month):
+            month_from = month.dt.month.astype(float)
+        else:
+            month_from = (
+                pd.to_numeric(month, errors="coerce")
+                .fillna(UKPolls.dates_in(month).dt.month)
+                .fillna(
+                    pd.to_datetime(
+                        month.astype(str).str.strip().str[:3], format="%b", errors="coerce"
+                    ).dt.month
+                )
+            )
+
+        # Fieldwork ending on an earlier day than it started (e.g. "30-3") ended the following month
+        month_to = month_from + (day_to < day_from)
+        year_to = year + (month_to > 12)
+        month_to = month_to.where(month_to <= 12, 1)
+
+        date_from = pd.to_datetime(
+            pd.DataFrame({"year": year, "month": month_from, "day": day_from}), errors="coerce"
+        ).fillna(fieldwork_dates)
+        date_to = pd.to_datetime(
+            pd.DataFrame({"year": year_to, "month": month_to, "day": day_to}), errors="coerce"
+        ).fillna(fieldwork_dates)
+        unparsed = (date_from.isnull() & fieldwork.notnull()).sum()
+        if unparsed:
+            warnings.warn(f"Couldn't parse fieldwork dates for {unparsed} poll(s)")
+        return date_from, date_to
+
+    @staticmethod
+    def dates_in(values):
+        """Values that are dates (e.g. datetime.datetime or pd.Timestamp) as datetimes, else NaT."""
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values.dt.normalize()
+        # Leave out numbers & strings (e.g. day 5 or "12-14"), which pd.to_datetime would read as
+        # dates
+        is_number = pd.to_numeric(values, errors="coerce").notnull()
+        is_string = values.astype(str) == values
+        return pd.to_datetime(values.where(~is_number & ~is_string), errors="coerce").dt.normalize()
+
     def process(self):
-        """Process UK polling data."""
+        """Process UK polling data.
+
+        Polls since June 2017 are read from PollBase's "17-19" sheet; earlier polls come from
+        SixFifty's data.
+        """
         filename = self.sources[0][1]
-        processed_results_location = self.directory / "processed" / self.target[0]
-        os.makedirs(
-            self.directory / "processed", exist_ok=True
-        )  # create directory if it doesn't exist
 
         def process_and_export():
             # Read in PollBase
-            df = pd.read_excel(
-                self.directory / "raw" / filename,
-                sheet_name="17-19",
-                usecols="A:C,G:H,I,K,M,O,Q,S,U,Y",
-            )
+            with self.stage("read_pollbase"):
+                df = pd.read_excel(
+                    self.directory / "raw" / filename,
+                    sheet_name="17-19",
+                    usecols="A:C,G:H,I,K,M,O,Q,S,U,Y",
+                )
 
             # Clean it up
             df.columns = utils.sanitise(
@@ -104,43 +141,8 @@ class UKPolls(Pipeline):
             df["year"] = df.year.replace({"?": 2019}).ffill().astype(int)
             df["month"] = df.month.ffill()
             df = df[df["fieldwork"].notnull()].copy()
-            df["day_from"] = df.fieldwork.apply(
-                lambda x: str(x).split("-")[0].replace("?", "")
-                if "-" in str(x)
-                else str(x).replace("?", "")
-            )
-            df["day_to"] = df.fieldwork.apply(
-                lambda x: str(x).split("-")[1].replace("?", "")
-                if "-" in str(x)
-                else str(x).replace("?", "")
-            )
-            df["from"] = pd.to_datetime(
-                df.apply(lambda row: f"{row.year}-{row.month}-{row.day_from}", axis=1)
-            )
-            df["to"] = pd.to_datetime(
-                df.apply(lambda row: f"{row.year}-{row.month}-{row.day_to}", axis=1)
-            )
-
-            # Fix month & year in df['to'] where e.g. fieldwork is "30-3 Jan"
-            month_shifted = (
-                df.year.astype(str)
-                + "-"
-                + ((df.to.dt.month + 1) % 12).astype(str).replace("0", "12")
-                + "-"
-                + df.day_to.astype(str)
-            )
-            year_needs_shifting = month_shifted.apply(lambda x: str(x).split("-")[1]) == "1"
-            month_shifted.loc[year_needs_shifting] = (
-                ((df.loc[year_needs_shifting, "year"]).astype(int) + 1)
-                .astype(str)
-                .replace("0", "12")
-                + "-"
-                + ((df.to.dt.month + 1) % 12).astype(str)
-                + "-"
-                + df.day_to.astype(str)
-            )
-            df.loc[df["from"] > df["to"], "to"] = month_shifted.loc[df["from"] > df["to"]]
-            df["to"] = pd.to_datetime(df.to)
+            df["from"], df["to"] = self.parse_fieldwork(df.fieldwork, year=df.year, month=df.month)
+            df = df[df["to"].notnull()].copy()  # drop polls without usable fieldwork dates
 
             # Divide numbers by 100
             for party in ["con", "lab", "ld", "ukip", "grn", "chuk", "bxp"]:
@@ -170,9 +172,10 @@ class UKPolls(Pipeline):
             df = df[columns].copy().sort_values("to")
 
             # Read in SixFifty polling data (2005 -> June 2017)
-            df_sixfifty = pd.read_csv(
-                self.directory / "raw" / "polls.csv", parse_dates=["from", "to"]
-            )
+            with self.stage("read_sixfifty"):
+                df_sixfifty = pd.read_csv(
+                    self.directory / "raw" / "polls.csv", parse_dates=["from", "to"]
+                )
             df_sixfifty["chuk"] = np.nan
             df_sixfifty["bxp"] = np.nan
             df_sixfifty = df_sixfifty[columns].copy().sort_values("to")
@@ -183,14 +186,6 @@ class UKPolls(Pipeline):
             df_polls = pd.concat([df_sixfifty, df], axis=0)
 
             # Export
-            print(f"Exporting dataset to {processed_results_location.resolve()}")
-            df_polls.to_csv(processed_results_location, index=False)
-
-        utils.retrieve_from_cache_if_exists(
-            filename=self.target[0],
-            target_dir=(self.directory / "processed"),
-            processing_fn=process_and_export,
-            md5_checksum=self.target[1],
-            caching_enabled=self.cache,
-            verbose=self.verbose,
-        )
+            self.export(df_polls, self.target[0])
+
+        self.process_targets(process_and_export)
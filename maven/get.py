@@ -1,17 +1,71 @@
 """
 Main data getting functionality. Maps data identifiers to data pipeline classes.
 
+Pipeline classes are registered by module path (see `maven.catalogue`, which also lists datasets
+registered by other packages) and only imported when their dataset is requested, so `import maven`
+doesn't import pandas, numpy & requests (or any pipeline module) until they're needed.
+
 Example usage:
     > import maven
     > maven.get('general-election/UK/2015/results', data_directory='./data/')
+    > maven.get_many(['general-election/UK/2015/model', 'general-election/UK/2017/model'])
+    > maven.prefetch(['general-election/UK/2017/model'], mirror='./mirror/')
+    > # then, without internet access:
+    > maven.get('general-election/UK/2017/model', data_directory='./data/', mirror='./mirror/')
 """
-
+import importlib
+import os
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
-from .datasets import coronavirus, general_election
+from . import catalogue
+from .instrumentation import default_instrumentation
+from .mirror import Mirror, default_mirror
+from .store import ArtefactStore
+
+# Dataset identifier -> import path of its pipeline class (or the class itself), imported on first
+# use. Datasets registered by other packages (see maven.catalogue) are looked up when they're not
+# found here.
+mapper = {dataset.name: dataset.pipeline for dataset in catalogue.DATASETS}
+
+
+def get_pipeline_class(name):
+    """Pipeline class for dataset `name`, importing its module if it hasn't been imported yet."""
+    pipeline_class = mapper[name] if name in mapper else catalogue.get_dataset(name).pipeline
+    if isinstance(pipeline_class, str):
+        module, _, class_name = pipeline_class.rpartition(".")
+        pipeline_class = getattr(importlib.import_module(module), class_name)
+    return pipeline_class
 
 
-def get(name, data_directory=Path("."), retrieve=True, process=True):
+def get_pipeline(name, data_directory=Path(".")):
+    """Instantiate the pipeline for dataset `name` with its directory inside `data_directory`.
+
+    All pipelines in `data_directory` share the artefact store in `data_directory / ".store"`.
+    """
+    pipeline_class = get_pipeline_class(name)
+    if isinstance(data_directory, str):
+        data_directory = Path(data_directory)
+    pipeline = pipeline_class(directory=(data_directory / name))
+    pipeline.data_directory = data_directory
+    pipeline.store = ArtefactStore(data_directory / ".store")
+    return pipeline
+
+
+def get(
+    name,
+    data_directory=Path("."),
+    retrieve=True,
+    process=True,
+    verify=False,
+    output_format="csv",
+    return_frames=False,
+    write=True,
+    instrumentation=None,
+    mirror=None,
+    plan=False,
+):
     """Core data getter function.
 
     Args:
@@ -20,27 +74,205 @@ def get(name, data_directory=Path("."), retrieve=True, process=True):
                                                    a pathlib Path).
         retrieve (bool): Toggle dataset retrieval.
         process (bool): Toggle dataset processing.
+        verify (bool): Re-hash every cached file rather than trusting checksums recorded for
+                       unchanged files.
+        output_format (str): Format of processed files: "csv" (default), or "parquet"/"feather" to
+                             keep column types (requires pyarrow).
+        return_frames (bool): Return the processed DataFrames. Datasets this one depends on are also
+                              handed over in memory rather than re-read from disk.
+        write (bool): Write processed files to disk (set False with return_frames=True to work in
+                      memory only).
+        instrumentation (Instrumentation): Receives timing, download & cache events from this
+                                           pipeline & those it depends on, e.g.
+                                           JSONLinesSink("events.jsonl"). Defaults to the file
+                                           named by the MAVEN_EVENTS environment variable, if set.
+        mirror (str, pathlib.PosixPath or Mirror): Local mirror directory (or URL of a local HTTP
+                                                   server) checked for source files before their
+                                                   upstream URLs (see `prefetch`). Defaults to the
+                                                   MAVEN_MIRROR environment variable, if set.
+        plan (bool): Don't retrieve or process anything, just return the maven.plan.Plan of what
+                     would be done (see `maven.plan.build_plan`).
 
-    Returns: Nothing (datasets are placed into current working directory).
+    Returns: dict of processed DataFrames by filename if return_frames is True, the Plan if plan is
+             True, otherwise nothing (datasets are placed into current working directory).
     """
-    mapper = {
-        "coronavirus/CSSE": coronavirus.CSSE,
-        "general-election/UK/2010/results": general_election.UK2010Results,
-        "general-election/UK/2015/model": general_election.UK2015Model,
-        "general-election/UK/2015/results": general_election.UK2015Results,
-        "general-election/UK/2017/model": general_election.UK2017Model,
-        "general-election/UK/2017/results": general_election.UK2017Results,
-        # "general-election/UK/2019/model": general_election.UK2019Model,
-        "general-election/UK/polls": general_election.UKPolls,
-    }
-    if name not in mapper:
-        raise KeyError(f"'{name}' not found in datasets.")
+    if not (write or return_frames):
+        raise ValueError(
+            "Processed datasets must be either written (write=True) "
+            "or returned (return_frames=True)."
+        )
+    if plan:
+        from maven.plan import build_plan
 
-    if isinstance(data_directory, str):
-        data_directory = Path(data_directory)
-    pipeline = mapper[name](directory=(data_directory / name))
+        return build_plan(
+            name,
+            data_directory=data_directory,
+            retrieve=retrieve,
+            process=process,
+            output_format=output_format,
+            mirror=mirror,
+        )
+    pipeline = get_pipeline(name, data_directory=data_directory)
+    pipeline.verify = verify
+    pipeline.output_format = output_format
+    pipeline.keep_frames = return_frames
+    pipeline.write = write
+    pipeline.instrumentation = instrumentation or default_instrumentation()
+    if mirror is None:
+        mirror = default_mirror()
+    pipeline.mirror = mirror if mirror is None or isinstance(mirror, Mirror) else Mirror(mirror)
 
     if retrieve:
-        pipeline.retrieve()
+        with pipeline.stage("retrieve"):
+            pipeline.retrieve()
     if process:
-        pipeline.process()
+        with pipeline.stage("process"):
+            pipeline.process()
+    if return_frames:
+        return pipeline.get_frames()
+
+
+def get_dependency_graph(names):
+    """Build the dependency graph for datasets `names` (and everything they transitively depend on).
+
+    A pipeline depends on another dataset when one of its `sources` is a dataset identifier rather
+    than a URL, e.g. `general-election/UK/2017/model` -> `general-election/UK/2015/results`,
+    `general-election/UK/polls`. Sources are read from each dataset's metadata in `maven.catalogue`,
+    so pipelines aren't imported.
+
+    Args:
+        names (list of str): Names of datasets to build.
+
+    Returns: dict mapping each dataset name to the list of dataset names it depends on.
+    """
+    graph = {}
+    to_visit = list(names)
+    while to_visit:
+        name = to_visit.pop()
+        if name in graph:
+            continue
+        if name in mapper and not isinstance(mapper[name], str):
+            # Pipeline class registered without metadata: find its sources by instantiating it
+            upstream = catalogue.Dataset(
+                name, mapper[name], tuple(get_pipeline(name).sources), ()
+            ).upstream
+        else:
+            upstream = catalogue.get_dataset(name).upstream
+        graph[name] = upstream
+        to_visit += upstream
+    return graph
+
+
+def get_many(
+    names,
+    data_directory=Path("."),
+    retrieve=True,
+    process=True,
+    verify=False,
+    output_format="csv",
+    max_workers=4,
+    instrumentation=None,
+    mirror=None,
+):
+    """Retrieve/process several datasets, running independent pipelines concurrently.
+
+    Every dataset is built after the datasets it depends on (see `get_dependency_graph`), and each
+    dataset is built only once even if several requested datasets share it.
+
+    Args:
+        names (list of str): Names of datasets to retrieve/process.
+        data_directory (str or pathlib.PosixPath): Path to directory where datasets will be saved.
+        retrieve (bool): Toggle dataset retrieval.
+        process (bool): Toggle dataset processing.
+        verify (bool): Re-hash every cached file rather than trusting checksums recorded for
+                       unchanged files.
+        output_format (str): Format of processed files: "csv", "parquet" or "feather".
+        max_workers (int): Maximum number of pipelines to run at the same time.
+        instrumentation (maven.instrumentation.Instrumentation): Receives events from every pipeline
+                                                                 (see `get`).
+        mirror (str, pathlib.PosixPath or maven.mirror.Mirror): Local mirror checked for source
+                                                                files (see `get`).
+
+    Returns: Nothing (datasets are placed into data_directory).
+    """
+    pending = get_dependency_graph(names)
+    built = set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [name for name, upstream in pending.items() if built.issuperset(upstream)]
+            if not ready and not running:
+                raise RuntimeError(f"Circular dependency between datasets: {sorted(pending)}")
+            for name in ready:
+                del pending[name]
+                future = executor.submit(
+                    get,
+                    name,
+                    data_directory=data_directory,
+                    retrieve=retrieve,
+                    process=process,
+                    verify=verify,
+                    output_format=output_format,
+                    instrumentation=instrumentation,
+                    mirror=mirror,
+                )
+                running[future] = name
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                future.result()  # re-raise any exception from the worker
+                built.add(name)
+
+
+def prefetch(names, mirror, instrumentation=None):
+    """Download the source files of datasets `names` (and the datasets they depend on) into a mirror
+    directory.
+
+    Pipelines given the mirror (`get(..., mirror=...)`) then retrieve their sources from it instead
+    of upstream, e.g. on machines without internet access. Files already in the mirror with the
+    expected checksum aren't downloaded again, and files that don't match their expected checksum
+    raise a warning (as they would in `get`).
+
+    Args:
+        names (list of str): Names of datasets whose sources to download.
+        mirror (str, pathlib.PosixPath or maven.mirror.Mirror): Mirror directory to fill.
+        instrumentation (maven.instrumentation.Instrumentation): Receives "download" events.
+
+    Returns: list of paths of files in the mirror, one per source.
+    """
+    from maven import utils
+
+    if not isinstance(mirror, Mirror):
+        mirror = Mirror(mirror)
+    if mirror.remote:
+        raise ValueError(f"Can only prefetch into a mirror directory, not {mirror.location}")
+    instrumentation = instrumentation or default_instrumentation()
+    paths = []
+    for name in get_dependency_graph(names):
+        pipeline = get_pipeline(name)
+        # as Pipeline.retrieve
+        sources = pipeline.sources if pipeline.retrieve_all else pipeline.sources[:1]
+        for url, filename, md5_checksum in sources:
+            if not utils.is_url(url):
+                continue  # upstream dataset, whose own sources are prefetched
+            source_url = url if pipeline.rename_source else url + filename
+            path = mirror.resolve(source_url)
+            if path in paths:
+                continue
+            paths.append(path)
+            if path.exists() and (
+                md5_checksum is None or utils.calculate_md5_checksum(path) == md5_checksum
+            ):
+                print(f"{source_url} is already in mirror {mirror.location}")
+                continue
+            os.makedirs(path.parent, exist_ok=True)
+            checksums = utils.fetch_url(
+                source_url,
+                path.name,
+                path.parent,
+                rename_file=True,
+                instrumentation=instrumentation.bind(pipeline=type(pipeline).__name__),
+            )
+            if md5_checksum and checksums["md5"] != md5_checksum:
+                warnings.warn(f"MD5 checksum doesn't match for {filename}")
+    return paths
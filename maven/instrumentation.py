@@ -0,0 +1,157 @@
+"""
+Structured instrumentation of pipeline runs.
+
+Pipelines send events to their `instrumentation` (set by `maven.get(..., instrumentation=...)`). The
+default discards every event, and `JSONLinesSink` writes each event as one line of JSON, e.g.:
+
+    > import maven
+    > from maven.instrumentation import JSONLinesSink
+    > maven.get('general-election/UK/2017/model', instrumentation=JSONLinesSink('run.jsonl'))
+
+or, without changing any code, set the MAVEN_EVENTS environment variable to the path of a JSON lines
+file.
+
+Events (all with `event`, `time` & `pipeline` fields):
+    - retrieve_start / retrieve_end: retrieving each source (`filename`, `source`; `seconds` &
+      `max_rss_so_far` at the end);
+    - download: a file fetched from a URL (`url`, `filename`, `status`, `bytes`, `seconds`);
+    - cache_hit / cache_miss: a raw or processed file found in its directory or the artefact store
+      (`where`) or not;
+    - checksum: a file hashed to validate it (`filename`, `seconds`);
+    - stage: a step of processing (`stage`, e.g. "load_results_data", or "export" with `filename`;
+      `seconds` & `max_rss_so_far`), plus "retrieve" & "process" stages covering each pipeline's
+      whole retrieve/process run.
+
+`max_rss_so_far` is the peak resident set size of the process since it started, in bytes (None where
+unavailable, e.g. Windows). It's a high-water mark, not the memory used by the stage: it only grows
+when a stage uses more memory than any earlier point in the process.
+
+Sinks opened by `default_instrumentation` are closed when the interpreter exits.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+EVENTS_ENVIRONMENT_VARIABLE = "MAVEN_EVENTS"
+_sinks = {}
+_sinks_lock = threading.Lock()
+
+
+def max_rss_so_far():
+    """Peak resident set size of this process so far in bytes (None if it can't be measured)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, kilobytes on Linux
+
+
+class Instrumentation:
+    """Receives events from pipeline runs and discards them.
+
+    Subclass and override `emit` (and set `enabled = True`) to record events.
+    """
+
+    enabled = False
+
+    def emit(self, event, **fields):
+        """Record event with fields."""
+
+    @contextmanager
+    def stage(self, event, **fields):
+        """Emit event once the enclosed block finishes, with its duration (`seconds`) &
+        `max_rss_so_far`.
+
+        The block can add fields to the event through the dict yielded. Failures are recorded in an
+        `error` field.
+        """
+        if not self.enabled:
+            yield fields
+            return
+        start = time.perf_counter()
+        try:
+            yield fields
+        except BaseException as error:
+            fields["error"] = repr(error)
+            raise
+        finally:
+            self.emit(
+                event,
+                seconds=time.perf_counter() - start,
+                max_rss_so_far=max_rss_so_far(),
+                **fields
+            )
+
+    def bind(self, **fields):
+        """Instrumentation adding fields (e.g. pipeline="UKPolls") to every event sent to it."""
+        if not self.enabled:
+            return self
+        return BoundInstrumentation(self, fields)
+
+
+class BoundInstrumentation(Instrumentation):
+    """Adds fixed fields to every event before passing it on to another instrumentation."""
+
+    enabled = True
+
+    def __init__(self, instrumentation, fields):
+        self.instrumentation = instrumentation
+        self.fields = fields
+
+    def emit(self, event, **fields):
+        self.instrumentation.emit(event, **dict(self.fields, **fields))
+
+
+NULL_INSTRUMENTATION = Instrumentation()
+
+
+class JSONLinesSink(Instrumentation):
+    """Write events as JSON lines to a file (appending if it already exists) or file-like object."""
+
+    enabled = True
+
+    def __init__(self, file):
+        if isinstance(file, (str, os.PathLike)):
+            file = open(file, "a")
+        self.file = file
+        self.lock = threading.Lock()  # pipelines run concurrently by maven.get_many share a sink
+
+    def emit(self, event, **fields):
+        line = json.dumps(
+            {"event": event, "time": datetime.now().isoformat(), **fields}, default=str
+        )
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def default_instrumentation():
+    """JSONLinesSink writing to the MAVEN_EVENTS environment variable's file (if set)."""
+    path = os.environ.get(EVENTS_ENVIRONMENT_VARIABLE)
+    if not path:
+        return NULL_INSTRUMENTATION
+    with _sinks_lock:
+        if path not in _sinks:
+            _sinks[path] = JSONLinesSink(path)
+        return _sinks[path]
+
+
+@atexit.register
+def close_default_sinks():
+    """Close the sinks opened by default_instrumentation."""
+    with _sinks_lock:
+        for sink in _sinks.values():
+            sink.close()
+        _sinks.clear()
@@ -0,0 +1,105 @@
+"""
+File locks so that several threads, processes or hosts building datasets in a shared data directory
+wait for a single in-progress build of each file rather than duplicating it (or reading it
+half-built).
+
+`FileLock(path)` locks a hidden lock file next to path (`.<name>.lock`), which is never deleted.
+Locks are POSIX record locks (`fcntl.lockf`), which NFS supports across hosts via its lock manager.
+POSIX locks are held per process, so a lock is also held with a threading lock per path to serialise
+threads within a process. Without fcntl (e.g. on Windows) locks only serialise threads.
+
+Every file is also written atomically (to a temporary file, then renamed over it, see
+`maven.store.temporary_path`), so readers not taking the lock see either the old or the new file,
+never part of one.
+
+Example usage:
+    > with FileLock(directory / 'processed' / 'results.csv'):
+    >     ...  # check if results.csv is cached, otherwise build it
+"""
+import os
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # e.g. on Windows
+    fcntl = None
+
+LOCK_SUFFIX = ".lock"
+
+_path_locks = {}  # _PathLock by absolute lock file path, shared by threads in this process
+_path_locks_guard = threading.Lock()
+
+
+def lock_path(path):
+    """Hidden lock file in the same directory as path."""
+    path = Path(path)
+    return path.with_name(f".{path.name}{LOCK_SUFFIX}")
+
+
+class _PathLock:
+    """This process's lock on one lock file: a reentrant threading lock plus the fcntl lock."""
+
+    def __init__(self):
+        self.thread_lock = threading.RLock()
+        self.depth = 0  # times acquired by the thread holding thread_lock
+        self.fd = None
+
+
+class FileLock:
+    """Exclusive lock on path (reentrant within a thread), used as a context manager.
+
+    Args:
+        path (str or pathlib.PosixPath): File (or directory) to lock, which needn't exist.
+    """
+
+    def __init__(self, path):
+        self.path = lock_path(Path(path).absolute())
+
+    def __repr__(self):
+        return f"FileLock({self.path})"
+
+    def __enter__(self):
+        with _path_locks_guard:
+            lock = _path_locks.setdefault(str(self.path), _PathLock())
+        if not lock.thread_lock.acquire(blocking=False):
+            print(f"Waiting for lock {self.path}")
+            lock.thread_lock.acquire()
+        if lock.depth == 0:
+            try:
+                lock.fd = self.acquire_file_lock()
+            except BaseException:
+                lock.thread_lock.release()
+                raise
+        lock.depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        lock = _path_locks[str(self.path)]
+        lock.depth -= 1
+        if lock.depth == 0:
+            if fcntl is not None:
+                fcntl.lockf(lock.fd, fcntl.LOCK_UN)
+            os.close(lock.fd)
+            lock.fd = None
+        lock.thread_lock.release()
+
+    def acquire_file_lock(self):
+        """Open & lock the lock file, waiting for other processes holding it.
+
+        Returns: file descriptor of the lock file.
+        """
+        os.makedirs(self.path.parent, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        if fcntl is None:
+            return fd
+        try:
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:  # held by another process
+                print(f"Waiting for lock {self.path}")
+                fcntl.lockf(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
@@ -0,0 +1,124 @@
+"""
+Per-directory checksum manifest.
+
+Each pipeline's `raw/` and `processed/` directory holds a `.manifest.json` recording the size,
+mtime, inode and MD5 of every file in it. A file whose stat signature (size, mtime, inode) still
+matches its manifest entry is known to be unchanged, so its MD5 can be read from the manifest
+instead of re-hashing the whole file.
+
+Entries for processed files also record what they were built from (see `Pipeline.build_record`): the
+MD5s of the pipeline's raw files and a fingerprint of its code, so processed files are rebuilt
+exactly when either changes.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from maven.lock import FileLock
+from maven.store import temporary_path
+
+MANIFEST_FILENAME = ".manifest.json"
+CHUNK_SIZE = 1024 * 1024  # bytes read/written at a time when hashing or downloading files
+
+
+def calculate_md5_checksum(filename):
+    """
+    Calculate the checksum of the file, exactly same as md5-sum linux util.
+    Code from https://github.com/RaRe-Technologies/gensim/blob/develop/gensim/downloader.py
+    """
+    hash_md5 = hashlib.md5()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hash_md5.update(chunk)
+    return hash_md5.hexdigest()
+
+
+def stat_signature(path):
+    """(size, mtime_ns, inode) of path, which changes whenever the file is rewritten or replaced."""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "inode": stat.st_ino}
+
+
+class Manifest:
+    """Checksums of the files in a directory, keyed by filename."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.path = self.directory / MANIFEST_FILENAME
+        self.entries = self.read()
+
+    def read(self):
+        """Entries saved in the manifest file (empty if there isn't one yet)."""
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save(self):
+        """Write the manifest via a temporary file (so readers never see it partially written)."""
+        tmp = temporary_path(self.path)
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def update(self, filename, update_entry):
+        """Update filename's entry with update_entry(entry) (entry is None if there isn't one) and
+        save if it changed.
+
+        The manifest is re-read under a lock first, so entries saved by other pipelines or processes
+        since it was read aren't lost.
+        """
+        if update_entry(self.entries.get(filename)) in (None, self.entries.get(filename)):
+            return  # already up to date (or nothing to update) as far as this process knows
+        with FileLock(self.path):
+            self.entries = self.read()
+            entry = update_entry(self.entries.get(filename))
+            if entry is not None and self.entries.get(filename) != entry:
+                self.entries[filename] = entry
+                self.save()
+
+    def lookup(self, filename):
+        """MD5 recorded for filename if the file hasn't changed since, otherwise None."""
+        entry = self.entries.get(filename)
+        if entry is None or not (self.directory / filename).exists():
+            return None
+        signature = stat_signature(self.directory / filename)
+        if any(entry.get(key) != value for key, value in signature.items()):
+            return None
+        return entry["md5"]
+
+    def record(self, filename, md5_checksum):
+        """Record md5_checksum for filename along with the file's current stat signature."""
+        signature = stat_signature(self.directory / filename)
+
+        def update_entry(entry):
+            if entry is not None and "build" in entry:
+                return dict(signature, md5=md5_checksum, build=entry["build"])
+            return dict(signature, md5=md5_checksum)
+
+        self.update(filename, update_entry)
+
+    def checksum(self, filename, verify=False):
+        """MD5 of filename, re-hashing the file only if it has changed since it was last recorded.
+
+        Args:
+            filename (str): Name of file in this directory.
+            verify (bool): Always re-hash the file, even if its stat signature is unchanged.
+
+        Returns: MD5 checksum of the file.
+        """
+        md5_checksum = None if verify else self.lookup(filename)
+        if md5_checksum is None:
+            md5_checksum = calculate_md5_checksum(self.directory / filename)
+            self.record(filename, md5_checksum)
+        return md5_checksum
+
+    def build(self, filename):
+        """What filename was built from, as recorded by record_build (None if not recorded)."""
+        return self.entries.get(filename, {}).get("build")
+
+    def record_build(self, filename, build):
+        """Record what filename was built from, e.g. {"inputs": {filename: MD5}, "code": ...}."""
+        self.update(filename, lambda entry: None if entry is None else dict(entry, build=build))
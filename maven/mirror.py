@@ -0,0 +1,46 @@
+"""
+Local mirrors of upstream sources, for running pipelines without internet access.
+
+A mirror is either a directory or the base URL of a local HTTP server (e.g. `python -m http.server`
+run in a mirror directory). Files are laid out by their upstream URL, so
+`http://researchbriefings.files.parliament.uk/documents/CBP-8647/results.xlsx` is mirrored at
+`<mirror>/researchbriefings.files.parliament.uk/documents/CBP-8647/results.xlsx`.
+
+Pipelines check their mirror (set by `maven.get(..., mirror=...)` or the MAVEN_MIRROR environment
+variable) before going upstream, and mirrored files are validated against the same MD5 checksums as
+upstream ones. Fill a mirror directory on a machine with internet access with `maven.prefetch()`.
+"""
+import os
+from pathlib import Path
+from urllib.parse import urlparse
+
+MIRROR_ENVIRONMENT_VARIABLE = "MAVEN_MIRROR"
+
+
+class Mirror:
+    """Local copy of upstream source files, in a directory or served over HTTP."""
+
+    def __init__(self, location):
+        self.remote = urlparse(str(location)).scheme in ("http", "https")
+        self.location = str(location).rstrip("/") if self.remote else Path(location)
+
+    def __repr__(self):
+        return f"Mirror({str(self.location)!r})"
+
+    @staticmethod
+    def relative_path(url):
+        """Path of upstream url's file within a mirror, e.g. "example.com/data/file.csv"."""
+        parsed = urlparse(url)
+        return f"{parsed.netloc}/{parsed.path.lstrip('/')}"
+
+    def resolve(self, url):
+        """Where upstream url's file would be in this mirror (a pathlib.Path, or a URL)."""
+        if self.remote:
+            return f"{self.location}/{self.relative_path(url)}"
+        return self.location / self.relative_path(url)
+
+
+def default_mirror():
+    """Mirror at the MAVEN_MIRROR environment variable's directory or URL (None if not set)."""
+    location = os.environ.get(MIRROR_ENVIRONMENT_VARIABLE)
+    return Mirror(location) if location else None
@@ -0,0 +1,272 @@
+"""
+Build plans: what `maven.get` would do, without doing it.
+
+`maven.get(name, plan=True)` walks the dataset and everything it depends on the way `maven.get`
+would, checking each source (in raw/) and target (in processed/) with stat calls & checksum
+manifests only, so it never touches the network, hashes a file or processes anything. Each file is
+either:
+    - "hit": cached in its directory, or linked from the artefact store which has a file with the
+      expected checksum;
+    - "stale": cached, but its recorded checksum doesn't match the expected one, or it has changed
+      since its checksum was recorded (it will be used, but re-hashed and/or warned about), or for
+      processed files, it was built from raw files or code that have changed since (it will be
+      processed again);
+    - "miss": will be downloaded, copied from the mirror, taken from an upstream dataset (built
+      first if needed) or produced by processing.
+
+Example usage:
+    > plan = maven.get('general-election/UK/2017/model', data_directory='./data/', plan=True)
+    > print(plan)
+    > plan.is_noop, plan.processed, plan.download_bytes
+"""
+from collections import namedtuple
+from pathlib import Path
+
+from maven import catalogue
+from maven.get import get_pipeline
+from maven.manifest import Manifest
+from maven.mirror import Mirror, default_mirror
+
+PlanItem = namedtuple("PlanItem", ["dataset", "kind", "filename", "status", "action", "bytes"])
+PlanItem.__doc__ = """A source or target file in a build plan.
+
+Attributes:
+    dataset (str): Dataset identifier.
+    kind (str): "source" (raw/) or "target" (processed/).
+    filename (str): Name of the file.
+    status (str): "hit", "stale" or "miss".
+    action (str): What maven.get will do to it, e.g. "download", "copy from mirror", "link from
+                  store", "get general-election/UK/polls", "process", "rehash" (None for cached
+                  files used as they are).
+    bytes (int): Bytes downloaded or copied for this file, if known (None if unknown or nothing is
+                 transferred).
+"""
+
+
+class Plan:
+    """Files maven.get would retrieve & process, in the order it would handle them."""
+
+    def __init__(self):
+        self.items = []
+        self.processed = []  # datasets whose process() will run, in order
+        self.planned = set()  # datasets already planned (maven.get only builds each one once)
+        # checksums of files earlier steps will have added to the artefact store
+        self.stored = set()
+
+    def __repr__(self):
+        return f"Plan({len(self.items)} files, {len(self.processed)} datasets to process)"
+
+    def __str__(self):
+        lines = [
+            f"{'dataset':<36} {'kind':<6} {'status':<6} {'action':<44} {'bytes':>10}  filename"
+        ]
+        for item in self.items:
+            size = "" if item.bytes is None else str(item.bytes)
+            action = item.action or ""
+            lines.append(
+                f"{item.dataset:<36} {item.kind:<6} {item.status:<6} {action:<44} {size:>10}  "
+                f"{item.filename}"
+            )
+        lines.append(
+            f"{len(self.downloads)} downloads ({self.download_bytes} bytes known, "
+            f"{len(self.unknown_downloads)} of unknown size), "
+            f"process: {', '.join(self.processed) or 'nothing'}"
+        )
+        return "\n".join(lines)
+
+    @property
+    def downloads(self):
+        """Items downloaded from their upstream URL (or a mirror served over HTTP)."""
+        return [item for item in self.items if item.action == "download"]
+
+    @property
+    def unknown_downloads(self):
+        """Downloads of unknown size (never retrieved files can't be sized without the network)."""
+        return [item for item in self.downloads if item.bytes is None]
+
+    @property
+    def download_bytes(self):
+        """Total size of downloads of known size."""
+        return sum(item.bytes for item in self.downloads if item.bytes is not None)
+
+    @property
+    def is_noop(self):
+        """True if maven.get would use cached files only, downloading & processing nothing."""
+        return not self.processed and all(item.status == "hit" for item in self.items)
+
+
+def file_status(
+    directory, filename, md5_checksum=None, store=None, caching_enabled=True, stored=()
+):
+    """Whether filename would be taken from cache (see utils.retrieve_from_cache_if_exists), using
+    only stat calls.
+
+    Files with checksums in stored are treated as being in the artefact store (e.g. because an
+    earlier step of the plan downloads them).
+
+    Returns: tuple of (status, action) where status is "hit", "stale" or "miss" and action is "link
+             from store" for files the artefact store has, "rehash" for files changed since their
+             checksum was recorded (or without a recorded checksum), or None.
+    """
+    if not caching_enabled:
+        return "miss", None
+    if (directory / filename).exists():
+        manifest = Manifest(directory)
+        recorded = manifest.lookup(filename)
+        if recorded is None:
+            return "stale", "rehash"
+        if recorded is not None and md5_checksum and recorded != md5_checksum:
+            return "stale", None
+        return "hit", None
+    if store is not None and md5_checksum and (md5_checksum in stored or md5_checksum in store):
+        return "hit", "link from store"
+    return "miss", None
+
+
+def planned_build(pipeline, digests):
+    """What pipeline's targets would be built from (see Pipeline.build_record), using only stat
+    calls.
+
+    Args:
+        pipeline (maven.utils.Pipeline): Pipeline being planned.
+        digests (dict): MD5s that source files in raw/ will have once retrieved, by filename (None
+                        where unknown, e.g. files downloaded without a fixed checksum). Other source
+                        files are looked up in raw/'s Manifest.
+
+    Returns: dict of inputs & code, or None if an input can't be known without hashing or
+             downloading it.
+    """
+    from maven.utils import code_fingerprint
+
+    raw = pipeline.directory / "raw"
+    manifest = Manifest(raw)
+    inputs = {}
+    for filename in pipeline.source_filenames():
+        if filename in digests:
+            digest = digests[filename]
+        elif (raw / filename).exists():
+            digest = manifest.lookup(filename)
+        else:
+            continue
+        if digest is None:
+            return None
+        inputs[filename] = digest
+    return {"inputs": inputs, "code": code_fingerprint(type(pipeline))}
+
+
+def build_plan(
+    name, data_directory=Path("."), retrieve=True, process=True, output_format="csv", mirror=None
+):
+    """Plan what `maven.get` would do for dataset `name`, without any network access or processing.
+
+    Follows `get` through the dataset's sources (getting upstream datasets whose processed files
+    aren't linked into raw/ yet) and targets, checking every file with stat calls only (see
+    file_status). Download sizes are only known for files being re-downloaded (caching
+    disabled) or copied from a mirror directory.
+
+    Args:
+        name, data_directory, retrieve, process, output_format, mirror: See `maven.get`.
+
+    Returns: Plan
+    """
+    if mirror is None:
+        mirror = default_mirror()
+    if mirror is not None and not isinstance(mirror, Mirror):
+        mirror = Mirror(mirror)
+    plan = Plan()
+    _plan_dataset(plan, name, data_directory, retrieve, process, output_format, mirror)
+    return plan
+
+
+def _plan_dataset(plan, name, data_directory, retrieve, process, output_format, mirror):
+    """Add the files `get` would handle for dataset `name` (and its upstream datasets) to plan."""
+    if name in plan.planned:
+        return  # built (or cached) by the time get() reaches it again
+    plan.planned.add(name)
+    pipeline = get_pipeline(name, data_directory=data_directory)
+    pipeline.output_format = output_format
+
+    digests = {}  # MD5s source files will have once retrieved (None if unknown)
+    if retrieve:
+        raw = pipeline.directory / "raw"
+        for url, filename, md5_checksum in (
+            pipeline.sources if pipeline.retrieve_all else pipeline.sources[:1]
+        ):
+            if not catalogue.is_url(url):
+                filename, md5_checksum = pipeline.format_target(filename, md5_checksum)
+            status, action = file_status(
+                raw, filename, md5_checksum, pipeline.store, pipeline.cache, plan.stored
+            )
+            upstream = pipeline.data_directory / url / "processed"
+            if (
+                status == "hit"
+                and action is None
+                and not catalogue.is_url(url)
+                and (upstream / filename).exists()
+            ):
+                # Linked again if the upstream dataset's processed file has changed since (see
+                # upstream_changed)
+                linked = Manifest(raw).lookup(filename)
+                if linked is None or linked != Manifest(upstream).lookup(filename):
+                    status = "stale"
+                    action = f"get {url}"
+                    _plan_dataset(plan, url, data_directory, True, True, output_format, mirror)
+            size = None
+            if status == "miss" and action is None:
+                if not catalogue.is_url(url):
+                    action = f"get {url}"
+                    _plan_dataset(plan, url, data_directory, True, True, output_format, mirror)
+                else:
+                    action = "download"
+                    mirrored = (
+                        mirror.resolve(url if pipeline.rename_source else url + filename)
+                        if mirror
+                        else None
+                    )
+                    if mirrored is not None and not mirror.remote and mirrored.is_file():
+                        action, size = "copy from mirror", mirrored.stat().st_size
+                    elif (raw / filename).exists():
+                        # caching disabled: re-downloaded, probably at the same size
+                        size = (raw / filename).stat().st_size
+            plan.items.append(PlanItem(name, "source", filename, status, action, size))
+            if action == "rehash":
+                digests[filename] = None  # changed since it was hashed
+            elif not catalogue.is_url(url) and action == f"get {url}":
+                # Linked from upstream: known unless the upstream dataset is processed first
+                digests[filename] = (
+                    None if url in plan.processed else Manifest(upstream).lookup(filename)
+                )
+            elif action is not None:  # retrieved, so only its expected checksum is known
+                digests[filename] = md5_checksum
+            if md5_checksum:
+                plan.stored.add(md5_checksum)
+
+    if process:
+        processed = pipeline.directory / "processed"
+        build = planned_build(pipeline, digests)
+        manifest = Manifest(processed)
+        statuses = []
+        for filename, md5_checksum in pipeline.list_targets():
+            filename, md5_checksum = pipeline.format_target(filename, md5_checksum)
+            # Processed files are reused whenever their build matches, even with caching disabled
+            status, action = file_status(
+                processed, filename, md5_checksum, pipeline.store, True, plan.stored
+            )
+            outdated = build is None or manifest.build(filename) != build
+            if (processed / filename).exists() and outdated:
+                # built from raw files or code that have changed since
+                status, action = "stale", "process"
+            statuses.append((filename, status, action))
+            if md5_checksum:
+                plan.stored.add(md5_checksum)
+        runs = not pipeline.cache_targets or any(
+            action == "process" or (status == "miss" and action is None)
+            for _, status, action in statuses
+        )
+        for filename, status, action in statuses:
+            # Processing exports every target, including any that were cached
+            plan.items.append(
+                PlanItem(name, "target", filename, status, "process" if runs else action, None)
+            )
+        if runs:
+            plan.processed.append(name)
@@ -0,0 +1,127 @@
+"""
+Content-addressable artefact store shared by every pipeline in a data directory.
+
+Files are stored once under their MD5 checksum (`<data_directory>/.store/ab/abcdef...`) and each
+pipeline's `raw/` and `processed/` entries are hardlinks to the stored object. This means:
+    - datasets used by several pipelines (e.g. `general_election-uk-2015-results.csv`, used by the
+      2015 results and the 2015/2017 models) take up disk space once;
+    - "do we already have a file with this checksum?" is a single stat call;
+    - sources shared between pipelines (e.g. the House of Commons results workbook) are only
+      downloaded once.
+
+Stored objects must never be written to in place: files that may be linked into the store are only
+ever replaced (write to a temporary file, then rename over the original) so other links keep the old
+content.
+
+Hardlinks need the store and the pipeline directories to be on the same filesystem; where they
+aren't (or the filesystem doesn't support hardlinks) files are copied instead. Objects with copies
+are marked (`.<md5>.copied`) and never pruned, since there's no link count to tell whether the
+copies are still used.
+"""
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from maven.lock import FileLock
+
+# marker next to stored objects placed in (or taken from) the store by copying
+COPIED_SUFFIX = ".copied"
+
+
+def temporary_path(path):
+    """Unique hidden path next to path (so it can be renamed over path atomically)."""
+    path = Path(path)
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+
+
+def link_file(src, dst):
+    """Make dst a hardlink to src (falling back to a copy), replacing any existing dst without
+    modifying it.
+
+    Returns: True if dst is a hardlink, False if it's a copy.
+    """
+    tmp = temporary_path(dst)
+    try:
+        os.link(src, tmp)
+        linked = True
+    except OSError:
+        shutil.copyfile(src, tmp)
+        linked = False
+    os.replace(tmp, dst)
+    return linked
+
+
+class ArtefactStore:
+    """Content-addressable store of files keyed by MD5 checksum."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def path(self, md5_checksum):
+        """Location of the stored object for md5_checksum."""
+        return self.root / md5_checksum[:2] / md5_checksum
+
+    def __contains__(self, md5_checksum):
+        return self.path(md5_checksum).exists()
+
+    def add(self, path, md5_checksum):
+        """Add the file at path to the store.
+
+        If an object with this checksum is already stored, path is replaced by a link to it
+        (deduplicating the file), otherwise path itself becomes the stored object.
+
+        Args:
+            path (pathlib.PosixPath): File to add.
+            md5_checksum (str): MD5 checksum of the file's contents.
+        """
+        obj = self.path(md5_checksum)
+        os.makedirs(obj.parent, exist_ok=True)
+        with self.lock(md5_checksum):
+            if obj.exists():
+                if not os.path.samefile(obj, path):
+                    self._link(obj, path, md5_checksum)
+                return
+            try:
+                os.link(path, obj)
+            except FileExistsError:  # another pipeline stored the same file concurrently
+                self._link(obj, path, md5_checksum)
+            except OSError:  # hardlinks not supported (e.g. different filesystem), store a copy
+                self._link(path, obj, md5_checksum)
+
+    def lock(self, md5_checksum):
+        """FileLock on the stored object for md5_checksum (e.g. held while retrieving it)."""
+        return FileLock(self.path(md5_checksum))
+
+    def link(self, md5_checksum, dst):
+        """Place the stored object for md5_checksum at dst."""
+        with self.lock(md5_checksum):
+            self._link(self.path(md5_checksum), dst, md5_checksum)
+
+    def copied(self, md5_checksum):
+        """Marker recording that the stored object for md5_checksum has copies outside the store."""
+        obj = self.path(md5_checksum)
+        return obj.with_name(f".{obj.name}{COPIED_SUFFIX}")
+
+    def _link(self, src, dst, md5_checksum):
+        """link_file(src, dst) between a stored object and a pipeline's file, marking copies."""
+        if not link_file(src, dst):
+            self.copied(md5_checksum).touch()
+
+    def prune(self):
+        """Delete stored objects no longer linked from any pipeline directory.
+
+        Each object is locked while it's checked, so it can't be linked into a pipeline directory as
+        it's deleted. Objects with copies outside the store (see self.copied) are kept.
+
+        Returns: number of objects deleted.
+        """
+        deleted = 0
+        for obj in self.root.glob("*/*"):
+            if obj.name.startswith("."):  # lock files & copy markers
+                continue
+            with self.lock(obj.name):
+                if obj.exists() and obj.stat().st_nlink == 1 and not self.copied(obj.name).exists():
+                    os.remove(obj)
+                    deleted += 1
+        return deleted
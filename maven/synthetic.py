@@ -0,0 +1,445 @@
+"""
+Synthetic raw data shaped like each pipeline's sources, at any size, for load testing without
+network access.
+
+Usage:
+    > from pathlib import Path
+    > from maven import synthetic
+    > from maven.get import get_pipeline
+    > synthetic.write_raw_data(
+    >     Path("./synthetic/"), n_seats=6500, n_polls=10000, n_locations=5000, n_dates=1000
+    > )
+    > pipeline = get_pipeline("coronavirus/CSSE", data_directory="./synthetic/")
+    > pipeline.process()
+
+Generated results can be processed by `UKResults.process_hoc_sheet` and model pipelines, as long as
+the model's `results_seat_count` is set to the synthetic seat counts (`seat_count()`) when n_seats
+isn't 650.
+
+Writing the House of Commons Library & PollBase workbooks requires openpyxl (`pip install
+maven[benchmarks]`).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from maven.datasets.coronavirus.csse import CSSE
+from maven.datasets.general_election.base import UKModel, UKResults
+
+HOC_WORKBOOK = "1918-2017election_results_by_pcon.xlsx"
+HOC_PARTIES = [
+    "Con",
+    "LD",
+    "Lab",
+    "UKIP",
+    "Grn",
+    "SNP",
+    "PC",
+    "DUP",
+    "SF",
+    "SDLP",
+    "UUP",
+    "APNI",
+    "Other",
+]
+EXCEL_MAX_ROWS = 1048576
+
+# Constituencies per region (at 650 seats), with the country & ONS code prefix of each region.
+REGIONS = [
+    ("North East", "England", "E14", 29),
+    ("North West", "England", "E14", 75),
+    ("Yorkshire and The Humber", "England", "E14", 54),
+    ("East Midlands", "England", "E14", 46),
+    ("West Midlands", "England", "E14", 59),
+    ("Eastern", "England", "E14", 58),
+    ("London", "England", "E14", 73),
+    ("South East", "England", "E14", 84),
+    ("South West", "England", "E14", 55),
+    ("Wales", "Wales", "W07", 40),
+    ("Scotland", "Scotland", "S14", 59),
+    ("Northern Ireland", "Northern Ireland", "N06", 18),
+]
+
+# Parties standing in each country, and parties that only stand in one country.
+GB_PARTIES = ["Con", "LD", "Lab", "UKIP", "Grn", "Other"]
+COUNTRY_PARTIES = {
+    "England": GB_PARTIES,
+    "Wales": GB_PARTIES + ["PC"],
+    "Scotland": GB_PARTIES + ["SNP"],
+    "Northern Ireland": ["DUP", "SF", "SDLP", "UUP", "APNI", "Other"],
+}
+PARTY_COUNTRY = {
+    "SNP": "Scotland",
+    "PC": "Wales",
+    "DUP": "Northern Ireland",
+    "SF": "Northern Ireland",
+    "SDLP": "Northern Ireland",
+    "UUP": "Northern Ireland",
+    "APNI": "Northern Ireland",
+}
+
+# Parties polled in each geo's polls (general_election-<geo>-polls.csv), with columns named as in
+# the raw files.
+GEO_POLL_PARTIES = {
+    "uk": ["con", "lab", "ld", "ukip", "grn", "chuk", "bxp", "snp"],
+    "scotland": ["con", "lab", "ld", "snp", "grn"],
+    "wales": ["con", "lab", "ld", "pc", "grn"],
+    "ni": ["dup", "Ulster Unionist Party", "Sinn Fein", "sdlp", "Alliance", "grn", "con"],
+    "london": ["con", "lab", "ld", "grn"],
+}
+COMPANIES = [
+    "YouGov",
+    "ICM",
+    "Survation",
+    "ComRes",
+    "Opinium",
+    "Ipsos MORI",
+    "Kantar",
+    "BMG",
+    "Panelbase",
+]
+CLIENTS = [
+    "The Times",
+    "Sunday Times",
+    "Guardian",
+    "Observer",
+    "Daily Mail",
+    "Evening Standard",
+    "ITV",
+]
+
+
+def scale_counts(counts, total):
+    """Scale integer counts to sum to total (by largest remainder), keeping every count >= 1."""
+    counts = np.asarray(counts)
+    scaled = counts * total / counts.sum()
+    result = np.floor(scaled).astype(int)
+    result[np.argsort(result - scaled, kind="stable")[: total - result.sum()]] += 1
+    for i in np.flatnonzero(result == 0):
+        result[i] = 1
+        result[result.argmax()] -= 1
+    return result
+
+
+def constituencies(n_seats=650):
+    """One row per constituency (ons_id, constituency, county, region & country) for n_seats."""
+    if n_seats < len(REGIONS):
+        raise ValueError(f"n_seats must be at least {len(REGIONS)} (one per region).")
+    seats = pd.DataFrame(
+        [
+            region
+            for region, n in zip(REGIONS, scale_counts([n for *_, n in REGIONS], n_seats))
+            for _ in range(n)
+        ],
+        columns=["region", "country", "prefix", "n"],
+    )
+    number = seats.groupby("prefix").cumcount() + 1
+    return pd.DataFrame(
+        {
+            "ons_id": seats.prefix + number.map("{:06d}".format),
+            "constituency": seats.region
+            + " "
+            + (seats.groupby("region").cumcount() + 1).astype(str),
+            "county": seats.region,
+            "region": seats.region,
+            "country": seats.country,
+        }
+    )
+
+
+def allocate_winners(seats, counts, rng):
+    """Winning party (as named in the workbook) for each seat, matching counts ({party: seats won}
+    at 650 seats).
+
+    Parties standing in one country win seats there, one "other" seat goes to Northern Ireland (an
+    independent) and remaining seats are shared out at random across Great Britain.
+    """
+    hoc_names = {party.lower(): party for party in HOC_PARTIES}
+    winners = pd.Series(None, index=seats.index, dtype=object)
+    counts = {hoc_names[party]: n for party, n in counts.items()}
+    if counts.get("Other"):
+        counts["Other"] -= 1
+        counts["NI Other"] = 1
+    for party, n in sorted(
+        counts.items(), key=lambda item: item[0] not in PARTY_COUNTRY and item[0] != "NI Other"
+    ):
+        country = "Northern Ireland" if party == "NI Other" else PARTY_COUNTRY.get(party)
+        free = winners.isnull() & (
+            seats.country == country if country else seats.country != "Northern Ireland"
+        )
+        free_seats = seats.index[free]
+        if country is None:
+            free_seats = rng.permutation(free_seats)
+        winners[free_seats[:n]] = "Other" if party == "NI Other" else party
+    return winners
+
+
+def winners(year, n_seats=650, seed=0):
+    """Winning party (as named in the workbook) in each synthetic constituency for year.
+
+    At 650 seats the number of seats won by each party matches the real results
+    (UKModel.results_seat_count), so synthetic results pass the same checks as real results. At
+    other sizes each region's seats take the winners of the region's seats at 650, stretched to fit.
+    """
+    rng = np.random.RandomState(seed + int(year))
+    base_seats = constituencies()
+    base_winners = allocate_winners(base_seats, UKModel.results_seat_count[int(year)], rng)
+    seats = constituencies(n_seats)
+    result = pd.Series(None, index=seats.index, dtype=object)
+    for region in base_seats.region.unique():
+        base = base_winners[base_seats.region == region].to_numpy()
+        in_region = (seats.region == region).to_numpy()
+        result[in_region] = base[np.arange(in_region.sum()) * len(base) // in_region.sum()]
+
+    # Seats whose reported winner differs from the votes (UKModel.winner_fixes) are given that
+    # party's votes
+    for ons_id, party in UKModel.winner_fixes.get(int(year), []):
+        seat = seats.index[seats.ons_id == ons_id]
+        if len(seat):
+            party = {p.lower(): p for p in HOC_PARTIES}[party]
+            swap = result.index[(result == party) & (seats.country == seats.country[seat[0]])]
+            if len(swap):
+                result[swap[0]] = result[seat[0]]
+            result[seat[0]] = party
+    return result
+
+
+def seat_count(year, n_seats=650, seed=0):
+    """Seats won by each party in year's synthetic results (keyed as UKModel.results_seat_count)."""
+    return {
+        party.lower(): n
+        for party, n in winners(year, n_seats=n_seats, seed=seed).value_counts().items()
+    }
+
+
+def hoc_sheet(year, n_seats=650, seed=0):
+    """Raw sheet of the House of Commons Library results workbook for year (as pd.read_excel)."""
+    rng = np.random.RandomState(seed + int(year))
+    seats = constituencies(n_seats)
+    seat_winners = winners(year, n_seats=n_seats, seed=seed)
+
+    # Total votes are powers of 2 and turnouts short decimals so voteshares & turnouts survive being
+    # written to the workbook exactly (the sheet is checked for votes / total votes == voteshare)
+    total_votes = rng.choice([2 ** 15, 2 ** 16], size=n_seats).astype(float)
+    electorate = total_votes / rng.choice([0.5, 0.64, 0.8], size=n_seats)
+    votes = pd.DataFrame(np.nan, index=seats.index, columns=HOC_PARTIES)
+    for country, parties in COUNTRY_PARTIES.items():
+        in_country = (seats.country == country).to_numpy()
+        totals = total_votes[in_country]
+        counts = np.floor(
+            rng.dirichlet(np.ones(len(parties)), size=in_country.sum()) * totals[:, None]
+        )
+        # Give the winner the most votes (including any left over from rounding down)
+        rows = np.arange(len(counts))
+        top = counts.argmax(axis=1)
+        counts[rows, top] += totals - counts.sum(axis=1)
+        own = np.array([parties.index(winner) for winner in seat_winners[in_country]])
+        counts[rows, top], counts[rows, own] = counts[rows, own], counts[rows, top].copy()
+        votes.loc[in_country, parties] = counts
+
+    sheet = pd.DataFrame(
+        {
+            0: np.nan,
+            1: seats.ons_id,
+            2: seats.constituency,
+            3: seats.county,
+            4: seats.region,
+            5: seats.country,
+            6: electorate,
+            7: np.nan,
+        }
+    )
+    for i, party in enumerate(HOC_PARTIES):
+        sheet[8 + 3 * i] = votes[party]
+        sheet[9 + 3 * i] = votes[party] / total_votes
+        sheet[10 + 3 * i] = np.nan
+    sheet[47] = total_votes
+    sheet[48] = total_votes / electorate
+    return sheet
+
+
+def write_hoc_workbook(path, n_seats=650, years=UKResults.hoc_sheets, seed=0):
+    """House of Commons Library results workbook (with 4 header & 19 footer rows per sheet)."""
+    if n_seats + 23 > EXCEL_MAX_ROWS:
+        raise ValueError(f"A workbook sheet holds at most {EXCEL_MAX_ROWS - 23} seats.")
+    os.makedirs(path.parent, exist_ok=True)
+    with pd.ExcelWriter(path) as writer:
+        for year in years:
+            sheet = hoc_sheet(year, n_seats=n_seats, seed=seed)
+            header = pd.DataFrame(
+                [[f"{year} General Election results"] + [None] * 48] + [[None] * 49] * 3
+            )
+            footer = pd.DataFrame([[f"Note {i + 1}"] + [None] * 48 for i in range(19)])
+            pd.concat([header, sheet, footer], axis=0).to_excel(
+                writer, sheet_name=year, header=False, index=False
+            )
+
+
+def write_results(path, year, n_seats=650, seed=0):
+    """Processed results (e.g. general_election-uk-2017-results.csv) for year."""
+    os.makedirs(path.parent, exist_ok=True)
+    UKResults.clean_hoc_sheet(hoc_sheet(year, n_seats=n_seats, seed=seed)).to_csv(path, index=False)
+
+
+def polls(parties, start, end, n_polls, rng):
+    """n_polls polls with fieldwork ending between start & end, with voteshares (0-1)."""
+    seconds = rng.randint(
+        pd.Timestamp(start).value // 10 ** 9, pd.Timestamp(end).value // 10 ** 9, size=n_polls
+    )
+    to = pd.to_datetime(seconds, unit="s").normalize()
+    shares = rng.dirichlet(np.arange(len(parties), 0, -1) + 1.0, size=n_polls).round(2)
+    df = pd.DataFrame(
+        {
+            "company": rng.choice(COMPANIES, n_polls),
+            "client": rng.choice(CLIENTS, n_polls),
+            "method": rng.choice(["Online", "Phone", "MRP"], n_polls, p=[0.6, 0.35, 0.05]),
+            "from": to - pd.to_timedelta(rng.randint(1, 5, n_polls), unit="D"),
+            "to": to,
+            "sample_size": rng.randint(500, 3000, n_polls).astype(float),
+        }
+    )
+    for i, party in enumerate(parties):
+        df[party] = shares[:, i]
+    return df.sort_values("to").reset_index(drop=True)
+
+
+def write_sixfifty_polls(path, n_polls=3000, seed=0):
+    """SixFifty polls.csv (May 2005 - June 2017)."""
+    rng = np.random.RandomState(seed)
+    df = polls(
+        ["con", "lab", "ld", "ukip", "grn", "snp", "pdf"], "2005-05-06", "2017-06-08", n_polls, rng
+    )
+    os.makedirs(path.parent, exist_ok=True)
+    df.to_csv(path, index=False)
+
+
+def write_pollbase(path, n_polls=600, seed=0):
+    """Mark Pack's PollBase workbook, with the "17-19" sheet read by UKPolls (June 2017 - December
+    2019).
+
+    Polls are listed under the month fieldwork started, with fieldwork given as days of that month
+    (e.g. "30-2" for fieldwork running into the next month) and voteshares as percentages. Year &
+    month are only given on the first poll of each.
+    """
+    if n_polls + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(f"A workbook sheet holds at most {EXCEL_MAX_ROWS - 1} polls.")
+    rng = np.random.RandomState(seed)
+    parties = ["con", "lab", "ld", "ukip", "grn", "chuk", "bxp"]
+    df = polls(parties, "2017-06-09", "2019-12-12", n_polls, rng).sort_values(
+        "from", kind="mergesort"
+    )
+    sheet = pd.DataFrame(index=df.index, columns=range(25), dtype=object)
+    first_of_year = df["from"].dt.year != df["from"].dt.year.shift()
+    first_of_month = first_of_year | (df["from"].dt.month != df["from"].dt.month.shift())
+    sheet[0] = df["from"].dt.year.where(first_of_year)
+    sheet[1] = df["from"].dt.strftime("%b").where(first_of_month)
+    sheet[2] = df["from"].dt.day.astype(str) + "-" + df["to"].dt.day.astype(str)
+    sheet[6] = df.company
+    sheet[7] = df.client
+    for col, party in zip([8, 10, 12, 14, 16, 18, 20], parties):
+        sheet[col] = (df[party] * 100).round()
+    sheet.loc[rng.rand(len(df)) < 0.3, 18] = " "  # parties not polled
+    sheet[24] = df.method
+    sheet.columns = ["Year", "Month", "Fieldwork", "", "", "", "Polling", "Publisher"] + [
+        "Con",
+        "",
+        "Lab",
+        "",
+        "LD",
+        "",
+        "UKIP",
+        "",
+        "Green",
+        "",
+        "TIG/CUK",
+        "",
+        "BXP",
+        "",
+        "",
+        "",
+        "",
+    ]
+    os.makedirs(path.parent, exist_ok=True)
+    sheet.to_excel(path, sheet_name="17-19", index=False)
+
+
+def write_geo_polls(directory, election_date, n_polls=200, seed=0):
+    """general_election-<geo>-polls.csv of n_polls polls for each UKModel.geos, over 60 days."""
+    rng = np.random.RandomState(seed)
+    start = pd.Timestamp(election_date) - pd.Timedelta(days=60)
+    os.makedirs(directory, exist_ok=True)
+    for geo in UKModel.geos:
+        df = polls(GEO_POLL_PARTIES[geo], start, election_date, n_polls, rng)
+        df.to_csv(directory / f"general_election-{geo}-polls.csv", index=False)
+
+
+def csse_time_series(n_locations=250, n_dates=60, seed=0):
+    """CSSE wide time series (one column per date) for each metric, with a third of countries split
+    into provinces.
+
+    Returns: dict of pd.DataFrame by metric (as read from time_series_19-covid-<metric>.csv).
+    """
+    rng = np.random.RandomState(seed)
+    dates = [f"{d.month}/{d.day}/{d:%y}" for d in pd.date_range("2020-01-22", periods=n_dates)]
+    locations = pd.DataFrame(
+        {
+            "Province/State": [None if i % 3 == 0 else f"Province {i}" for i in range(n_locations)],
+            "Country/Region": [f"Country {i % (n_locations // 3 + 1)}" for i in range(n_locations)],
+            "Lat": rng.uniform(-90, 90, n_locations).round(4),
+            "Long": rng.uniform(-180, 180, n_locations).round(4),
+        }
+    )
+    return {
+        metric: pd.concat(
+            [
+                locations,
+                pd.DataFrame(
+                    rng.randint(0, 100, (n_locations, n_dates)).cumsum(axis=1), columns=dates
+                ),
+            ],
+            axis=1,
+        )
+        for metric in CSSE.metrics
+    }
+
+
+def write_csse(directory, n_locations=250, n_dates=60, seed=0):
+    """CSSE time_series_19-covid-<metric>.csv wide files."""
+    os.makedirs(directory, exist_ok=True)
+    for metric, df in csse_time_series(n_locations=n_locations, n_dates=n_dates, seed=seed).items():
+        df.to_csv(directory / f"time_series_19-covid-{metric}.csv", index=False)
+
+
+def write_raw_data(
+    data_directory, n_seats=650, n_polls=600, n_geo_polls=200, n_locations=250, n_dates=60, seed=0
+):
+    """Raw files for the UK 2017 results, UK polls, UK 2017 model & CSSE pipelines, laid out as
+    maven.get would.
+
+    Args:
+        data_directory (pathlib.PosixPath): Directory to write datasets into.
+        n_seats (int): Number of constituencies in the results workbook & model results.
+        n_polls (int): Number of PollBase polls (SixFifty polls.csv has five times as many).
+        n_geo_polls (int): Number of polls per geo in the model's polls.
+        n_locations (int): Number of CSSE locations (countries/provinces).
+        n_dates (int): Number of CSSE dates.
+        seed (int): Random seed.
+    """
+    write_hoc_workbook(
+        data_directory / "general-election/UK/2017/results/raw" / HOC_WORKBOOK,
+        n_seats=n_seats,
+        seed=seed,
+    )
+    polls_raw = data_directory / "general-election/UK/polls/raw"
+    write_pollbase(polls_raw / "PollBase-Q4-2019.xlsx", n_polls=n_polls, seed=seed)
+    write_sixfifty_polls(polls_raw / "polls.csv", n_polls=5 * n_polls, seed=seed)
+    model_raw = data_directory / "general-election/UK/2017/model/raw"
+    for year in ["2015", "2017"]:
+        write_results(
+            model_raw / f"general_election-uk-{year}-results.csv", year, n_seats=n_seats, seed=seed
+        )
+    write_geo_polls(model_raw, "2017-06-08", n_polls=n_geo_polls, seed=seed)
+    write_csse(
+        data_directory / "coronavirus/CSSE/raw", n_locations=n_locations, n_dates=n_dates, seed=seed
+    )
@@ -2,17 +2,49 @@
 Various helper functions.
 """
 import hashlib
+import json
 import os
 import shutil
+import sys
+import threading
 import warnings
-from functools import partial
+from functools import lru_cache, partial
 from pathlib import Path
-from urllib.parse import urlparse
 
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 
 import maven
+from maven.catalogue import get_dataset, is_url
+from maven.instrumentation import NULL_INSTRUMENTATION
+from maven.lock import FileLock
+from maven.manifest import CHUNK_SIZE, Manifest, calculate_md5_checksum  # noqa: F401 (re-exported)
+from maven.mirror import Mirror
+from maven.store import link_file, temporary_path
+
+POOL_MAXSIZE = 16  # connections kept open per host by the shared HTTP session
+# sidecar file next to each download holding ETag/Last-Modified
+VALIDATORS_SUFFIX = ".validators.json"
+# processed file formats
+OUTPUT_FORMATS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+CATEGORICAL_COLUMNS = ["party", "region", "geo", "country", "country_region", "province_state"]
+INTEGER_COLUMNS = [
+    "votes",
+    "total_votes",
+    "electorate",
+    "votes_last",
+    "votes_now",
+    "total_votes_last",
+    "total_votes_now",
+    "confirmed",
+    "deaths",
+    "recovered",
+]
+
+_session = None
+_session_lock = threading.Lock()
 
 #########
 # GENERAL
@@ -31,79 +63,492 @@ def sanitise(x, replace=None):
         raise TypeError(f"Unexpected type encountered in sanitise: type(x) == '{type(x)}'")
 
 
-def calculate_md5_checksum(filename):
+def get_session():
+    """Return the shared requests.Session used for all downloads.
+
+    The session keeps a pool of connections open per host, so fetching several files from the same
+    host (e.g. the SixFifty S3 bucket) reuses connections instead of opening a new one for every
+    file.
     """
-    Calculate the checksum of the file, exactly same as md5-sum linux util.
-    Code from https://github.com/RaRe-Technologies/gensim/blob/develop/gensim/downloader.py
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_MAXSIZE, pool_maxsize=POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+
+def read_validators(path):
+    """Read the HTTP validators saved next to a downloaded file, if they are still valid for that
+    file.
+
+    Returns: dict with keys url, etag, last_modified, size, mtime_ns & checksums, or an empty dict
+             if there are no validators or the file has been changed since it was downloaded.
     """
-    hash_md5 = hashlib.md5()
-    with open(filename, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+    validators_path = Path(str(path) + VALIDATORS_SUFFIX)
+    if not (path.exists() and validators_path.exists()):
+        return {}
+    with open(validators_path) as f:
+        validators = json.load(f)
+    stat = path.stat()
+    if (validators.get("size"), validators.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+        return {}
+    return validators
 
 
-def is_url(url):
-    """Source: https://stackoverflow.com/a/52455972"""
-    try:
-        result = urlparse(url)
-        return all([result.scheme, result.netloc])
-    except ValueError:
-        return False
+def write_validators(path, url, headers, checksums):
+    """Save a downloaded file's ETag/Last-Modified response headers and checksums next to it."""
+    stat = path.stat()
+    validators = {
+        "url": url,
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "checksums": checksums,
+    }
+    validators_path = Path(str(path) + VALIDATORS_SUFFIX)
+    tmp = temporary_path(validators_path)
+    with open(tmp, "w") as f:
+        json.dump(validators, f, indent=2)
+    os.replace(tmp, validators_path)
 
 
-def fetch_url(url, filename, target_dir, rename_file=False):
-    """Download filename from url into target_dir."""
+def fetch_url(
+    url,
+    filename,
+    target_dir,
+    rename_file=False,
+    algorithms=("md5",),
+    instrumentation=NULL_INSTRUMENTATION,
+):
+    """Download filename from url into target_dir.
+
+    The response is streamed to disk in chunks of CHUNK_SIZE bytes, with checksums updated as the
+    bytes arrive so memory use is bounded and the file never needs to be read back in to be
+    validated.
+
+    If the file was previously downloaded from the same url, a conditional GET
+    (If-None-Match/If-Modified-Since) is sent and a 304 Not Modified response leaves the file
+    untouched and returns its saved checksums.
+
+    Args:
+        url (str): URL to download from (filename is appended unless rename_file is True).
+        filename (str): Name of file to save into target_dir.
+        target_dir (pathlib.PosixPath): Directory to save the file into.
+        rename_file (bool): If True, url is the full URL of the file and it is saved as filename.
+        algorithms (tuple of str): Names of hashlib algorithms to calculate digests for.
+        instrumentation (maven.instrumentation.Instrumentation): Receives a "download" event.
+
+    Returns: dict of hex digests for the downloaded file keyed by algorithm name, e.g. {"md5":
+             "..."}.
+    """
     if rename_file:
         url_to_retrieve = url
     else:
         url_to_retrieve = url + filename
-    response = requests.get(url_to_retrieve)
-    if response.status_code != 200:
-        warnings.warn(
-            f"Received status {response.status_code} when trying to retrieve {url}{filename}"
-        )
-    # Save to file
-    with open(target_dir / filename, "wb") as f:
-        f.write(response.content)
+    path = target_dir / filename
+
+    # Revalidate rather than re-download if we have validators for this exact file & url
+    headers = {}
+    validators = read_validators(path)
+    if validators.get("url") == url_to_retrieve and set(algorithms) <= set(validators["checksums"]):
+        if validators["etag"]:
+            headers["If-None-Match"] = validators["etag"]
+        if validators["last_modified"]:
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    hashes = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+    with instrumentation.stage(
+        "download", url=url_to_retrieve, filename=filename, bytes=0
+    ) as download:
+        response = get_session().get(url_to_retrieve, headers=headers, stream=True)
+        download["status"] = response.status_code
+        try:
+            if headers and response.status_code == 304:
+                print(f"{filename} in {target_dir.resolve()} is up to date with {url_to_retrieve}")
+                return {algorithm: validators["checksums"][algorithm] for algorithm in algorithms}
+            if response.status_code != 200:
+                warnings.warn(
+                    f"Received status {response.status_code} "
+                    f"when trying to retrieve {url}{filename}"
+                )
+            # Save to a temporary file then move it into place (path may be linked from the artefact
+            # store)
+            tmp = temporary_path(path)
+            with open(tmp, "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    download["bytes"] += len(chunk)
+                    for hash_ in hashes.values():
+                        hash_.update(chunk)
+            os.replace(tmp, path)
+        finally:
+            response.close()
+    checksums = {algorithm: hash_.hexdigest() for algorithm, hash_ in hashes.items()}
+    if response.status_code == 200:
+        write_validators(path, url=url_to_retrieve, headers=response.headers, checksums=checksums)
     print(f"Successfully downloaded {filename} into {target_dir.resolve()}")
-    return target_dir / filename
+    return checksums
+
+
+def copy_file(src, filename, target_dir, algorithms=("md5",)):
+    """Copy the file src to target_dir / filename, calculating checksums as it is copied (see
+    fetch_url).
+
+    Returns: dict of hex digests for the copied file keyed by algorithm name, e.g. {"md5": "..."}.
+    """
+    hashes = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+    path = target_dir / filename
+    tmp = temporary_path(path)  # path may be linked from the artefact store
+    with open(src, "rb") as f_src, open(tmp, "wb") as f_dst:
+        for chunk in iter(lambda: f_src.read(CHUNK_SIZE), b""):
+            f_dst.write(chunk)
+            for hash_ in hashes.values():
+                hash_.update(chunk)
+    os.replace(tmp, path)
+    return {algorithm: hash_.hexdigest() for algorithm, hash_ in hashes.items()}
+
+
+def fetch_source(
+    url,
+    filename,
+    target_dir,
+    rename_file=False,
+    mirror=None,
+    algorithms=("md5",),
+    instrumentation=NULL_INSTRUMENTATION,
+):
+    """Retrieve filename from mirror if it has a copy of the file at url, otherwise download it with
+    fetch_url.
+
+    Args:
+        url, filename, target_dir, rename_file, algorithms: See fetch_url.
+        mirror (maven.mirror.Mirror or str): Mirror directory or URL to check first.
+        instrumentation (maven.instrumentation.Instrumentation): Receives "mirror_hit"/"mirror_miss"
+                                                                 & "download" events.
+
+    Returns: dict of hex digests for the retrieved file keyed by algorithm name, e.g. {"md5":
+             "..."}.
+    """
+    if mirror is not None:
+        if not isinstance(mirror, Mirror):
+            mirror = Mirror(mirror)
+        source_url = url if rename_file else url + filename
+        mirrored = mirror.resolve(source_url)
+        if mirror.remote:
+            response = get_session().head(mirrored)
+            response.close()
+            found = response.status_code == 200
+        else:
+            found = mirrored.is_file()
+        if found:
+            print(f"Retrieving {filename} from mirror {mirrored}")
+            instrumentation.emit(
+                "mirror_hit", url=source_url, mirror=str(mirrored), filename=filename
+            )
+            if mirror.remote:
+                return fetch_url(
+                    mirrored,
+                    filename,
+                    target_dir,
+                    rename_file=True,
+                    algorithms=algorithms,
+                    instrumentation=instrumentation,
+                )
+            return copy_file(mirrored, filename, target_dir, algorithms=algorithms)
+        instrumentation.emit("mirror_miss", url=source_url, mirror=str(mirrored), filename=filename)
+    return fetch_url(
+        url,
+        filename,
+        target_dir,
+        rename_file=rename_file,
+        algorithms=algorithms,
+        instrumentation=instrumentation,
+    )
+
+
+def output_filename(filename, output_format="csv"):
+    """Name of the processed file filename (e.g. "results.csv") when exported as output_format."""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unknown output format '{output_format}', expected one of {list(OUTPUT_FORMATS)}"
+        )
+    return str(Path(filename).with_suffix(OUTPUT_FORMATS[output_format]))
+
+
+def columnar_types(df):
+    """Convert columns to compact types for columnar formats.
+
+    Columns in CATEGORICAL_COLUMNS become categoricals and columns in INTEGER_COLUMNS holding whole
+    numbers become (nullable) integers, where CSV would have stored them as strings and floats.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if col in CATEGORICAL_COLUMNS and df[col].dtype == object:
+            df[col] = df[col].astype("category")
+        elif col in INTEGER_COLUMNS and df[col].dtype.kind == "f":
+            values = df[col].dropna()
+            if (values == values.round()).all():
+                df[col] = df[col].astype("Int64")
+    return df
 
 
-def get_and_copy(identifier, filename, target_dir):
-    """Run maven.get(identifier) and copy filename from identifier/processed/ data
-       into target/ directory.
+def compact_integers(values):
+    """Whole numbers in float array values as the smallest of int32/int64 that holds them.
+
+    Missing values give the nullable equivalent (Int32/Int64). Arrays that aren't whole numbers are
+    returned as is.
+    """
+    present = values[~np.isnan(values)]
+    if (present != np.round(present)).any():
+        return values
+    fits_int32 = not len(present) or (
+        present.min() >= np.iinfo(np.int32).min and present.max() <= np.iinfo(np.int32).max
+    )
+    dtype = "int32" if fits_int32 else "int64"
+    if len(present) < len(values):
+        return pd.array(values, dtype=dtype.capitalize())
+    return values.astype(dtype)
+
+
+def csv_types(df):
+    """Convert columns from columnar_types() back to the types pd.read_csv would give."""
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+        elif pd.api.types.is_extension_array_dtype(df[col]) and pd.api.types.is_integer_dtype(
+            df[col]
+        ):
+            df[col] = df[col].astype(float) if df[col].isnull().any() else df[col].astype("int64")
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = df[col].astype("int64")
+    return df
+
+
+def export_frame(df, path, output_format="csv"):
+    """Export df to path, with the file extension of path replaced to match output_format.
+
+    The file is written to a temporary file which then replaces path, so a file linked from the
+    artefact store is never modified in place.
+
+    Args:
+        df (pd.DataFrame): Data to export.
+        path (pathlib.PosixPath): File to write, e.g. processed/results.csv.
+        output_format (str): One of "csv", "parquet" or "feather" (the latter two require pyarrow).
+
+    Returns: path of the exported file.
+    """
+    path = path.with_name(output_filename(path.name, output_format))
+    tmp = temporary_path(path)
+    if output_format == "csv":
+        df.to_csv(tmp, index=False)
+    elif output_format == "parquet":
+        columnar_types(df).to_parquet(tmp, index=False)
+    elif output_format == "feather":
+        columnar_types(df).reset_index(drop=True).to_feather(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def append_csv(df, path):
+    """Append the rows of df to the CSV file at path.
+
+    The file is copied, appended to and then replaces path, so neither readers nor files linked to
+    it (e.g. from the artefact store) ever see a partially appended file.
+    """
+    tmp = temporary_path(path)
+    shutil.copyfile(path, tmp)
+    df.to_csv(tmp, mode="a", header=False, index=False)
+    os.replace(tmp, path)
+
+
+def read_frame(path, **kwargs):
+    """Read a processed file, preferring a columnar version of it (e.g. results.parquet for
+    results.csv).
+
+    If several formats of the file exist the most recently written one is read.
+
+    Args:
+        path (pathlib.PosixPath): CSV file to read, e.g. raw/results.csv.
+        **kwargs: Passed to pd.read_csv if the CSV file is read.
+
+    Returns: pd.DataFrame
     """
-    # target_dir by default is data/general-election/UK/2015/model
+    candidates = [path.with_name(output_filename(path.name, fmt)) for fmt in OUTPUT_FORMATS]
+    existing = [candidate for candidate in candidates if candidate.exists()]
+    if not existing:
+        return pd.read_csv(path, **kwargs)  # raises FileNotFoundError
+    latest = max(existing, key=lambda candidate: candidate.stat().st_mtime_ns)
+    if latest.suffix == OUTPUT_FORMATS["parquet"]:
+        return pd.read_parquet(latest)
+    elif latest.suffix == OUTPUT_FORMATS["feather"]:
+        return pd.read_feather(latest)
+    return pd.read_csv(latest, **kwargs)
+
+
+def guess_data_directory(target_dir):
+    """Guess the data directory from a pipeline's raw/ directory (<data directory>/<name>/raw)."""
     subdirectories_below = str(target_dir).count("/")
     go_up = "/".join([".." for _ in range(subdirectories_below)])
-    data_directory = (target_dir / go_up).resolve()  # sensible guess?
-    maven.get(identifier, data_directory=data_directory)
+    return (target_dir / go_up).resolve()  # sensible guess?
+
+
+def get_and_link(
+    identifier,
+    filename,
+    target_dir,
+    data_directory=None,
+    output_format="csv",
+    instrumentation=NULL_INSTRUMENTATION,
+    mirror=None,
+):
+    """Run maven.get(identifier) and link filename from identifier/processed/ data into target_dir.
+
+    The file is hardlinked (so it is shared with identifier's processed/ directory and the artefact
+    store) and only copied if hardlinks aren't possible.
+
+    Args:
+        identifier (str): Name of dataset to get, e.g. "general-election/UK/2015/results".
+        filename (str): Processed file of identifier to place into target_dir.
+        target_dir (pathlib.PosixPath): Directory to place the file into.
+        data_directory (pathlib.PosixPath): Data directory holding identifier (guessed from
+                                            target_dir if None).
+        output_format (str): Format identifier is exported as (filename's extension should match).
+        instrumentation (maven.instrumentation.Instrumentation): Receives events from identifier's
+                                                                 pipeline.
+        mirror (maven.mirror.Mirror): Mirror identifier's pipeline checks for its sources.
+    """
+    if data_directory is None:
+        data_directory = guess_data_directory(target_dir)
+    maven.get(
+        identifier,
+        data_directory=data_directory,
+        output_format=output_format,
+        instrumentation=instrumentation,
+        mirror=mirror,
+    )
+    link_processed(identifier, filename, target_dir, data_directory=data_directory)
+
+
+def link_processed(identifier, filename, target_dir, data_directory=None):
+    """Link filename from identifier/processed/ data (which must already be built) into target_dir.
+
+    Args:
+        identifier, filename, target_dir, data_directory: See get_and_link.
+    """
+    if data_directory is None:
+        data_directory = guess_data_directory(target_dir)
     source = data_directory / identifier / "processed"
-    print(f"Copying {filename} from {source} -> {target_dir}.")
-    shutil.copyfile(src=source / filename, dst=target_dir / filename)
+    print(f"Linking {filename} from {source} -> {target_dir}.")
+    link_file(src=source / filename, dst=target_dir / filename)
 
 
 def retrieve_from_cache_if_exists(
-    filename, target_dir, processing_fn, md5_checksum=None, caching_enabled=True, verbose=False
+    filename,
+    target_dir,
+    processing_fn,
+    md5_checksum=None,
+    caching_enabled=True,
+    verbose=False,
+    store=None,
+    verify=False,
+    instrumentation=NULL_INSTRUMENTATION,
 ):
     """Retrieve filename from target_dir if it exists, otherwise execute processing_fn.
 
+    Checksums are recorded in target_dir's Manifest, so a cached file is only re-hashed if it has
+    changed since it was last checked (or verify is True). If processing_fn returns a dict of
+    digests (as fetch_url does) its MD5 is used instead of re-reading the file.
+
+    If an ArtefactStore is given, a file with the expected MD5 that is already in the store is
+    linked into target_dir instead of executing processing_fn, and the file is added to the store
+    once it has been validated.
+
     Raises a warning if the retrieved/processed file's checksum doesn't match the expected MD5.
+
+    The file is locked throughout (see maven.lock), so concurrent calls for the same file wait for
+    the first to retrieve/process it and then use it from cache.
+
+    Sends "cache_hit"/"cache_miss" and "checksum" events to instrumentation.
     """
-    if caching_enabled and (target_dir / filename).exists():
-        # Check if it's already in target_dir.
-        print(f"Cached file {filename} is already in {target_dir.resolve()}")
-    else:
-        # Either caching disabled or file not there yet.
-        processing_fn()
+    with FileLock(target_dir / filename):
+        checksums = None
+        if caching_enabled and (target_dir / filename).exists():
+            # Check if it's already in target_dir.
+            print(f"Cached file {filename} is already in {target_dir.resolve()}")
+            instrumentation.emit(
+                "cache_hit", filename=filename, directory=str(target_dir), where="directory"
+            )
+        elif caching_enabled and store is not None and md5_checksum and md5_checksum in store:
+            # Another pipeline already has this exact file.
+            print(f"Linking {filename} into {target_dir.resolve()} from {store.root.resolve()}")
+            store.link(md5_checksum, target_dir / filename)
+            checksums = {"md5": md5_checksum}
+            instrumentation.emit(
+                "cache_hit", filename=filename, directory=str(target_dir), where="store"
+            )
+        else:
+            # Either caching disabled or file not there yet.
+            instrumentation.emit("cache_miss", filename=filename, directory=str(target_dir))
+            checksums = processing_fn()
+
+        # File should now be there. Let's check checksums.
+        manifest = Manifest(target_dir)
+        if isinstance(checksums, dict) and "md5" in checksums:
+            downloaded_file_md5_checksum = checksums["md5"]
+            manifest.record(filename, downloaded_file_md5_checksum)
+        else:
+            with instrumentation.stage("checksum", filename=filename, directory=str(target_dir)):
+                downloaded_file_md5_checksum = manifest.checksum(filename, verify=verify)
+        if verbose:
+            print(f"Checksum for {filename}: {downloaded_file_md5_checksum}")
+        if md5_checksum and downloaded_file_md5_checksum != md5_checksum:
+            warnings.warn(f"MD5 checksum doesn't match for {filename}")
+        if store is not None:
+            store.add(target_dir / filename, downloaded_file_md5_checksum)
+            # may now be a link to an identical stored file
+            manifest.record(filename, downloaded_file_md5_checksum)
+
 
-    # File should now be there. Let's check checksums.
-    downloaded_file_md5_checksum = calculate_md5_checksum(target_dir / filename)
-    if verbose:
-        print(f"Checksum for {filename}: {downloaded_file_md5_checksum}")
-    if md5_checksum and downloaded_file_md5_checksum != md5_checksum:
-        warnings.warn(f"MD5 checksum doesn't match for {filename}")
+@lru_cache(maxsize=None)
+def code_fingerprint(pipeline_class):
+    """MD5 fingerprint of the code that processes pipeline_class's data.
+
+    Covers the source of the modules defining pipeline_class and each of its base classes, and of
+    the maven modules they use directly (e.g. maven.utils, or
+    maven.datasets.general_election.seat_matrix for its functions), along with the classes'
+    code_version. Modules used only indirectly (through those helper modules) aren't covered: bump
+    code_version after changing them.
+    """
+    modules = set()
+    hash_md5 = hashlib.md5()
+    for cls in pipeline_class.__mro__:
+        if cls is Pipeline or not issubclass(cls, Pipeline):
+            continue
+        hash_md5.update(
+            f"{cls.__module__}.{cls.__qualname__}:{cls.__dict__.get('code_version')}".encode()
+        )
+        modules.add(cls.__module__)
+        for value in vars(sys.modules[cls.__module__]).values():
+            module = (
+                value.__name__
+                if isinstance(value, type(sys))
+                else getattr(value, "__module__", None)
+            )
+            if isinstance(module, str) and module.split(".")[0] == "maven":
+                modules.add(module)
+    for module in sorted(modules):
+        path = getattr(sys.modules.get(module), "__file__", None)
+        if path is not None and os.path.exists(path):
+            hash_md5.update(module.encode())
+            with open(path, "rb") as f:
+                hash_md5.update(f.read())
+    return hash_md5.hexdigest()
 
 
 ##################
@@ -114,50 +559,317 @@ def retrieve_from_cache_if_exists(
 class Pipeline:
     """Generic class for retrieving & processing datasets with built-in caching & MD5 checking."""
 
+    # Identifier of the dataset this pipeline builds in maven.catalogue, which its sources & targets
+    # are taken from
+    dataset_name = None
+    # process() skips processing when every target is cached (by processing through
+    # self.process_targets)
+    cache_targets = True
+    # Bump to rebuild processed files after changing code the pipeline's modules only use indirectly
+    # (see code_fingerprint)
+    code_version = None
+
     def __init__(self, directory):
         self.directory = Path(directory)
+        self.data_directory = None  # directory holding all datasets (set by maven.get)
+        # ArtefactStore shared by all datasets in data_directory (set by maven.get)
+        self.store = None
         self.sources = []  # tuples of (url, filename, checksum)
         self.rename_source = False
         self.retrieve_all = False
         self.target = (None, None)
+        self.targets = []  # tuples of (filename, checksum), for pipelines with more than one target
         self.verbose_name = ""
         self.year = None
         self.verbose = False
         self.cache = True
+        # rebuild processed files even if their raw files & code haven't changed
+        self.rebuild = False
+        self.verify = False  # re-hash cached files even if the manifest shows they haven't changed
+        self.output_format = "csv"  # format of processed files, see OUTPUT_FORMATS
+        self.write = True  # export processed files into self.directory / "processed"
+        # keep processed frames in memory & take upstream datasets' frames in memory
+        self.keep_frames = False
+        self.frames = {}  # processed DataFrames by target filename
+        # DataFrames handed over in memory by upstream pipelines, by source filename
+        self.upstream_frames = {}
+        # receives events from this pipeline (set by maven.get)
+        self.instrumentation = NULL_INSTRUMENTATION
+        # maven.mirror.Mirror checked for source files before their upstream URLs (set by maven.get)
+        self.mirror = None
+        if self.dataset_name is not None:
+            dataset = get_dataset(self.dataset_name)
+            self.sources = list(dataset.sources)
+            if len(dataset.targets) == 1:
+                self.target = dataset.targets[0]
+            else:
+                self.targets = list(dataset.targets)
+
+    @property
+    def events(self):
+        """self.instrumentation, adding this pipeline's name to every event."""
+        return self.instrumentation.bind(pipeline=type(self).__name__)
+
+    def stage(self, name, **fields):
+        """Context manager timing a step of this pipeline (as a "stage" event)."""
+        return self.events.stage("stage", stage=name, **fields)
+
+    def list_targets(self):
+        """Tuples of (filename, checksum) for every processed file."""
+        if self.targets:
+            return list(self.targets)
+        return [self.target] if self.target[0] else []
+
+    def format_target(self, filename, md5_checksum):
+        """(filename, checksum) of a processed file when exported in self.output_format.
+
+        Checksums are only known for CSV exports, so are None for other formats.
+        """
+        if self.output_format == "csv":
+            return filename, md5_checksum
+        return output_filename(filename, self.output_format), None
+
+    def source_filenames(self):
+        """Names of self.sources' files in raw/ (upstream datasets' are in self.output_format)."""
+        filenames = []
+        for url, filename, md5_checksum in self.sources:
+            if not is_url(url):
+                filename, _ = self.format_target(filename, md5_checksum)
+            filenames.append(filename)
+        return filenames
+
+    def build_record(self):
+        """What processed files are built from: the MD5s of the source files in raw/ and the code
+        fingerprint.
+
+        Recorded with each target in processed/'s Manifest, so targets are rebuilt when it changes
+        (see self.process_targets). MD5s come from raw/'s Manifest, so unchanged raw files aren't
+        re-hashed.
+        """
+        raw = self.directory / "raw"
+        manifest = Manifest(raw)
+        inputs = {
+            filename: manifest.checksum(filename)
+            for filename in self.source_filenames()
+            if (raw / filename).exists()
+        }
+        return {"inputs": inputs, "code": code_fingerprint(type(self))}
 
     def retrieve(self):
         """
         Retrieve data from self.sources into self.directory / 'raw' and validate against checksum.
+
+        Source files are taken from self.mirror where it has a copy, rather than from their upstream
+        URLs.
+
+        If self.keep_frames is set, datasets this pipeline depends on are handed over as DataFrames
+        in memory (see self.upstream_frames), and are only linked into self.directory / 'raw' if
+        self.write is also set.
         """
         target_dir = self.directory / "raw"
         os.makedirs(target_dir, exist_ok=True)  # create directory if it doesn't exist
+        upstream_frames = {}
+        events = self.events
         for url, filename, md5_checksum in self.sources:
-            if is_url(url):
+            events.emit("retrieve_start", source=url, filename=filename)
+            with events.stage("retrieve_end", source=url, filename=filename):
+                self.retrieve_source(url, filename, md5_checksum, target_dir, upstream_frames)
+            if not self.retrieve_all:  # retrieve just the first dataset
+                return
+        if self.retrieve_all:  # all datasets retrieved
+            return
+        else:  # retrieving first dataset only but all fallbacks failed
+            raise RuntimeError(f"Unable to download {self.verbose_name} data.")
+
+    def retrieve_source(self, url, filename, md5_checksum, target_dir, upstream_frames):
+        """Retrieve one of self.sources into target_dir (see self.retrieve).
+
+        Args:
+            url (str): URL or dataset identifier of the source.
+            filename (str): Name of source file.
+            md5_checksum (str): Expected checksum of the file.
+            target_dir (pathlib.PosixPath): Directory to retrieve into.
+            upstream_frames (dict): Processed frames of upstream datasets already fetched, by
+                                    dataset identifier.
+        """
+        if not is_url(url) and self.keep_frames:
+            if url not in upstream_frames:
+                upstream_frames[url] = maven.get(
+                    url,
+                    data_directory=self.data_directory or guess_data_directory(target_dir),
+                    output_format=self.output_format,
+                    return_frames=True,
+                    write=self.write,
+                    instrumentation=self.instrumentation,
+                    mirror=self.mirror,
+                )
+            if filename in upstream_frames[url]:
+                self.upstream_frames[filename] = upstream_frames[url][filename]
+            if not self.write:
+                return
+        caching_enabled = self.cache
+        if is_url(url):
+            processing_fn = partial(
+                fetch_source,
+                url=url,
+                filename=filename,
+                target_dir=target_dir,
+                rename_file=self.rename_source,
+                mirror=self.mirror,
+                instrumentation=self.events,
+            )
+        else:
+            filename, md5_checksum = self.format_target(filename, md5_checksum)
+            caching_enabled = caching_enabled and not self.upstream_changed(url, filename)
+            if self.keep_frames:
+                # maven.get(url) has already run above, so its processed file only needs linking
                 processing_fn = partial(
-                    fetch_url,
-                    url=url,
+                    link_processed,
+                    identifier=url,
                     filename=filename,
                     target_dir=target_dir,
-                    rename_file=self.rename_source,
+                    data_directory=self.data_directory,
                 )
             else:
                 processing_fn = partial(
-                    get_and_copy, identifier=url, filename=filename, target_dir=target_dir
+                    get_and_link,
+                    identifier=url,
+                    filename=filename,
+                    target_dir=target_dir,
+                    data_directory=self.data_directory,
+                    output_format=self.output_format,
+                    instrumentation=self.instrumentation,
+                    mirror=self.mirror,
                 )
-            retrieve_from_cache_if_exists(
-                filename=filename,
-                target_dir=target_dir,
-                processing_fn=processing_fn,
-                md5_checksum=md5_checksum,
-                caching_enabled=self.cache,
-                verbose=self.verbose,
-            )
-            if not self.retrieve_all:  # retrieve just the first dataset
-                return
-        if self.retrieve_all:  # all datasets retrieved
-            return
-        else:  # retrieving first dataset only but all fallbacks failed
-            raise RuntimeError(f"Unable to download {self.verbose_name} data.")
+        retrieve = partial(
+            retrieve_from_cache_if_exists,
+            filename=filename,
+            target_dir=target_dir,
+            processing_fn=processing_fn,
+            md5_checksum=md5_checksum,
+            caching_enabled=caching_enabled,
+            verbose=self.verbose,
+            store=self.store,
+            verify=self.verify,
+            instrumentation=self.events,
+        )
+        if is_url(url) and self.cache and self.store is not None and md5_checksum:
+            # Other pipelines with the same source (e.g. the House of Commons results workbook) wait
+            # for this download, then link it from the store
+            with self.store.lock(md5_checksum):
+                retrieve()
+        else:
+            retrieve()
+
+    def upstream_changed(self, identifier, filename):
+        """True if upstream dataset identifier's processed file has changed since it was linked into
+        raw/ as filename.
+
+        Upstream processed files are replaced (not modified) when rebuilt, so a rebuilt file no
+        longer matches the copy linked into raw/. Checksums come from both directories' Manifests,
+        so unchanged files aren't re-hashed.
+        """
+        raw = self.directory / "raw"
+        processed = (self.data_directory or guess_data_directory(raw)) / identifier / "processed"
+        if not ((raw / filename).exists() and (processed / filename).exists()):
+            return False
+        return Manifest(processed).checksum(filename) != Manifest(raw).checksum(filename)
 
     def process(self):
         pass
+
+    def export(self, df, filename):
+        """Set df as the processed frame for filename, exporting it to processed/ if self.write."""
+        if self.keep_frames:
+            self.frames[filename] = df
+        if self.write:
+            os.makedirs(self.directory / "processed", exist_ok=True)
+            with self.stage("export", filename=filename):
+                path = export_frame(df, self.directory / "processed" / filename, self.output_format)
+            print(f"Exporting dataset to {path.resolve()}")
+
+    def process_targets(self, processing_fn):
+        """Run processing_fn (which should self.export() every target) unless the targets are
+        already processed.
+
+        Targets are validated against their checksums. Processed targets are reused exactly when
+        they were built from the same raw files & code (see self.build_record), otherwise they are
+        all rebuilt. This applies even when self.cache is off, which only forces raw files to be
+        retrieved again; set self.rebuild to rebuild them regardless. If self.write isn't set
+        nothing is cached, so processing_fn always runs.
+
+        processed/ is locked throughout, so concurrent builds of this dataset (in other threads,
+        processes or hosts sharing the data directory) wait for this one and then use its processed
+        files.
+        """
+        if not self.write:
+            processing_fn()
+            return
+
+        processed = []
+
+        def process_once():
+            # processing_fn exports every target, so only run it for the first target that isn't
+            # cached.
+            if not processed:
+                processing_fn()
+                processed.append(True)
+
+        target_dir = self.directory / "processed"
+        os.makedirs(target_dir, exist_ok=True)  # create directory if it doesn't exist
+        with FileLock(target_dir):  # other builds of this dataset wait for this one
+            targets = [
+                self.format_target(filename, md5_checksum)
+                for filename, md5_checksum in self.list_targets()
+            ]
+            build = self.build_record()
+            manifest = Manifest(target_dir)
+            outdated = [
+                filename
+                for filename, _ in targets
+                if (target_dir / filename).exists() and manifest.build(filename) != build
+            ]
+            if outdated:
+                print(
+                    f"Raw data or code changed since {', '.join(outdated)} processed: rebuilding."
+                )
+            for filename, md5_checksum in targets:
+                retrieve_from_cache_if_exists(
+                    filename=filename,
+                    target_dir=target_dir,
+                    processing_fn=process_once,
+                    md5_checksum=md5_checksum,
+                    caching_enabled=not (self.rebuild or outdated),
+                    verbose=self.verbose,
+                    store=self.store,
+                    verify=self.verify,
+                    instrumentation=self.events,
+                )
+            manifest = Manifest(target_dir)  # reload checksums recorded for the targets
+            for filename, _ in targets:
+                manifest.record_build(filename, build)
+
+    def get_frames(self):
+        """Processed DataFrames by target filename (reading any not processed here from disk)."""
+        for filename, _ in self.list_targets():
+            if filename not in self.frames:
+                self.frames[filename] = read_frame(self.directory / "processed" / filename)
+        return dict(self.frames)
+
+    def read_source(self, filename, **kwargs):
+        """Read source filename from raw/, or take it from the frame handed over by the upstream
+        pipeline.
+
+        Either way the DataFrame has the same types as if the CSV version of the file had been read.
+
+        Args:
+            filename (str): Name of source file, e.g. "general_election-uk-2015-results.csv".
+            **kwargs: Passed to pd.read_csv if the CSV file is read.
+
+        Returns: pd.DataFrame
+        """
+        if filename in self.upstream_frames:
+            df = self.upstream_frames[filename].reset_index(drop=True)
+        else:
+            df = read_frame(self.directory / "raw" / filename, **kwargs)
+        return csv_types(df)
@@ -20,6 +20,7 @@ setuptools.setup(
     packages=setuptools.find_packages(),
     include_package_data=True,
     install_requires=["pandas==1.0.0", "requests==2.22.0", "xlrd==1.2.0",],
+    extras_require={"columnar": ["pyarrow>=0.15.1"], "benchmarks": ["openpyxl>=3.0.3"]},
     python_requires="==3.7.*",
     setup_requires=["pytest-runner"],
     test_suite="tests",
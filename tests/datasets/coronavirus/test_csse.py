@@ -7,12 +7,17 @@ Running tests against installed version (either `pip install .` or `pip install
     $ cd /path/to/repo
     $ pytest ./tests/datasets/coronavirus/test_csse.py
 """
-
+import io
+import os
+import tracemalloc
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 import maven
+from maven import synthetic, utils
+from maven.datasets.coronavirus.csse import CSSE
 
 
 def test_csse():
@@ -35,3 +40,124 @@ def test_csse():
         "deaths",
         "recovered",
     ]
+
+
+def write_raw_data(directory, dates, revised=False):
+    """Write wide time series files for two locations covering dates."""
+    os.makedirs(directory / "raw", exist_ok=True)
+    for i, metric in enumerate(CSSE.metrics):
+        df = pd.DataFrame(
+            {
+                "Province/State": ["Hubei", None],
+                "Country/Region": ["China", "Italy"],
+                "Lat": [30.97, 43.0],
+                "Long": [112.27, 12.0],
+            }
+        )
+        for day, date in enumerate(dates):
+            df[date] = [(day + 1) * (i + 1) * 10 + revised, (day + 1) * (i + 1)]
+        df.to_csv(directory / "raw" / f"time_series_19-covid-{metric}.csv", index=False)
+
+
+def process(directory):
+    pipeline = CSSE(directory=directory)
+    # as when refreshing the data (processed files are rebuilt as the raw data changed)
+    pipeline.cache = False
+    pipeline.process()
+    return {
+        filename: pd.read_csv(directory / "processed" / filename)
+        for filename, _ in pipeline.targets
+    }
+
+
+def test_csse_incremental(tmpdir, capsys):
+    incremental_dir, full_dir = Path(tmpdir) / "incremental", Path(tmpdir) / "full"
+    dates = ["1/22/20", "1/23/20", "1/24/20", "1/25/20"]
+
+    write_raw_data(incremental_dir, dates[:2])
+    process(incremental_dir)
+    write_raw_data(incremental_dir, dates)
+    capsys.readouterr()
+    incremental = process(incremental_dir)
+    assert "Processing 2 new date(s)." in capsys.readouterr().out
+
+    write_raw_data(full_dir, dates)
+    full = process(full_dir)
+    for filename, df in full.items():
+        pd.testing.assert_frame_equal(incremental[filename], df)
+    assert len(full["CSSE_country_province.csv"]) == 8
+
+    # Revising values for dates already processed triggers a full rebuild
+    write_raw_data(incremental_dir, dates, revised=True)
+    write_raw_data(full_dir, dates, revised=True)
+    capsys.readouterr()
+    incremental = process(incremental_dir)
+    assert "new date(s)" not in capsys.readouterr().out
+    full = process(full_dir)
+    for filename, df in full.items():
+        pd.testing.assert_frame_equal(incremental[filename], df)
+
+
+def reshape_melt_merge(data):
+    """The original reshape: melt each metric, outer merge on location, coordinates & date, sort."""
+    keys = ["Province/State", "Country/Region", "Lat", "Long", "date"]
+    long_data = {}
+    for metric in CSSE.metrics:
+        df = data[metric].melt(id_vars=CSSE.id_vars, var_name="date", value_name=metric)
+        df["date"] = pd.to_datetime(df.date, format="%m/%d/%y")
+        long_data[metric] = df
+    df = pd.merge(long_data["Confirmed"], long_data["Deaths"], how="outer", on=keys).merge(
+        long_data["Recovered"], how="outer", on=keys
+    )
+    df.columns = utils.sanitise(df.columns, replace={"long": "lon"})
+    columns = [
+        "date",
+        "country_region",
+        "province_state",
+        "lat",
+        "lon",
+        "confirmed",
+        "deaths",
+        "recovered",
+    ]
+    return df[columns].sort_values(["date", "country_region", "province_state"])
+
+
+def test_csse_reshape():
+    data = synthetic.csse_time_series(n_locations=30, n_dates=10)
+    df = CSSE.reshape(data)
+    assert df.country_region.dtype == "category"
+    assert df.province_state.dtype == "category"
+    assert df.confirmed.dtype == "int32"
+    # Same CSV output as the original melt & merge
+    assert df.to_csv(index=False) == reshape_melt_merge(data).to_csv(index=False)
+    assert CSSE.country_rollup(df).to_csv(index=False) == CSSE.country_rollup(
+        reshape_melt_merge(data)
+    ).to_csv(index=False)
+
+    # Missing values give nullable integers
+    data["Recovered"] = data["Recovered"].drop(columns="1/31/20")
+    data["Recovered"].iloc[0, 4] = np.nan
+    df = CSSE.reshape(data)
+    assert df.recovered.dtype == "Int32"
+    pd.testing.assert_frame_equal(
+        pd.read_csv(io.StringIO(df.to_csv(index=False))),
+        pd.read_csv(io.StringIO(reshape_melt_merge(data).to_csv(index=False))),
+    )
+
+
+def peak_memory(fn, *args):
+    """Peak bytes allocated to run fn(*args)."""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_csse_reshape_memory():
+    # Timings are compared by the benchmark suite (`python -m benchmarks.suite CSSE.reshape`), not
+    # here
+    data = synthetic.csse_time_series(n_locations=300, n_dates=60)
+    assert peak_memory(CSSE.reshape, data) < peak_memory(reshape_melt_merge, data) / 2
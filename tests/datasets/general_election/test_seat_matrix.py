@@ -0,0 +1,102 @@
+"""
+Running tests in development:
+    $ cd /path/to/repo
+    $ python -m pytest ./tests/datasets/general_election/test_seat_matrix.py
+
+Running tests against installed version (either `pip install .` or `pip install maven`):
+    $ cd /path/to/repo
+    $ pytest ./tests/datasets/general_election/test_seat_matrix.py
+"""
+import numpy as np
+import pandas as pd
+
+from maven.datasets.general_election.seat_matrix import SeatMatrix
+
+
+def long_frame():
+    return pd.DataFrame(
+        {
+            "ons_id": ["B", "B", "A", "A", "A", "C", "C"],
+            "geo": ["wales", "wales", "england", "england", "england", "england", "england"],
+            "party": ["lab", "con", "snp", "lab", "con", "con", "lab"],
+            "votes": [30, 70, np.nan, 55, 45, 20, 80],
+            "voteshare": [0.3, 0.7, np.nan, 0.55, 0.45, 0.2, 0.8],
+        }
+    )
+
+
+def test_from_long():
+    df = long_frame()
+    matrix = SeatMatrix.from_long(df, "voteshare")
+    assert list(matrix.ons_ids) == ["A", "B", "C"]
+    assert list(matrix.parties) == ["con", "lab", "snp"]
+    assert matrix.values.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(
+        matrix.values, [[0.45, 0.55, np.nan], [0.7, 0.3, np.nan], [0.2, 0.8, np.nan]]
+    )
+    np.testing.assert_array_equal(matrix.rows(), df.voteshare.to_numpy())
+    np.testing.assert_array_equal(matrix.lay_out(df.votes).rows(), df.votes.to_numpy())
+
+    # Rows without a seat or party are left out
+    df.loc[0, "party"] = np.nan
+    matrix = SeatMatrix.from_long(df, "voteshare")
+    assert list(matrix.parties) == ["con", "lab", "snp"]
+    assert np.isnan(matrix.values[1, 1])
+    assert np.isnan(matrix.rows()[0])
+
+
+def test_winners():
+    df = long_frame()
+    winners = SeatMatrix.from_long(df, "voteshare").winners()
+    pd.testing.assert_series_equal(
+        winners,
+        pd.Series(
+            ["lab", "con", "lab"], index=pd.Index(["A", "B", "C"], name="ons_id"), name="party"
+        ),
+    )
+    row_winners = SeatMatrix.from_long(df, "voteshare").row_winners()
+    assert list(row_winners) == ["con", "con", "lab", "lab", "lab", "lab", "lab"]
+
+    # Same as sorting the long frame & taking the first row per seat (for seats without ties)
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame(
+        {
+            "ons_id": np.repeat(np.arange(500), 6).astype(str),
+            "party": np.tile(["con", "lab", "ld", "grn", "snp", "other"], 500),
+            "voteshare": rng.dirichlet(np.ones(6), size=500).ravel(),
+        }
+    ).sample(frac=1, random_state=0)
+    df.loc[df.party == "snp", "voteshare"] = np.where(
+        rng.rand(500) < 0.5, np.nan, df[df.party == "snp"].voteshare
+    )
+    expected = (
+        df.sort_values("voteshare", ascending=False)
+        .groupby("ons_id")
+        .head(1)
+        .set_index("ons_id")
+        .party.sort_index()
+    )
+    pd.testing.assert_series_equal(SeatMatrix.from_long(df, "voteshare").winners(), expected)
+
+
+def test_winners_without_values():
+    df = long_frame()
+    df.loc[df.ons_id == "C", "voteshare"] = np.nan
+    matrix = SeatMatrix.from_long(df, "voteshare")
+    np.testing.assert_array_equal(matrix.winner_codes(), [1, 0, -1])
+    assert list(matrix.winners().fillna("none")) == ["lab", "con", "none"]
+    assert (
+        list(pd.Series(matrix.row_winners()).fillna("none"))
+        == ["con"] * 2 + ["lab"] * 3 + ["none"] * 2
+    )
+
+
+def test_group_sums():
+    df = long_frame()
+    votes = SeatMatrix.from_long(df, "votes")
+    seat_geo, geos = votes.seat_groups(df.geo)
+    assert list(geos) == ["england", "wales"]
+    np.testing.assert_array_equal(seat_geo, [0, 1, 0])
+    np.testing.assert_array_equal(
+        votes.group_sums(seat_geo, len(geos)), [[65, 135, 0], [70, 30, 0]]
+    )
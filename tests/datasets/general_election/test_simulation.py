@@ -0,0 +1,92 @@
+"""
+Running tests in development:
+    $ cd /path/to/repo
+    $ python -m pytest ./tests/datasets/general_election/test_simulation.py
+
+Running tests against installed version (either `pip install .` or `pip install maven`):
+    $ cd /path/to/repo
+    $ pytest ./tests/datasets/general_election/test_simulation.py
+"""
+import numpy as np
+import pandas as pd
+
+from maven.datasets.general_election.simulation import seat_party_matrix, simulate_seats
+
+
+def model_ready(n_seats=60, seed=0):
+    """Model-ready data with a clear leader in most seats, two geos & an SNP only in Scotland."""
+    rng = np.random.RandomState(seed)
+    rows = []
+    for i in range(n_seats):
+        geo = "scotland" if i % 4 == 0 else "england_not_london"
+        shares = rng.dirichlet([4, 3, 1, 2])
+        for party, share in zip(["con", "lab", "ld", "snp"], shares):
+            if party == "snp" and geo != "scotland":
+                share = np.nan
+            rows.append(
+                {"ons_id": f"S{i:03d}", "geo": geo, "party": party, "geo_swing_forecast": share}
+            )
+    return pd.DataFrame(rows)
+
+
+def test_seat_party_matrix():
+    df = model_ready(n_seats=8)
+    shuffled = df.sample(frac=1, random_state=0)
+    ons_ids, parties, geos, seat_geo, voteshares = seat_party_matrix(shuffled, "geo_swing_forecast")
+    assert list(ons_ids) == [f"S{i:03d}" for i in range(8)]
+    assert list(parties) == ["con", "lab", "ld", "snp"]
+    assert list(geos[seat_geo]) == list(df.drop_duplicates("ons_id").geo)
+    np.testing.assert_array_equal(voteshares.ravel(), df.geo_swing_forecast.to_numpy())
+
+
+def test_simulate_seats_without_uncertainty():
+    df = model_ready()
+    simulation = simulate_seats(df, n_draws=50, national_sd=0, geo_sd=0, local_sd=0)
+    winners = df.loc[df.groupby("ons_id").geo_swing_forecast.idxmax()].party.value_counts()
+    expected = winners.reindex(simulation.seat_counts.columns, fill_value=0)
+    assert (simulation.seat_counts == expected).all().all()
+    assert set(simulation.win_probability.stack().unique()) == {0.0, 1.0}
+
+
+def test_simulate_seats():
+    df = model_ready()
+    simulation = simulate_seats(df, n_draws=2500, batch_size=1000, seed=1)
+    assert simulation.seat_counts.shape == (2500, 4)
+    assert (simulation.seat_counts.sum(axis=1) == 60).all()
+    np.testing.assert_allclose(simulation.win_probability.sum(axis=1), 1)
+    # SNP only stands in Scotland
+    assert simulation.win_probability.snp[df[df.geo != "scotland"].ons_id.unique()].eq(0).all()
+    # Uncertainty: seat counts vary between draws
+    assert simulation.seat_counts.con.std() > 0
+    # Reproducible, including when spread across processes
+    pd.testing.assert_frame_equal(
+        simulation.seat_counts, simulate_seats(df, n_draws=2500, seed=1).seat_counts
+    )
+    pd.testing.assert_frame_equal(
+        simulation.seat_counts,
+        simulate_seats(df, n_draws=2500, batch_size=1000, seed=1, processes=2).seat_counts,
+    )
+    assert not simulation.seat_counts.equals(simulate_seats(df, n_draws=2500, seed=2).seat_counts)
+
+
+def test_simulate_seats_party_correlation():
+    df = model_ready()
+    correlation = pd.DataFrame([[1, -0.9], [-0.9, 1]], index=["con", "lab"], columns=["con", "lab"])
+    correlated = simulate_seats(
+        df, n_draws=2000, national_sd=0.3, geo_sd=0, local_sd=0.01, party_correlation=correlation
+    ).seat_counts
+    independent = simulate_seats(
+        df, n_draws=2000, national_sd=0.3, geo_sd=0, local_sd=0.01
+    ).seat_counts
+    # Con gaining at Labour's expense (and vice versa) spreads out both parties' seat counts
+    assert correlated.con.std() > independent.con.std()
+
+
+def test_simulate_seats_without_forecast_or_geo():
+    df = model_ready(n_seats=8)
+    df.loc[df.ons_id == "S001", "geo_swing_forecast"] = np.nan  # nobody forecast any votes
+    df.loc[df.ons_id == "S002", "geo"] = np.nan
+    simulation = simulate_seats(df, n_draws=50)
+    assert (simulation.seat_counts.sum(axis=1) == 7).all()
+    assert (simulation.win_probability.loc["S001"] == 0).all()
+    assert simulation.win_probability.loc["S002"].sum() == 1
@@ -0,0 +1,91 @@
+"""
+Running tests in development:
+    $ cd /path/to/repo
+    $ python -m pytest ./tests/datasets/general_election/test_swing.py
+
+Running tests against installed version (either `pip install .` or `pip install maven`):
+    $ cd /path/to/repo
+    $ pytest ./tests/datasets/general_election/test_swing.py
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from maven import synthetic
+from maven.datasets.general_election import UK2017Model
+from maven.datasets.general_election.swing import NationalSwing
+
+
+def test_national_swing_matches_model(tmpdir):
+    directory = Path(tmpdir)
+    for year in ["2015", "2017"]:
+        synthetic.write_results(
+            directory / "raw" / f"general_election-uk-{year}-results.csv", year, n_seats=200
+        )
+    pipeline = UK2017Model(directory=directory)
+    pipeline.results_seat_count = {
+        year: synthetic.seat_count(str(year), n_seats=200) for year in [2015, 2017]
+    }
+    results = pipeline.load_results_data()[pipeline.last]
+
+    rng = np.random.RandomState(0)
+    polls = pd.DataFrame(
+        rng.dirichlet(np.ones(6), size=20), columns=["con", "lab", "ld", "grn", "snp", "other"]
+    ).rename_axis("scenario")
+    scenarios = NationalSwing(results).evaluate(polls, winners=True)
+    assert scenarios.seats.shape == (20, results.party.nunique())
+    assert (scenarios.seats.sum(axis=1) == 200).all()
+
+    for scenario, poll in polls.iterrows():
+        df = results.copy()
+        df["national_polls"] = df.party.map(poll)
+        df = pipeline.calculate_national_swing(df)
+        expected = df.drop_duplicates("ons_id").set_index("ons_id").national_swing_winner
+        pd.testing.assert_series_equal(
+            scenarios.winners.loc[scenario], expected.rename(scenario), check_names=False
+        )
+        seats = expected.value_counts().reindex(scenarios.seats.columns, fill_value=0)
+        assert (scenarios.seats.loc[scenario] == seats).all()
+    assert (
+        scenarios.seats.drop(columns=["con", "lab", "ld", "grn", "snp", "other"]).eq(0).all().all()
+    )
+
+
+def test_national_swing_batches():
+    results = pd.DataFrame(
+        {
+            "ons_id": ["A", "A", "B", "B", "C", "C"],
+            "party": ["con", "lab"] * 3,
+            "votes": [60, 40, 45, 55, 50, 50.5],
+        }
+    )
+    results["voteshare"] = results.votes / results.groupby("ons_id").votes.transform("sum")
+    model = NationalSwing(results)
+    polls = pd.DataFrame({"con": np.linspace(0.3, 0.7, 41)})
+    polls["lab"] = 1 - polls.con
+    seats = model.evaluate(polls).seats
+    pd.testing.assert_frame_equal(model.evaluate(polls, batch_size=7).seats, seats)
+    assert model.evaluate(polls).winners is None
+    # Con gain seats as their polling improves
+    assert seats.con.is_monotonic_increasing
+    assert seats.con.iloc[0] == 0 and seats.con.iloc[-1] == 3
+
+
+def test_national_swing_seats_without_polling():
+    results = pd.DataFrame(
+        {
+            "ons_id": ["A", "A", "B", "B"],
+            "party": ["con", "lab", "apni", "dup"],
+            "votes": [60, 40, 30, 70],
+        }
+    )
+    results["voteshare"] = results.votes / results.groupby("ons_id").votes.transform("sum")
+    # No party standing in B has polling, so nobody wins it (rather than the first party
+    # alphabetically)
+    scenarios = NationalSwing(results).evaluate(
+        pd.DataFrame({"con": [0.5], "lab": [0.5]}), winners=True
+    )
+    assert scenarios.winners.loc[0, "A"] == "con"
+    assert pd.isnull(scenarios.winners.loc[0, "B"])
+    assert scenarios.seats.loc[0].to_dict() == {"apni": 0, "con": 1, "dup": 0, "lab": 0}
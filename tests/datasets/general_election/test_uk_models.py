@@ -10,9 +10,13 @@ Running tests against installed version (either `pip install .` or `pip install
 
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 import maven
+from maven import synthetic
+from maven.datasets.general_election import UK2017Model
+from maven.datasets.general_election.base import UKModel
 
 
 def check_uk_model_output(identifier, output_file):
@@ -87,3 +91,120 @@ def check_uk_model_output(identifier, output_file):
 #         identifier="general-election/UK/2019/model",
 #         output_file="general_election-uk-2019-model.csv",
 #     )
+
+
+def fold_ukip_into_other_loop(res):
+    """Reference implementation: fold UKIP into "other" one constituency at a time."""
+    res_list = []
+    for constituency in res.ons_id.unique():
+        res_con = res[res.ons_id == constituency].copy()
+        for metric in ["votes", "voteshare"]:
+            res_con.loc[res_con.party == "other", metric] = (
+                res_con.loc[res_con.party == "other", metric].sum()
+                + res_con.loc[res_con.party == "ukip", metric].sum()
+            )
+        res_list.append(res_con.query('party != "ukip"').copy())
+    return pd.concat(res_list, axis=0)
+
+
+def test_fold_ukip_into_other():
+    res = pd.DataFrame(
+        {
+            "ons_id": ["E1"] * 4 + ["E2"] * 3 + ["S1"] * 2 + ["E1"],
+            "party": ["con", "ukip", "other", "lab", "con", "other", "ukip", "snp", "other", "grn"],
+            "votes": [100.0, 20.0, 5.0, np.nan, 50.0, np.nan, np.nan, 30.0, 10.0, 1.0],
+        }
+    )
+    res["voteshare"] = res.votes / res.groupby("ons_id").votes.transform("sum")
+    expected = fold_ukip_into_other_loop(res)
+    pd.testing.assert_frame_equal(UKModel.fold_ukip_into_other(res), expected)
+    # Integer votes stay integers
+    res["votes"] = res.votes.fillna(0).astype(int)
+    expected = fold_ukip_into_other_loop(res)
+    pd.testing.assert_frame_equal(UKModel.fold_ukip_into_other(res), expected)
+
+
+def test_rolling_poll_of_polls():
+    rng = np.random.RandomState(0)
+    polls = synthetic.polls(["con", "lab", "ld"], "2017-04-01", "2017-06-08", 300, rng)
+    polls.loc[rng.choice(len(polls), 30, replace=False), "sample_size"] = np.nan
+    polls.loc[rng.choice(len(polls), 10, replace=False), "lab"] = np.nan
+    dates = pd.date_range("2017-04-01", "2017-06-10")
+    rolling = UKModel.rolling_poll_of_polls(polls, dates, days=7, parties=["con", "lab", "ld"])
+    assert rolling.index.equals(dates.rename("date"))
+    assert rolling.loc["2017-04-01"].isnull().all()  # no polls yet
+    for date in dates[1:]:
+        final_polls = UKModel.calculate_poll_of_polls(polls, date - pd.Timedelta(days=7), date)
+        sample_size = UKModel.poll_sample_sizes(
+            final_polls.sample_size, final_polls.method == "MRP"
+        )
+        expected = (
+            final_polls[["con", "lab", "ld"]]
+            .multiply(sample_size / sample_size.sum(), axis=0)
+            .sum()
+        )
+        np.testing.assert_allclose(rolling.loc[date].to_numpy(), expected.to_numpy())
+
+
+def test_poll_sample_sizes():
+    sample_size = UKModel.poll_sample_sizes(
+        np.array([1000.0, np.nan, 2000.0, 500.0]), np.array([False, False, False, True])
+    )
+    np.testing.assert_array_equal(sample_size, [1000.0, 1500.0, 2000.0, 2000.0])
+    np.testing.assert_array_equal(
+        UKModel.poll_sample_sizes(np.array([np.nan, 10.0]), np.array([False, True])), [1, 1]
+    )
+
+
+def test_daily_poll_of_polls(tmpdir):
+    directory = Path(tmpdir)
+    synthetic.write_geo_polls(directory / "raw", "2017-06-08", n_polls=50)
+    pipeline = UK2017Model(directory=directory)
+    polls = pipeline.load_polling_data()
+    daily = pipeline.get_daily_poll_of_polls(polls)
+    assert list(daily.columns) == ["date", "geo", "party", "voteshare"]
+    assert daily.date.nunique() == 31
+    assert set(daily.geo) == set(UKModel.geos)
+    # Election day's poll of polls is the one the model uses (before deriving England excluding
+    # London & normalising)
+    election_day = daily[daily.date == pipeline.now_date].set_index(["geo", "party"]).voteshare
+    for geo in UKModel.geos:
+        final_polls = UKModel.calculate_poll_of_polls(
+            polls[geo],
+            pipeline.now_date - pd.Timedelta(days=UKModel.poll_of_polls_days[geo]),
+            pipeline.now_date,
+        )
+        sample_size = UKModel.poll_sample_sizes(
+            final_polls.sample_size, final_polls.method == "MRP"
+        )
+        parties = UKModel.poll_of_polls_parties[geo]
+        expected = final_polls[parties].multiply(sample_size / sample_size.sum(), axis=0).sum()
+        np.testing.assert_allclose(election_day[geo].loc[parties].to_numpy(), expected.to_numpy())
+
+
+def test_geo_swing_without_geo(tmpdir):
+    results = pd.DataFrame(
+        {
+            "ons_id": ["A", "A", "B", "B", "C", "C"],
+            "geo": ["wales", "wales", "wales", "wales", np.nan, np.nan],
+            "party": ["con", "lab"] * 3,
+            "votes": [60, 40, 45, 55, 70, 30],
+            "geo_polls": [0.4, 0.6] * 3,
+        }
+    )
+    results["voteshare"] = results.votes / results.groupby("ons_id").votes.transform("sum")
+    results = UK2017Model(directory=Path(tmpdir)).calculate_geo_swing(results)
+    assert list(results.geo_swing_winner.fillna("none")) == [
+        "lab",
+        "lab",
+        "lab",
+        "lab",
+        "none",
+        "none",
+    ]
+    assert (
+        results.loc[results.ons_id == "C", ["geo_voteshare", "geo_swing_forecast"]]
+        .isnull()
+        .all()
+        .all()
+    )
@@ -0,0 +1,77 @@
+"""
+Running tests in development:
+    $ cd /path/to/repo
+    $ python -m pytest ./tests/datasets/general_election/test_uk_polls.py
+
+Running tests against installed version (either `pip install .` or `pip install maven`):
+    $ cd /path/to/repo
+    $ pytest ./tests/datasets/general_election/test_uk_polls.py
+"""
+
+import datetime
+
+import pandas as pd
+import pytest
+
+from maven.datasets.general_election.uk_polls import UKPolls
+
+
+def test_parse_fieldwork():
+    with pytest.warns(UserWarning, match="fieldwork dates for 1 poll"):
+        date_from, date_to = UKPolls.parse_fieldwork(
+            fieldwork=pd.Series(["12-14", "30-3", "12?", "5", "30-2?", 7, "?"]),
+            year=pd.Series([2019, 2019, 2019, 2019, 2018, 2017, 2019]),
+            month=pd.Series(["Mar", "Jan", "Feb", "Dec", "Dec", "September", "May"]),
+        )
+    expected_from = [
+        "2019-03-12",
+        "2019-01-30",
+        "2019-02-12",
+        "2019-12-05",
+        "2018-12-30",
+        "2017-09-07",
+        None,
+    ]
+    expected_to = [
+        "2019-03-14",
+        "2019-02-03",
+        "2019-02-12",
+        "2019-12-05",
+        "2019-01-02",
+        "2017-09-07",
+        None,
+    ]
+    pd.testing.assert_series_equal(date_from, pd.Series(pd.to_datetime(expected_from)))
+    pd.testing.assert_series_equal(date_to, pd.Series(pd.to_datetime(expected_to)))
+
+
+def test_parse_fieldwork_month_formats():
+    fieldwork = pd.Series(["12-14", "30-3", "5"])
+    year = pd.Series([2015, 2015, 2016])
+    expected_from = pd.Series(pd.to_datetime(["2015-03-12", "2015-01-30", "2016-12-05"]))
+    expected_to = pd.Series(pd.to_datetime(["2015-03-14", "2015-02-03", "2016-12-05"]))
+    months = [
+        pd.Series([3, 1, 12]),  # numbers
+        pd.Series(["3", 1.0, "12"]),
+        pd.Series(
+            pd.to_datetime(["2015-03-01", "2015-01-01", "2016-12-01"])
+        ),  # month cells formatted as dates
+        pd.Series([datetime.datetime(2015, 3, 1), "Jan", pd.Timestamp("2016-12-01")]),
+    ]
+    for month in months:
+        date_from, date_to = UKPolls.parse_fieldwork(fieldwork, year=year, month=month)
+        pd.testing.assert_series_equal(date_from, expected_from)
+        pd.testing.assert_series_equal(date_to, expected_to)
+
+
+def test_parse_fieldwork_dates():
+    # Fieldwork Excel has read as a date is a single day of fieldwork
+    date_from, date_to = UKPolls.parse_fieldwork(
+        fieldwork=pd.Series([datetime.datetime(2014, 5, 21), "12-14"]),
+        year=pd.Series([2014, 2014]),
+        month=pd.Series(["May", "Jun"]),
+    )
+    pd.testing.assert_series_equal(
+        date_from, pd.Series(pd.to_datetime(["2014-05-21", "2014-06-12"]))
+    )
+    pd.testing.assert_series_equal(date_to, pd.Series(pd.to_datetime(["2014-05-21", "2014-06-14"])))
@@ -13,6 +13,7 @@ from pathlib import Path
 import pandas as pd
 
 import maven
+from maven.datasets.general_election.base import UKResults
 
 
 def check_uk_hoc_results_data(identifier, processed_filename):
@@ -50,3 +51,43 @@ def test_uk_2017_results():
     check_uk_hoc_results_data(
         identifier="general-election/UK/2017/results", processed_filename="general_election-uk-2017-results.csv"
     )
+
+
+def test_read_hoc_workbook_parses_once(monkeypatch, tmpdir):
+    workbook = Path(tmpdir) / "raw" / "1918-2017election_results_by_pcon.xlsx"
+    workbook.parent.mkdir()
+    workbook.write_bytes(b"not really a workbook")
+    parsed = []
+
+    def mock_read_excel(path, sheet_name, **kwargs):
+        parsed.append(sheet_name)
+        return {sheet: pd.DataFrame({0: [sheet, "x"], 1: [1, 2]}) for sheet in sheet_name}
+
+    monkeypatch.setattr(pd, "read_excel", mock_read_excel)
+    cache_dir = Path(tmpdir) / ".cache"
+    sheets = UKResults.read_hoc_workbook(
+        workbook, sheet_names=["2010", "2015", "2017"], cache_dir=cache_dir
+    )
+    assert parsed == [["2010", "2015", "2017"]]
+    assert sheets["2015"].iloc[0, 0] == "2015"
+
+    # Subsequent reads (e.g. by other years' pipelines) come from the cache
+    sheets = UKResults.read_hoc_workbook(
+        workbook, sheet_names=["2015", "2017"], cache_dir=cache_dir
+    )
+    assert parsed == [["2010", "2015", "2017"]]
+    pd.testing.assert_frame_equal(sheets["2017"], pd.DataFrame({0: ["2017", "x"], 1: [1, 2]}))
+
+    # A different workbook (different checksum) is parsed again, replacing the old workbook's sheets
+    workbook.write_bytes(b"a different workbook")
+    UKResults.read_hoc_workbook(workbook, sheet_names=["2017"], cache_dir=cache_dir)
+    assert parsed == [["2010", "2015", "2017"], ["2017"]]
+    assert len(list(cache_dir.glob("*.parquet"))) == 1
+
+    # So is the same workbook read with different options
+    monkeypatch.setattr(
+        UKResults, "hoc_read_options", dict(UKResults.hoc_read_options, skipfooter=20)
+    )
+    UKResults.read_hoc_workbook(workbook, sheet_names=["2017"], cache_dir=cache_dir)
+    assert parsed == [["2010", "2015", "2017"], ["2017"], ["2017"]]
+    assert len(list(cache_dir.glob("*.parquet"))) == 1
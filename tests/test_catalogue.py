@@ -0,0 +1,105 @@
+"""
+Running tests in development:
+    $ cd /path/to/repo
+    $ python -m pytest ./tests/test_catalogue.py
+
+Running tests against installed version (either `pip install .` or `pip install maven`):
+    $ cd /path/to/repo
+    $ pytest ./tests/test_catalogue.py
+"""
+import importlib
+from pathlib import Path
+
+import maven
+import pytest
+from maven import catalogue, utils
+
+
+class PluginPipeline(utils.Pipeline):
+    dataset_name = "plugin/dataset"
+
+    def __init__(self, directory):
+        super(PluginPipeline, self).__init__(directory=directory)
+        self.retrieve_all = True
+
+
+PLUGIN_DATASET = catalogue.Dataset(
+    name="plugin/dataset",
+    pipeline=f"{__name__}.PluginPipeline",
+    sources=(("general-election/UK/polls", "general_election-uk-polls.csv", None),),
+    targets=(("plugin.csv", None),),
+)
+
+
+class EntryPoint:
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+    def load(self):
+        if isinstance(self.value, Exception):
+            raise self.value
+        return self.value
+
+
+@pytest.fixture
+def plugin(monkeypatch):
+    monkeypatch.setattr(
+        catalogue, "entry_points", lambda group: [EntryPoint("plugin", [PLUGIN_DATASET])]
+    )
+    catalogue.load_catalogue.cache_clear()
+    yield
+    catalogue.load_catalogue.cache_clear()
+
+
+def test_builtin_datasets_match_pipelines():
+    get_module = importlib.import_module("maven.get")
+    for dataset in catalogue.DATASETS:
+        pipeline = get_module.get_pipeline(dataset.name, data_directory="./data/")
+        assert type(pipeline).dataset_name == dataset.name
+        assert pipeline.sources == list(dataset.sources)
+        assert pipeline.list_targets() == list(dataset.targets)
+    assert catalogue.get_dataset("general-election/UK/2015/model").upstream == [
+        "general-election/UK/2010/results",
+        "general-election/UK/2015/results",
+        "general-election/UK/polls",
+    ]
+    assert catalogue.get_dataset("general-election/UK/polls").upstream == []
+
+
+def test_entry_point_datasets(plugin, tmpdir):
+    assert catalogue.get_dataset("plugin/dataset") == PLUGIN_DATASET
+    assert set(catalogue.load_catalogue()) == set(catalogue.BUILTIN_DATASETS) | {"plugin/dataset"}
+    assert maven.get_dependency_graph(["plugin/dataset"]) == {
+        "plugin/dataset": ["general-election/UK/polls"],
+        "general-election/UK/polls": [],
+    }
+    pipeline = importlib.import_module("maven.get").get_pipeline(
+        "plugin/dataset", data_directory=str(tmpdir)
+    )
+    assert isinstance(pipeline, PluginPipeline)
+    assert pipeline.directory == Path(tmpdir) / "plugin/dataset"
+    assert pipeline.sources == list(PLUGIN_DATASET.sources)
+    assert pipeline.target == ("plugin.csv", None)
+    with pytest.raises(KeyError):
+        catalogue.get_dataset("plugin/missing")
+
+
+def test_entry_point_errors(monkeypatch):
+    builtin = catalogue.Dataset("coronavirus/CSSE", f"{__name__}.PluginPipeline", (), ())
+    monkeypatch.setattr(
+        catalogue,
+        "entry_points",
+        lambda group: [
+            EntryPoint("broken", ImportError("no module")),
+            EntryPoint("clash", builtin),
+        ],
+    )
+    catalogue.load_catalogue.cache_clear()
+    try:
+        with pytest.warns(UserWarning) as record:
+            datasets = catalogue.load_catalogue()
+    finally:
+        catalogue.load_catalogue.cache_clear()
+    assert len(record) == 2
+    assert datasets == catalogue.BUILTIN_DATASETS
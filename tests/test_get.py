@@ -8,8 +8,16 @@ Running tests against installed version (either `pip install .` or `pip install
     $ pytest
 """
 
+import importlib
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
 import maven
 import pytest
+from maven import utils
 
 
 def test_nonexisting_identifier():
@@ -20,3 +28,141 @@ def test_nonexisting_identifier():
 def test_nothing_happens():
     """Setting retrieve=False and process=False should do nothing."""
     maven.get("general-election/UK/2010/results", retrieve=False, process=False)
+
+
+def test_import_is_lazy():
+    """`import maven` shouldn't import pandas & co or any pipeline until a dataset is requested."""
+    code = (
+        "import sys, maven; "
+        "modules = ('pandas', 'numpy', 'requests', 'maven.utils', 'maven.datasets'); "
+        "print(sorted(m for m in modules if m in sys.modules))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.PIPE).stdout
+    assert output.decode().strip() == "[]"
+
+
+def test_get_pipeline_class_imports_on_demand():
+    get_module = importlib.import_module("maven.get")
+    assert get_module.mapper["general-election/UK/2015/results"].endswith(".UK2015Results")
+    assert (
+        get_module.get_pipeline_class("general-election/UK/2015/results").__name__
+        == "UK2015Results"
+    )
+    with pytest.raises(KeyError):
+        get_module.get_pipeline_class("this-identifier-will-never-exist")
+
+
+def test_get_dependency_graph():
+    graph = maven.get_dependency_graph(["general-election/UK/2017/model"])
+    assert graph == {
+        "general-election/UK/2017/model": [
+            "general-election/UK/2015/results",
+            "general-election/UK/2017/results",
+            "general-election/UK/polls",
+        ],
+        "general-election/UK/2015/results": [],
+        "general-election/UK/2017/results": [],
+        "general-election/UK/polls": [],
+    }
+
+
+def test_get_many_builds_upstream_first(monkeypatch):
+    built = []
+
+    def mock_get(name, **kwargs):
+        built.append(name)
+
+    monkeypatch.setattr(importlib.import_module("maven.get"), "get", mock_get)
+    maven.get_many(
+        ["general-election/UK/2015/model", "general-election/UK/2017/model"], max_workers=3
+    )
+    assert sorted(built) == sorted(
+        [
+            "general-election/UK/2010/results",
+            "general-election/UK/2015/results",
+            "general-election/UK/2017/results",
+            "general-election/UK/polls",
+            "general-election/UK/2015/model",
+            "general-election/UK/2017/model",
+        ]
+    )
+    for model in ["general-election/UK/2015/model", "general-election/UK/2017/model"]:
+        assert built.index(model) > built.index("general-election/UK/2015/results")
+        assert built.index(model) > built.index("general-election/UK/polls")
+
+
+class UpstreamPipeline(utils.Pipeline):
+    def __init__(self, directory):
+        super(UpstreamPipeline, self).__init__(directory=directory)
+        self.retrieve_all = True
+        self.target = ("upstream.csv", None)
+
+    def process(self):
+        self.process_targets(lambda: self.export(pd.DataFrame({"a": [1, 2]}), self.target[0]))
+
+
+class DownstreamPipeline(utils.Pipeline):
+    def __init__(self, directory):
+        super(DownstreamPipeline, self).__init__(directory=directory)
+        self.sources = [("test/upstream", "upstream.csv", None)]
+        self.retrieve_all = True
+        self.target = ("downstream.csv", None)
+
+    def process(self):
+        def process_and_export():
+            df = self.read_source("upstream.csv")
+            df["b"] = df.a * 2
+            self.export(df, self.target[0])
+
+        self.process_targets(process_and_export)
+
+
+@pytest.fixture
+def chained_pipelines(monkeypatch):
+    get_module = importlib.import_module("maven.get")
+    mapper = dict(
+        get_module.mapper,
+        **{"test/upstream": UpstreamPipeline, "test/downstream": DownstreamPipeline}
+    )
+    monkeypatch.setattr(get_module, "mapper", mapper)
+
+
+def test_get_return_frames_in_memory(chained_pipelines, tmpdir):
+    frames = maven.get(
+        "test/downstream", data_directory=str(tmpdir), return_frames=True, write=False
+    )
+    pd.testing.assert_frame_equal(
+        frames["downstream.csv"], pd.DataFrame({"a": [1, 2], "b": [2, 4]})
+    )
+    assert not (Path(tmpdir) / "test/upstream/processed").exists()
+    assert not (Path(tmpdir) / "test/downstream/processed").exists()
+
+
+def test_get_return_frames_and_write(chained_pipelines, tmpdir):
+    frames = maven.get("test/downstream", data_directory=str(tmpdir), return_frames=True)
+    pd.testing.assert_frame_equal(
+        pd.read_csv(Path(tmpdir) / "test/downstream/processed/downstream.csv"),
+        frames["downstream.csv"],
+    )
+    # Cached: frames are read back from disk
+    frames = maven.get("test/downstream", data_directory=str(tmpdir), return_frames=True)
+    pd.testing.assert_frame_equal(
+        frames["downstream.csv"], pd.DataFrame({"a": [1, 2], "b": [2, 4]})
+    )
+    with pytest.raises(ValueError):
+        maven.get("test/downstream", data_directory=str(tmpdir), write=False)
+
+
+def test_get_return_frames_and_write_gets_upstream_once(chained_pipelines, monkeypatch, tmpdir):
+    got = []
+    get = maven.get
+
+    def counting_get(name, **kwargs):
+        got.append(name)
+        return get(name, **kwargs)
+
+    monkeypatch.setattr(maven, "get", counting_get)
+    maven.get("test/downstream", data_directory=str(tmpdir), return_frames=True)
+    # The upstream file is linked into raw/ from the processed file built for its frames
+    assert got == ["test/downstream", "test/upstream"]
+    assert (Path(tmpdir) / "test/downstream/raw/upstream.csv").exists()
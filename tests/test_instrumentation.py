@@ -0,0 +1,112 @@
+"""
+Running tests in development:
+    $ cd /path/to/repo
+    $ python -m pytest ./tests/test_instrumentation.py
+
+Running tests against installed version (either `pip install .` or `pip install maven`):
+    $ cd /path/to/repo
+    $ pytest ./tests/test_instrumentation.py
+"""
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+import maven
+from maven import instrumentation, synthetic
+from maven.instrumentation import NULL_INSTRUMENTATION, JSONLinesSink, default_instrumentation
+
+
+def read_events(f):
+    return [json.loads(line) for line in f.getvalue().splitlines()]
+
+
+def test_json_lines_sink():
+    f = io.StringIO()
+    sink = JSONLinesSink(f).bind(pipeline="Test")
+    sink.emit("cache_hit", filename="file.csv")
+    with sink.stage("stage", stage="ok") as fields:
+        fields["rows"] = 3
+    with pytest.raises(ValueError):
+        with sink.stage("stage", stage="fails"):
+            raise ValueError("oops")
+
+    hit, ok, fails = read_events(f)
+    assert hit["event"] == "cache_hit"
+    assert hit["pipeline"] == "Test"
+    assert hit["filename"] == "file.csv"
+    assert ok["stage"] == "ok"
+    assert ok["rows"] == 3
+    assert ok["seconds"] >= 0
+    assert ok["max_rss_so_far"] > 0
+    assert "error" not in ok
+    assert fails["error"] == "ValueError('oops')"
+
+
+def test_null_instrumentation():
+    assert NULL_INSTRUMENTATION.bind(pipeline="Test") is NULL_INSTRUMENTATION
+    with NULL_INSTRUMENTATION.stage("stage") as fields:
+        fields["rows"] = 3
+
+
+def test_default_instrumentation(monkeypatch, tmpdir):
+    monkeypatch.setattr(instrumentation, "_sinks", {})
+    monkeypatch.delenv("MAVEN_EVENTS", raising=False)
+    assert default_instrumentation() is NULL_INSTRUMENTATION
+    monkeypatch.setenv("MAVEN_EVENTS", str(tmpdir / "events.jsonl"))
+    sink = default_instrumentation()
+    sink.emit("cache_miss", filename="file.csv")
+    assert default_instrumentation() is sink
+    instrumentation.close_default_sinks()  # as at exit
+    assert sink.file.closed
+    with open(tmpdir / "events.jsonl") as f:
+        assert json.loads(f.readline())["event"] == "cache_miss"
+
+
+def test_pipeline_events(tmpdir):
+    data_directory = Path(tmpdir)
+    synthetic.write_csse(data_directory / "coronavirus/CSSE/raw", n_locations=10, n_dates=5)
+    f = io.StringIO()
+    maven.get(
+        "coronavirus/CSSE",
+        data_directory=data_directory,
+        retrieve=False,
+        instrumentation=JSONLinesSink(f),
+    )
+    events = read_events(f)
+    assert all(event["pipeline"] == "CSSE" for event in events)
+    stages = [event["stage"] for event in events if event["event"] == "stage"]
+    assert stages == [
+        "read_raw_data",
+        "process_incrementally",
+        "reshape",
+        "country_rollup",
+        "export",
+        "export",
+        "process",
+    ]
+    # The first target is missing, so the pipeline processes both targets: the second is then found
+    # in its directory
+    assert [event["event"] for event in events if event["event"] != "stage"] == [
+        "cache_miss",
+        "checksum",
+        "cache_hit",
+        "checksum",
+    ]
+
+    # Processed files are now cached
+    f = io.StringIO()
+    maven.get(
+        "coronavirus/CSSE",
+        data_directory=data_directory,
+        retrieve=False,
+        instrumentation=JSONLinesSink(f),
+    )
+    assert [event["event"] for event in read_events(f)] == [
+        "cache_hit",
+        "checksum",
+        "cache_hit",
+        "checksum",
+        "stage",
+    ]
@@ -0,0 +1,130 @@
+"""
+Running tests in development:
+    $ cd /path/to/repo
+    $ python -m pytest
+
+Running tests against installed version (either `pip install .` or `pip install maven`):
+    $ cd /path/to/repo
+    $ pytest
+"""
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import maven
+from maven import lock, utils
+from maven.lock import FileLock
+
+
+class SlowPipeline(utils.Pipeline):
+    """Takes its source from a mirror and processes slowly, logging each run to processed.log."""
+
+    def __init__(self, directory):
+        super(SlowPipeline, self).__init__(directory=directory)
+        self.sources = [("https://example.com/", "raw.csv", None)]
+        self.target = ("slow.csv", None)
+
+    def process(self):
+        def process_and_export():
+            with open(self.directory / "processed.log", "a") as f:
+                f.write(f"{os.getpid()}\n")
+            time.sleep(0.2)
+            self.export(self.read_source("raw.csv"), self.target[0])
+
+        self.process_targets(process_and_export)
+
+
+@pytest.fixture
+def slow_pipeline(monkeypatch, tmpdir):
+    get_module = importlib.import_module("maven.get")
+    monkeypatch.setattr(
+        get_module, "mapper", dict(get_module.mapper, **{"test/slow": SlowPipeline})
+    )
+    mirror = Path(tmpdir) / "mirror"
+    os.makedirs(mirror / "example.com")
+    pd.DataFrame({"a": [1, 2]}).to_csv(mirror / "example.com" / "raw.csv", index=False)
+    return Path(tmpdir) / "data", mirror
+
+
+def test_lock_path():
+    assert lock.lock_path(Path("/data/raw/results.csv")) == Path("/data/raw/.results.csv.lock")
+
+
+def test_file_lock_threads(tmpdir):
+    path = Path(tmpdir) / "file.csv"
+    events = []
+
+    def hold(name):
+        with FileLock(path):
+            events.append(f"{name} start")
+            time.sleep(0.05)
+            events.append(f"{name} end")
+
+    threads = [threading.Thread(target=hold, args=(name,)) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Never interleaved
+    assert events in (
+        ["a start", "a end", "b start", "b end"],
+        ["b start", "b end", "a start", "a end"],
+    )
+    assert lock.lock_path(path).exists()
+    assert not path.exists()
+
+
+def test_file_lock_is_reentrant(tmpdir):
+    path = Path(tmpdir) / "file.csv"
+    with FileLock(path):
+        with FileLock(path):
+            pass
+        # Still held by this thread after the inner release
+        path_lock = lock._path_locks[str(FileLock(path).path)]
+        acquired = []
+        thread = threading.Thread(
+            target=lambda: acquired.append(path_lock.thread_lock.acquire(blocking=False))
+        )
+        thread.start()
+        thread.join()
+        assert acquired == [False]
+        assert path_lock.fd is not None
+    assert path_lock.fd is None
+
+
+def get_slow(data_directory, mirror):
+    maven.get("test/slow", data_directory=data_directory, mirror=mirror)
+
+
+def test_concurrent_get_threads(slow_pipeline):
+    data_directory, mirror = slow_pipeline
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda _: get_slow(data_directory, mirror), range(4)))
+    with open(data_directory / "test/slow/processed.log") as f:
+        assert len(f.readlines()) == 1  # the other threads waited, then used the processed file
+    assert pd.read_csv(data_directory / "test/slow/processed/slow.csv").a.tolist() == [1, 2]
+
+
+@pytest.mark.skipif(
+    lock.fcntl is None or "fork" not in multiprocessing.get_all_start_methods(),
+    reason="needs fcntl",
+)
+def test_concurrent_get_processes(slow_pipeline):
+    data_directory, mirror = slow_pipeline
+    context = multiprocessing.get_context("fork")  # children inherit the test pipeline
+    processes = [context.Process(target=get_slow, args=(data_directory, mirror)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0, 0, 0, 0]
+    with open(data_directory / "test/slow/processed.log") as f:
+        assert len(f.readlines()) == 1
+    assert pd.read_csv(data_directory / "test/slow/processed/slow.csv").a.tolist() == [1, 2]
@@ -0,0 +1,124 @@
+"""
+Running tests in development:
+    $ cd /path/to/repo
+    $ python -m pytest ./tests/test_mirror.py
+
+Running tests against installed version (either `pip install .` or `pip install maven`):
+    $ cd /path/to/repo
+    $ pytest ./tests/test_mirror.py
+"""
+import threading
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import maven
+from maven import synthetic, utils
+from maven.datasets.coronavirus import CSSE
+from maven.mirror import Mirror
+
+
+class UpstreamResponse:
+    """Streamed response serving a file from the upstream directory."""
+
+    headers = {}
+
+    def __init__(self, path):
+        self.status_code = 200
+        self.content = path.read_bytes()
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i : i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class UpstreamSession:
+    """Session standing in for the internet: serves a directory's files by name & records URLs."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.requested = []
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        return UpstreamResponse(self.directory / url.rsplit("/", 1)[-1])
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream(monkeypatch, tmpdir):
+    directory = Path(tmpdir) / "upstream"
+    synthetic.write_csse(directory, n_locations=10, n_dates=5)
+    session = UpstreamSession(directory)
+    monkeypatch.setattr(utils, "get_session", lambda: session)
+    return session
+
+
+def test_mirror_resolve():
+    url = "https://example.com/data/file.csv"
+    assert Mirror("/mirror").resolve(url) == Path("/mirror/example.com/data/file.csv")
+    mirror = Mirror("http://localhost:8000/")
+    assert mirror.remote
+    assert mirror.resolve(url) == "http://localhost:8000/example.com/data/file.csv"
+
+
+def test_prefetch_then_get_from_mirror(upstream, tmpdir):
+    mirror = Path(tmpdir) / "mirror"
+    paths = maven.prefetch(["coronavirus/CSSE"], mirror=mirror)
+    assert [path.relative_to(mirror) for path in paths] == [
+        Path(Mirror.relative_path(url + filename)) for url, filename, _ in CSSE().sources
+    ]
+    assert all(path.exists() for path in paths)
+    assert len(upstream.requested) == 3
+
+    # Processing is entirely local once the mirror is filled
+    with pytest.warns(UserWarning):  # synthetic data doesn't match the real checksums
+        maven.get("coronavirus/CSSE", data_directory=Path(tmpdir) / "data", mirror=mirror)
+    assert len(upstream.requested) == 3
+    df = pd.read_csv(Path(tmpdir) / "data" / "coronavirus/CSSE/processed/CSSE_country_province.csv")
+    assert len(df) == 10 * 5
+
+    # Prefetching again only downloads files that don't match their checksum (here, all of them)
+    maven.prefetch(["coronavirus/CSSE"], mirror=mirror)
+    assert len(upstream.requested) == 6
+
+
+def test_get_from_http_mirror(tmpdir):
+    mirror = Path(tmpdir) / "mirror"
+    for url, filename, _ in CSSE().sources:
+        synthetic.write_csse(
+            Mirror(mirror).resolve(url + filename).parent, n_locations=10, n_dates=5
+        )
+    server = HTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(mirror)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with pytest.warns(UserWarning):
+            maven.get(
+                "coronavirus/CSSE",
+                data_directory=Path(tmpdir) / "data",
+                mirror=f"http://127.0.0.1:{server.server_port}/",
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+    df = pd.read_csv(Path(tmpdir) / "data" / "coronavirus/CSSE/processed/CSSE_country_province.csv")
+    assert len(df) == 10 * 5
+
+
+def test_mirror_miss_falls_back_to_upstream(upstream, tmpdir):
+    with pytest.warns(UserWarning):
+        maven.get(
+            "coronavirus/CSSE", data_directory=Path(tmpdir) / "data", mirror=Path(tmpdir) / "empty"
+        )
+    assert len(upstream.requested) == 3
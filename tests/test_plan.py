@@ -0,0 +1,194 @@
+"""
+Running tests in development:
+    $ cd /path/to/repo
+    $ python -m pytest ./tests/test_plan.py
+
+Running tests against installed version (either `pip install .` or `pip install maven`):
+    $ cd /path/to/repo
+    $ pytest ./tests/test_plan.py
+"""
+import importlib
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import maven
+from maven import utils
+from maven.mirror import Mirror
+
+RAW_CSV = b"a\n1\n2\n"
+
+
+class RawPipeline(utils.Pipeline):
+    def __init__(self, directory):
+        super(RawPipeline, self).__init__(directory=directory)
+        self.sources = [("https://example.com/data/", "raw.csv", None)]
+        self.target = ("upstream.csv", None)
+
+    def process(self):
+        self.process_targets(
+            lambda: self.export(pd.read_csv(self.directory / "raw" / "raw.csv"), self.target[0])
+        )
+
+
+class ChildPipeline(utils.Pipeline):
+    def __init__(self, directory):
+        super(ChildPipeline, self).__init__(directory=directory)
+        self.sources = [("test/raw", "upstream.csv", None)]
+        self.target = ("child.csv", None)
+
+    def process(self):
+        def process_and_export():
+            df = self.read_source("upstream.csv")
+            df["b"] = df.a * 2
+            self.export(df, self.target[0])
+
+        self.process_targets(process_and_export)
+
+
+@pytest.fixture
+def pipelines(monkeypatch, tmpdir):
+    get_module = importlib.import_module("maven.get")
+    mapper = dict(get_module.mapper, **{"test/raw": RawPipeline, "test/child": ChildPipeline})
+    monkeypatch.setattr(get_module, "mapper", mapper)
+
+    def no_network():
+        raise AssertionError("Tried to use the network")
+
+    monkeypatch.setattr(utils, "get_session", no_network)
+    mirror = Path(tmpdir) / "mirror"
+    os.makedirs(mirror / "example.com/data")
+    (mirror / "example.com/data/raw.csv").write_bytes(RAW_CSV)
+    return Path(tmpdir) / "data", mirror
+
+
+def statuses(plan):
+    return [
+        (item.dataset, item.kind, item.filename, item.status, item.action) for item in plan.items
+    ]
+
+
+def test_plan_empty_directory(pipelines):
+    data_directory, mirror = pipelines
+    plan = maven.get("test/child", data_directory=data_directory, mirror=mirror, plan=True)
+    assert statuses(plan) == [
+        ("test/raw", "source", "raw.csv", "miss", "copy from mirror"),
+        ("test/raw", "target", "upstream.csv", "miss", "process"),
+        ("test/child", "source", "upstream.csv", "miss", "get test/raw"),
+        ("test/child", "target", "child.csv", "miss", "process"),
+    ]
+    assert plan.items[0].bytes == len(RAW_CSV)
+    assert plan.processed == ["test/raw", "test/child"]
+    assert not plan.is_noop
+    assert not data_directory.exists()  # nothing was created
+
+    # Without the mirror, the raw file is downloaded (size unknown offline)
+    plan = maven.get(
+        "test/child", data_directory=data_directory, mirror=Path("/nonexistent"), plan=True
+    )
+    assert [item.filename for item in plan.unknown_downloads] == ["raw.csv"]
+    assert plan.download_bytes == 0
+    assert "1 downloads" in str(plan)
+
+
+def test_plan_after_get(pipelines):
+    data_directory, mirror = pipelines
+    maven.get("test/child", data_directory=data_directory, mirror=mirror)
+    plan = maven.get("test/child", data_directory=data_directory, mirror=mirror, plan=True)
+    # Cached sources mean upstream datasets aren't visited at all, as in get()
+    assert statuses(plan) == [
+        ("test/child", "source", "upstream.csv", "hit", None),
+        ("test/child", "target", "child.csv", "hit", None),
+    ]
+    assert plan.is_noop
+    assert plan.processed == []
+
+    # Processed file (without a fixed checksum) removed: only this dataset is processed again
+    os.remove(data_directory / "test/child/processed/child.csv")
+    plan = maven.get("test/child", data_directory=data_directory, mirror=mirror, plan=True)
+    assert statuses(plan)[1] == ("test/child", "target", "child.csv", "miss", "process")
+    assert plan.processed == ["test/child"]
+    maven.get("test/child", data_directory=data_directory, mirror=mirror)
+
+    # Raw file edited since its checksum was recorded: stale, and re-hashed when used
+    with open(data_directory / "test/child/raw/upstream.csv", "a") as f:
+        f.write("3\n")
+    plan = maven.get("test/child", data_directory=data_directory, mirror=mirror, plan=True)
+    assert statuses(plan)[0] == ("test/child", "source", "upstream.csv", "stale", "rehash")
+    # ...and the processed file built from it will be rebuilt
+    assert statuses(plan)[1] == ("test/child", "target", "child.csv", "stale", "process")
+    assert plan.processed == ["test/child"]
+    maven.get("test/child", data_directory=data_directory, mirror=mirror)
+    assert pd.read_csv(data_directory / "test/child/processed/child.csv").b.tolist() == [2, 4, 6]
+    assert maven.get("test/child", data_directory=data_directory, mirror=mirror, plan=True).is_noop
+
+
+def test_plan_file_without_manifest_entry(pipelines):
+    data_directory, mirror = pipelines
+    # Placed in raw/ by hand, so its checksum has never been recorded: re-hashed when used
+    os.makedirs(data_directory / "test/raw/raw")
+    (data_directory / "test/raw/raw/raw.csv").write_bytes(RAW_CSV)
+    plan = maven.get("test/raw", data_directory=data_directory, mirror=mirror, plan=True)
+    assert statuses(plan) == [
+        ("test/raw", "source", "raw.csv", "stale", "rehash"),
+        ("test/raw", "target", "upstream.csv", "miss", "process"),
+    ]
+    assert not plan.is_noop
+
+
+def test_plan_output_format_and_no_process(pipelines):
+    data_directory, mirror = pipelines
+    maven.get("test/raw", data_directory=data_directory, mirror=mirror)
+    plan = maven.get(
+        "test/child",
+        data_directory=data_directory,
+        mirror=mirror,
+        output_format="parquet",
+        plan=True,
+    )
+    assert statuses(plan) == [
+        ("test/raw", "source", "raw.csv", "hit", None),
+        ("test/raw", "target", "upstream.parquet", "miss", "process"),
+        ("test/child", "source", "upstream.parquet", "miss", "get test/raw"),
+        ("test/child", "target", "child.parquet", "miss", "process"),
+    ]
+    plan = maven.get(
+        "test/raw", data_directory=data_directory, mirror=mirror, process=False, plan=True
+    )
+    assert statuses(plan) == [("test/raw", "source", "raw.csv", "hit", None)]
+    assert plan.is_noop
+
+
+def test_plan_model_always_processes():
+    get_module = importlib.import_module("maven.get")
+    assert get_module.get_pipeline_class("general-election/UK/2017/model").cache_targets is False
+    assert get_module.get_pipeline_class("general-election/UK/2017/results").cache_targets is True
+
+
+def test_upstream_rebuild_invalidates_downstream(pipelines):
+    data_directory, mirror = pipelines
+    maven.get("test/child", data_directory=data_directory, mirror=mirror)
+
+    # New raw data upstream, rebuilt on its own
+    (mirror / "example.com/data/raw.csv").write_bytes(b"a\n5\n")
+    get_module = importlib.import_module("maven.get")
+    upstream = get_module.get_pipeline("test/raw", data_directory=data_directory)
+    upstream.mirror = Mirror(mirror)
+    upstream.cache = False
+    upstream.retrieve()
+    upstream.process()
+
+    # The copy of upstream.csv linked into test/child/raw is out of date, and so is child.csv
+    plan = maven.get("test/child", data_directory=data_directory, mirror=mirror, plan=True)
+    assert statuses(plan) == [
+        ("test/raw", "source", "raw.csv", "hit", None),
+        ("test/raw", "target", "upstream.csv", "hit", None),
+        ("test/child", "source", "upstream.csv", "stale", "get test/raw"),
+        ("test/child", "target", "child.csv", "stale", "process"),
+    ]
+    assert plan.processed == ["test/child"]
+    maven.get("test/child", data_directory=data_directory, mirror=mirror)
+    assert pd.read_csv(data_directory / "test/child/processed/child.csv").b.tolist() == [10]
+    assert maven.get("test/child", data_directory=data_directory, mirror=mirror, plan=True).is_noop
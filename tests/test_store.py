@@ -0,0 +1,99 @@
+"""
+Running tests in development:
+    $ cd /path/to/repo
+    $ python -m pytest
+
+Running tests against installed version (either `pip install .` or `pip install maven`):
+    $ cd /path/to/repo
+    $ pytest
+"""
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from maven import utils
+from maven.store import ArtefactStore
+
+MD5 = "9893532233caff98cd083a116b013c0b"  # MD5 of b"some content"
+
+
+def _create_file(path):
+    with open(path, "w") as f:
+        f.write("some content")
+
+
+def test_add_and_link(tmpdir):
+    store = ArtefactStore(Path(tmpdir) / ".store")
+    first, second = Path(tmpdir) / "first.txt", Path(tmpdir) / "second.txt"
+    _create_file(first)
+    _create_file(second)
+    assert MD5 not in store
+
+    store.add(first, MD5)
+    assert MD5 in store
+    assert os.path.samefile(first, store.path(MD5))
+
+    # Adding an identical file deduplicates it
+    store.add(second, MD5)
+    assert os.path.samefile(second, store.path(MD5))
+
+    store.link(MD5, Path(tmpdir) / "third.txt")
+    assert os.path.samefile(Path(tmpdir) / "third.txt", store.path(MD5))
+
+
+def test_prune(tmpdir):
+    store = ArtefactStore(Path(tmpdir) / ".store")
+    path = Path(tmpdir) / "file.txt"
+    _create_file(path)
+    store.add(path, MD5)
+    assert store.prune() == 0
+    os.remove(path)
+    assert store.prune() == 1
+    assert MD5 not in store
+
+
+def test_prune_keeps_copied_objects(monkeypatch, tmpdir):
+    def no_hardlinks(src, dst):
+        raise OSError("hardlinks not supported")
+
+    monkeypatch.setattr(os, "link", no_hardlinks)
+    store = ArtefactStore(Path(tmpdir) / ".store")
+    path = Path(tmpdir) / "file.txt"
+    _create_file(path)
+    store.add(path, MD5)
+    assert store.copied(MD5).exists()
+    # The stored copy's link count can't show whether path still uses it
+    assert store.prune() == 0
+    assert MD5 in store
+
+
+def test_retrieve_from_cache_links_from_store(tmpdir):
+    store = ArtefactStore(Path(tmpdir) / ".store")
+    first_dir, second_dir = Path(tmpdir) / "first", Path(tmpdir) / "second"
+    os.makedirs(first_dir)
+    os.makedirs(second_dir)
+    utils.retrieve_from_cache_if_exists(
+        filename="file.csv",
+        target_dir=first_dir,
+        processing_fn=lambda: _create_file(first_dir / "file.csv"),
+        md5_checksum=MD5,
+        store=store,
+    )
+
+    def fail():
+        raise AssertionError("file should be linked from the store")
+
+    utils.retrieve_from_cache_if_exists(
+        filename="file.csv",
+        target_dir=second_dir,
+        processing_fn=fail,
+        md5_checksum=MD5,
+        store=store,
+    )
+    assert os.path.samefile(first_dir / "file.csv", second_dir / "file.csv")
+
+    # Re-exporting a linked file replaces it rather than modifying the stored object
+    utils.export_frame(pd.DataFrame({"a": [1]}), second_dir / "file.csv")
+    assert utils.calculate_md5_checksum(store.path(MD5)) == MD5
+    assert not os.path.samefile(first_dir / "file.csv", second_dir / "file.csv")
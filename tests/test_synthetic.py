@@ -0,0 +1,86 @@
+"""
+Running tests in development:
+    $ cd /path/to/repo
+    $ python -m pytest ./tests/test_synthetic.py
+
+Running tests against installed version (either `pip install .` or `pip install maven`):
+    $ cd /path/to/repo
+    $ pytest ./tests/test_synthetic.py
+"""
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from maven import synthetic
+from maven.datasets.coronavirus import CSSE
+from maven.datasets.general_election import UK2017Model, UKPolls
+from maven.datasets.general_election.base import UKModel, UKResults
+
+
+def test_constituencies():
+    seats = synthetic.constituencies()
+    assert len(seats) == 650
+    assert seats.ons_id.is_unique
+    assert seats.country.value_counts().to_dict() == {
+        "England": 533,
+        "Scotland": 59,
+        "Wales": 40,
+        "Northern Ireland": 18,
+    }
+    assert synthetic.constituencies(6500).country.value_counts()["Northern Ireland"] == 180
+
+
+def test_seat_count():
+    for year in UKResults.hoc_sheets:
+        assert synthetic.seat_count(year) == UKModel.results_seat_count[int(year)]
+    assert sum(synthetic.seat_count("2017", n_seats=1000).values()) == 1000
+
+
+def test_hoc_workbook(tmpdir):
+    pytest.importorskip("openpyxl")
+    data_dir = Path(tmpdir)
+    synthetic.write_hoc_workbook(data_dir / "raw" / synthetic.HOC_WORKBOOK, n_seats=100)
+    results = UKResults.process_hoc_sheet(
+        synthetic.HOC_WORKBOOK, data_dir=data_dir, sheet_name="2017"
+    )
+    assert results.shape == (100 * 13, 11)
+    assert results.ons_id.nunique() == 100
+
+
+def test_polls(tmpdir):
+    pytest.importorskip("openpyxl")
+    directory = Path(tmpdir)
+    synthetic.write_pollbase(directory / "raw" / "PollBase-Q4-2019.xlsx", n_polls=50)
+    synthetic.write_sixfifty_polls(directory / "raw" / "polls.csv", n_polls=100)
+    pipeline = UKPolls(directory=directory)
+    pipeline.process()
+    df = pd.read_csv(directory / "processed" / "general_election-uk-polls.csv")
+    assert df.to.notnull().all()
+    assert (df["from"] <= df["to"]).all()
+    assert len(df) == 50 + 100
+
+
+def test_model(tmpdir):
+    directory = Path(tmpdir)
+    for year in ["2015", "2017"]:
+        synthetic.write_results(
+            directory / "raw" / f"general_election-uk-{year}-results.csv", year, n_seats=1300
+        )
+    synthetic.write_geo_polls(directory / "raw", "2017-06-08", n_polls=50)
+    pipeline = UK2017Model(directory=directory)
+    pipeline.results_seat_count = {
+        year: synthetic.seat_count(year, n_seats=1300) for year in [2015, 2017]
+    }
+    pipeline.process()
+    df = pd.read_csv(directory / "processed" / "general_election-uk-2017-model.csv")
+    assert df.ons_id.nunique() == 1300
+    assert df.geo_swing_winner.notnull().all()
+
+
+def test_csse(tmpdir):
+    directory = Path(tmpdir)
+    synthetic.write_csse(directory / "raw", n_locations=40, n_dates=20)
+    CSSE(directory=directory).process()
+    df = pd.read_csv(directory / "processed" / "CSSE_country_province.csv")
+    assert len(df) == 40 * 20
@@ -8,23 +8,45 @@ Running tests against installed version (either `pip install .` or `pip install
     $ pytest
 """
 import os
+import threading
 from functools import partial
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
 
-import requests
+import numpy as np
+import pandas as pd
 
 import pytest
-from maven import utils
+from maven import manifest, utils
+from maven.instrumentation import Instrumentation
+from maven.manifest import Manifest
 
 
 class MockResponse:
     """requests.get() returns an object of class Response. Let's mock that and add:
         - status_code attribute
         - content attribute
+        - headers attribute
+        - iter_content() & close() methods for streamed responses
     """
 
     status_code = 200
     content = b"some content"
+    headers = {}
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i : i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class MockSession:
+    """utils.get_session() returns a requests.Session; mock its get() with the given function."""
+
+    def __init__(self, get):
+        self.get = get
 
 
 def test_sanitise():
@@ -44,12 +66,83 @@ def test_fetch_url(monkeypatch, tmpdir):
     def mock_get(*args, **kwargs):
         return MockResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)  # replace requests.get() with our mock_get()
+    # replace the shared session's get() with our mock_get()
+    monkeypatch.setattr(utils, "get_session", lambda: MockSession(mock_get))
     utils.fetch_url(url="https://fakeurl", filename="fakefile.txt", target_dir=Path(tmpdir))
     with open(tmpdir / "fakefile.txt", "rb") as f:
         assert f.read() == b"some content"
 
 
+def test_fetch_url_streams_and_hashes(monkeypatch, tmpdir):
+    def mock_get(*args, **kwargs):
+        assert kwargs.get("stream")
+        return MockResponse()
+
+    monkeypatch.setattr(utils, "get_session", lambda: MockSession(mock_get))
+    monkeypatch.setattr(utils, "CHUNK_SIZE", 5)  # force the body to arrive in several chunks
+    checksums = utils.fetch_url(
+        url="https://fakeurl",
+        filename="fakefile.txt",
+        target_dir=Path(tmpdir),
+        algorithms=("md5", "sha256"),
+    )
+    assert checksums == {
+        "md5": "9893532233caff98cd083a116b013c0b",
+        "sha256": "290f493c44f5d63d06b374d0a5abd292fae38b92cab2fae5efefe1b0e9347f56",
+    }
+    with open(tmpdir / "fakefile.txt", "rb") as f:
+        assert f.read() == b"some content"
+
+
+def test_fetch_url_emits_download_event(monkeypatch, tmpdir):
+    def mock_get(*args, **kwargs):
+        return MockResponse()
+
+    events = []
+
+    class Recorder(Instrumentation):
+        enabled = True
+
+        def emit(self, event, **fields):
+            events.append(dict(fields, event=event))
+
+    monkeypatch.setattr(utils, "get_session", lambda: MockSession(mock_get))
+    monkeypatch.setattr(utils, "CHUNK_SIZE", 5)
+    utils.fetch_url(
+        url="https://fakeurl",
+        filename="fakefile.txt",
+        target_dir=Path(tmpdir),
+        instrumentation=Recorder(),
+    )
+    (event,) = events
+    assert event["event"] == "download"
+    assert event["url"] == "https://fakeurlfakefile.txt"
+    assert event["status"] == 200
+    assert event["bytes"] == len(b"some content")
+    assert event["seconds"] >= 0
+
+
+def test_retrieve_from_cache_uses_streamed_checksum(monkeypatch, tmpdir):
+    def mock_get(*args, **kwargs):
+        return MockResponse()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("file should not be re-read to calculate its checksum")
+
+    monkeypatch.setattr(utils, "get_session", lambda: MockSession(mock_get))
+    monkeypatch.setattr(manifest, "calculate_md5_checksum", fail)
+    utils.retrieve_from_cache_if_exists(
+        filename="fakefile.txt",
+        target_dir=Path(tmpdir),
+        processing_fn=partial(
+            utils.fetch_url, url="https://fakeurl", filename="fakefile.txt", target_dir=Path(tmpdir)
+        ),
+        md5_checksum="9893532233caff98cd083a116b013c0b",
+        caching_enabled=True,
+        verbose=False,
+    )
+
+
 def test_retrieve_from_cache_if_exists(tmpdir):
     def _create_file(target_dir):
         """Puts file.txt in the target_dir"""
@@ -88,3 +181,211 @@ def test_retrieve_from_cache_if_exists(tmpdir):
         caching_enabled=True,
         verbose=True,
     )
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves a fixed body with an ETag, answering conditional requests with 304 Not Modified."""
+
+    body = b"some content"
+    etag = '"v1"'
+    requests_served = []
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == self.etag:
+            self.requests_served.append(304)
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.requests_served.append(200)
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_server():
+    StandInHandler.requests_served = []
+    server = HTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_url_conditional_get(stand_in_server, tmpdir):
+    target_dir = Path(tmpdir)
+    checksums = utils.fetch_url(url=stand_in_server, filename="file.txt", target_dir=target_dir)
+    assert checksums == {"md5": "9893532233caff98cd083a116b013c0b"}
+    assert (target_dir / ("file.txt" + utils.VALIDATORS_SUFFIX)).exists()
+
+    # Unchanged upstream: 304, file not rewritten, saved checksum returned.
+    mtime_ns = (target_dir / "file.txt").stat().st_mtime_ns
+    checksums = utils.fetch_url(url=stand_in_server, filename="file.txt", target_dir=target_dir)
+    assert checksums == {"md5": "9893532233caff98cd083a116b013c0b"}
+    assert (target_dir / "file.txt").stat().st_mtime_ns == mtime_ns
+    assert StandInHandler.requests_served == [200, 304]
+
+    # Local file modified: validators no longer apply so the file is downloaded again.
+    with open(target_dir / "file.txt", "w") as f:
+        f.write("tampered")
+    utils.fetch_url(url=stand_in_server, filename="file.txt", target_dir=target_dir)
+    assert StandInHandler.requests_served == [200, 304, 200]
+    with open(target_dir / "file.txt", "rb") as f:
+        assert f.read() == b"some content"
+
+
+def test_retrieve_from_cache_skips_rehashing_unchanged_files(monkeypatch, tmpdir):
+    target_dir = Path(tmpdir)
+    with open(target_dir / "file.txt", "w") as f:
+        f.write("some content")
+    hashed = []
+    calculate_md5_checksum = utils.calculate_md5_checksum
+
+    def counting_md5_checksum(filename):
+        hashed.append(filename)
+        return calculate_md5_checksum(filename)
+
+    monkeypatch.setattr(manifest, "calculate_md5_checksum", counting_md5_checksum)
+    retrieve = partial(
+        utils.retrieve_from_cache_if_exists,
+        filename="file.txt",
+        target_dir=target_dir,
+        processing_fn=None,
+        md5_checksum="9893532233caff98cd083a116b013c0b",
+    )
+    retrieve()
+    assert len(hashed) == 1
+    # Cache hit on an unchanged file: checksum comes from the manifest
+    retrieve()
+    assert len(hashed) == 1
+    # verify=True forces a full re-hash
+    retrieve(verify=True)
+    assert len(hashed) == 2
+    # Changed file (different size) is re-hashed and its checksum no longer matches
+    with open(target_dir / "file.txt", "w") as f:
+        f.write("some other content")
+    with pytest.warns(UserWarning):
+        retrieve()
+    assert len(hashed) == 3
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "feather"])
+def test_export_and_read_columnar_frame(tmpdir, output_format):
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame(
+        {
+            "ons_id": ["E1", "E1", "E2"],
+            "party": ["con", "lab", "con"],
+            "votes": [100.0, np.nan, 50.0],
+            "date": pd.to_datetime(["2020-01-22", "2020-01-22", "2020-01-23"]),
+        }
+    )
+    path = utils.export_frame(df, Path(tmpdir) / "results.csv", output_format=output_format)
+    assert path.name == f"results.{output_format}"
+    assert not (Path(tmpdir) / "results.csv").exists()
+
+    # read_frame finds the columnar file from the CSV filename and keeps types
+    df_columnar = utils.read_frame(Path(tmpdir) / "results.csv")
+    assert isinstance(df_columnar.party.dtype, pd.CategoricalDtype)
+    assert isinstance(df_columnar.votes.dtype, pd.Int64Dtype)
+    assert df_columnar.date.dtype == "datetime64[ns]"
+    pd.testing.assert_frame_equal(utils.csv_types(df_columnar), df)
+
+
+def test_read_frame_csv(tmpdir):
+    df = pd.DataFrame({"party": ["con", "lab"], "votes": [1, 2]})
+    utils.export_frame(df, Path(tmpdir) / "results.csv")
+    pd.testing.assert_frame_equal(utils.read_frame(Path(tmpdir) / "results.csv"), df)
+    with pytest.raises(FileNotFoundError):
+        utils.read_frame(Path(tmpdir) / "missing.csv")
+
+
+class DoublingPipeline(utils.Pipeline):
+    """Processes raw/values.csv (already retrieved) into processed/doubled.csv, counting runs."""
+
+    def __init__(self, directory):
+        super(DoublingPipeline, self).__init__(directory=directory)
+        self.sources = [("https://example.com/", "values.csv", None)]
+        self.target = ("doubled.csv", None)
+        self.processed = 0
+
+    def process(self):
+        def process_and_export():
+            self.processed += 1
+            df = self.read_source("values.csv")
+            self.export(df * 2, self.target[0])
+
+        self.process_targets(process_and_export)
+
+
+def test_process_targets_rebuilds_when_inputs_change(monkeypatch, tmpdir):
+    directory = Path(tmpdir)
+    os.makedirs(directory / "raw")
+    pd.DataFrame({"a": [1, 2]}).to_csv(directory / "raw" / "values.csv", index=False)
+    pipeline = DoublingPipeline(directory)
+    pipeline.process()
+    assert pipeline.processed == 1
+    build = Manifest(directory / "processed").build("doubled.csv")
+    assert build["inputs"] == {
+        "values.csv": utils.calculate_md5_checksum(directory / "raw" / "values.csv")
+    }
+    assert build["code"] == utils.code_fingerprint(DoublingPipeline)
+
+    # Same raw data & code: processed file is reused
+    pipeline.process()
+    assert pipeline.processed == 1
+
+    # Changed raw data: rebuilt
+    pd.DataFrame({"a": [1, 2, 3]}).to_csv(directory / "raw" / "values.csv", index=False)
+    pipeline.process()
+    assert pipeline.processed == 2
+    assert pd.read_csv(directory / "processed" / "doubled.csv").a.tolist() == [2, 4, 6]
+    pipeline.process()
+    assert pipeline.processed == 2
+
+    # Changed code: rebuilt
+    monkeypatch.setattr(DoublingPipeline, "code_version", 2)
+    utils.code_fingerprint.cache_clear()
+    pipeline.process()
+    assert pipeline.processed == 3
+    utils.code_fingerprint.cache_clear()
+
+    # Processed files without a record of what they were built from are rebuilt
+    os.remove(directory / "processed" / ".manifest.json")
+    pipeline.process()
+    assert pipeline.processed == 4
+
+    # Forced rebuild
+    pipeline.rebuild = True
+    pipeline.process()
+    assert pipeline.processed == 5
+
+
+def test_refresh_with_unchanged_downloads_doesnt_reprocess(monkeypatch, tmpdir):
+    content = {"body": b"a\n1\n2\n"}
+
+    def mock_get(*args, **kwargs):
+        response = MockResponse()
+        response.content = content["body"]
+        return response
+
+    monkeypatch.setattr(utils, "get_session", lambda: MockSession(mock_get))
+    pipeline = DoublingPipeline(Path(tmpdir))
+    pipeline.cache = False  # refresh: always download the raw data
+    for _ in range(2):
+        pipeline.retrieve()
+        pipeline.process()
+    assert pipeline.processed == 1
+
+    # Download comes back changed: processed again
+    content["body"] = b"a\n1\n2\n3\n"
+    pipeline.retrieve()
+    pipeline.process()
+    assert pipeline.processed == 2
+    assert pd.read_csv(Path(tmpdir) / "processed" / "doubled.csv").a.tolist() == [2, 4, 6]